@@ -1,11 +1,19 @@
 import os
 import logging
 import uuid
-import json
+import threading
+import time
+import chess
 from flask import Flask, render_template, jsonify, request
 from database import db
 from chess_engine import ChessEngine
 from dqn_agent import DQNAgent
+from training_jobs import TrainingJobManager
+from snapshots import SnapshotStore
+from checkpoints import CheckpointStore, AgentRegistry
+from persistence import save_self_play_results
+from inference_batcher import InferenceBatcher
+from game_sessions import GameSessionStore
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -31,26 +39,128 @@ logging.info(f"Using SQLite database at: {db_path}")
 
 # Initialize the chess engine and DQN agent
 chess_engine = ChessEngine()
-dqn_agent = DQNAgent()
+
+# Bound the agent's value table so long-running workers don't grow without limit
+def _env_int(name, default=None):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+def create_agent():
+    """Build an agent with the configured value table limits (0 disables a limit)"""
+    return DQNAgent(
+        max_table_entries=_env_int("VALUE_TABLE_MAX_ENTRIES", 1000000) or None,
+        max_table_bytes=_env_int("VALUE_TABLE_MAX_BYTES") or None,
+        eviction_policy=os.environ.get("VALUE_TABLE_EVICTION_POLICY", "lfu")
+    )
+
+# The serving agent can be swapped between checkpoint versions at runtime, so
+# handlers read agent_registry.current once and use that agent for the whole request
+agent_registry = AgentRegistry(create_agent(), create_agent)
+checkpoint_store = CheckpointStore(
+    os.environ.get("CHECKPOINT_DIR", os.path.join(os.path.expanduser("~"), "workspace", "checkpoints"))
+)
+
+# Concurrent move requests can share network forward passes, gathered over a short window
+# (e.g. INFERENCE_BATCH_WINDOW_MS=2). Off by default: with the current small network the
+# forward pass isn't the bottleneck, so batching has not improved throughput
+inference_batch_window_ms = float(os.environ.get("INFERENCE_BATCH_WINDOW_MS", 0))
+inference_batcher = InferenceBatcher(
+    max_wait_ms=inference_batch_window_ms,
+    max_positions=_env_int("INFERENCE_BATCH_MAX_POSITIONS") or 512,
+    timeout_ms=_env_int("INFERENCE_BATCH_TIMEOUT_MS") or 1000
+) if inference_batch_window_ms > 0 else None
+
+# Games played through /api/games keep a live board per session instead of a FEN per request
+game_sessions = GameSessionStore(
+    max_sessions=_env_int("GAME_SESSION_MAX") or 1000,
+    ttl_seconds=_env_int("GAME_SESSION_TTL_SECONDS") or 3600
+)
+
+# Agent snapshots let new workers warm-start instead of replaying every stored game
+# (set SNAPSHOT_DIR to an empty string to disable them)
+snapshot_dir = os.environ.get("SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), "workspace", "snapshots"))
+snapshot_store = SnapshotStore(
+    snapshot_dir,
+    keep=_env_int("SNAPSHOT_KEEP") or 3,
+    interval_seconds=_env_int("SNAPSHOT_INTERVAL_SECONDS") or 300
+) if snapshot_dir else None
+
+def save_snapshot(force=False):
+    """Write an agent snapshot (at most once per snapshot interval unless forced)"""
+    if snapshot_store is None:
+        return None
+    agent = agent_registry.current
+    try:
+        return snapshot_store.save(agent) if force else snapshot_store.save_if_due(agent)
+    except Exception as e:
+        logging.error(f"Error saving agent snapshot: {e}")
+        return None
+
+snapshot_write_lock = threading.Lock()  # One background snapshot write at a time
+
+def save_snapshot_in_background():
+    """Write a due agent snapshot on a background thread, so requests don't wait on the disk"""
+    if snapshot_store is None or not snapshot_store.is_due():
+        return
+    if not snapshot_write_lock.acquire(blocking=False):
+        return
+    
+    def write():
+        try:
+            save_snapshot()
+        finally:
+            snapshot_write_lock.release()
+    threading.Thread(target=write, name="snapshot-writer", daemon=True).start()
 
 # Pre-load database games into the DQN agent when the application starts
 # This ensures the AI retains knowledge across application restarts
 def load_games_at_startup():
-    """Load games from database into AI memory on first request"""
+    """Restore the active checkpoint or newest snapshot and load newer games from database into AI memory on first request"""
     # We'll load games only once
     if not hasattr(load_games_at_startup, 'loaded'):
         logging.info("Loading past games from database into AI memory...")
         try:
-            dqn_agent.load_games_from_database(aggressive_training=True)
+            # Serve the checkpoint version other workers were switched to, if any
+            active_version = checkpoint_store.active_version()
+            if active_version is not None and checkpoint_store.exists(active_version):
+                agent_registry.activate(checkpoint_store, active_version)
+            
+            agent = agent_registry.current
+            with agent.lock:
+                restored = agent_registry.version is not None
+                if not restored and snapshot_store is not None:
+                    try:
+                        restored = snapshot_store.load(agent) is not None
+                    except Exception as e:
+                        logging.error(f"Error loading agent snapshot, rebuilding from the database: {e}")
+                        agent.load_games_from_database(aggressive_training=True, full_rebuild=True)
+                # Only games stored after the snapshot are replayed
+                agent.load_games_from_database(aggressive_training=True)
+            if not restored:
+                save_snapshot(force=True)
             load_games_at_startup.loaded = True
             logging.info("Successfully loaded games from database")
         except Exception as e:
             logging.error(f"Error loading games at startup: {e}")
+
+# How often each worker checks whether another worker switched the serving checkpoint
+CHECKPOINT_SYNC_SECONDS = _env_int("CHECKPOINT_SYNC_SECONDS") or 5
+
+def sync_active_checkpoint():
+    """Follow checkpoint switches made through other worker processes, loading in the background"""
+    now = time.monotonic()
+    if now - getattr(sync_active_checkpoint, 'last_checked', 0) < CHECKPOINT_SYNC_SECONDS:
+        return
+    sync_active_checkpoint.last_checked = now
+    # A pinned agent (training job running) can't be swapped; check again after the job
+    if not agent_registry.pinned_now and checkpoint_store.active_version() != agent_registry.version:
+        threading.Thread(target=agent_registry.sync, args=(checkpoint_store,), daemon=True).start()
             
 # Register route to trigger database loading on first access
 @app.before_request
 def before_request():
     load_games_at_startup()
+    sync_active_checkpoint()
 
 @app.route('/')
 def home():
@@ -68,20 +178,49 @@ def ai_description():
 def watch_training():
     return render_template('watch_training.html')
 
+def search_limits(data):
+    """Validated optional (depth, movetime_ms) search limits of a move request
+    
+    Each is either absent or a positive integer (the agent caps both); raises
+    ValueError otherwise.
+    """
+    limits = []
+    for name in ('depth', 'movetime_ms'):
+        value = data.get(name)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+            raise ValueError(f'{name} must be a positive integer')
+        limits.append(value)
+    return tuple(limits)
+
 @app.route('/api/get-ai-move', methods=['POST'])
 def get_ai_move():
     """Get the AI's next move based on the current board state"""
     data = request.get_json()
     fen = data.get('fen')
     
-    # Use the DQN agent to calculate the next move
-    move, confidence, network_states = dqn_agent.get_move(fen)
+    # Optional search limits: without them the agent uses its one-ply value lookahead
+    try:
+        depth, movetime_ms = search_limits(data)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    include_network_states = bool(data.get('include_network_states', False))
+    
+    # Use the DQN agent to calculate the next move; it locks only around shared state, and
+    # with batching enabled unseen positions share forward passes with concurrent requests
+    agent = agent_registry.current
+    move, confidence, network_states = agent.get_move(
+        fen, depth=depth, movetime_ms=movetime_ms, include_network_states=include_network_states,
+        batcher=inference_batcher
+    )
     
-    return jsonify({
+    response = {
         'move': move,
-        'confidence': confidence,
-        'network_states': network_states
-    })
+        'confidence': confidence
+    }
+    # The network visualization is opt-in
+    if include_network_states:
+        response['network_states'] = network_states
+    return jsonify(response)
 
 @app.route('/api/evaluate-position', methods=['POST'])
 def evaluate_position():
@@ -89,12 +228,66 @@ def evaluate_position():
     data = request.get_json()
     fen = data.get('fen')
     
+    include_network_states = bool(data.get('include_network_states', False))
+    
     # Get an evaluation of the current position
-    evaluation, network_states = dqn_agent.evaluate_position(fen)
+    agent = agent_registry.current
+    with agent.lock:
+        evaluation, network_states = agent.evaluate_position(fen, include_network_states=include_network_states)
+    
+    response = {'evaluation': evaluation}
+    # The network visualization is opt-in
+    if include_network_states:
+        response['network_states'] = network_states
+    return jsonify(response)
+
+# Upper bound on the positions scored by one /api/evaluate-batch request
+MAX_BATCH_POSITIONS = 1000
+
+@app.route('/api/evaluate-batch', methods=['POST'])
+def evaluate_batch():
+    """Evaluate many positions in one request
+    
+    Accepts either {"fens": [...]} or {"fen": start, "moves": [uci, ...]}; the
+    latter scores the start position and the position after every move (one
+    more evaluation than moves), e.g. for a whole-game analysis graph.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    fens = data.get('fens')
+    moves = data.get('moves')
+    
+    if (fens is None) == (moves is None):
+        return jsonify({'status': 'error', 'message': 'Provide either fens or moves'}), 400
+    positions = fens if fens is not None else moves
+    if not isinstance(positions, list) or not all(isinstance(item, str) for item in positions):
+        return jsonify({'status': 'error', 'message': 'fens and moves must be lists of strings'}), 400
+    if not isinstance(data.get('fen') or '', str):
+        return jsonify({'status': 'error', 'message': 'fen must be a string'}), 400
+    count = len(fens) if fens is not None else len(moves) + 1
+    if count > MAX_BATCH_POSITIONS:
+        return jsonify({
+            'status': 'error',
+            'message': f'At most {MAX_BATCH_POSITIONS} positions per request'
+        }), 400
+    
+    agent = agent_registry.current
+    try:
+        if fens is not None:
+            positions = [chess.Board(fen) for fen in fens]
+        else:
+            positions = agent.game_positions(moves, data.get('fen') or chess.STARTING_FEN)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    # One table lookup and one network pass for the whole batch
+    with agent.lock:
+        evaluations = agent.evaluate_batch(positions)
     
     return jsonify({
-        'evaluation': evaluation,
-        'network_states': network_states
+        'status': 'success',
+        'evaluations': evaluations.tolist()
     })
 
 @app.route('/api/check-game-state', methods=['POST'])
@@ -125,136 +318,292 @@ def get_legal_moves():
         'moves': legal_moves
     })
 
+@app.route('/api/position-moves', methods=['POST'])
+def get_position_moves():
+    """Every legal move of a position grouped by from-square, plus its game state and check status
+    
+    One call per ply answers every square click on the client.
+    """
+    data = request.get_json(silent=True) or {}
+    fen = data.get('fen') or ''
+    if not isinstance(fen, str):
+        return jsonify({'status': 'error', 'message': 'fen must be a string'}), 400
+    try:
+        position = chess_engine.get_position(fen)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify(position)
+
+def game_session_not_found(game_id):
+    """404 response for an unknown or expired game session"""
+    return jsonify({'status': 'error', 'message': f'Unknown or expired game {game_id}'}), 404
+
+@app.route('/api/games', methods=['POST'])
+def create_game():
+    """Start a server-side game session, from the starting position or an optional FEN"""
+    data = request.get_json(silent=True) or {}
+    fen = data.get('fen')
+    if fen is not None and not isinstance(fen, str):
+        return jsonify({'status': 'error', 'message': 'fen must be a string'}), 400
+    try:
+        session = game_sessions.create(
+            fen=fen,
+            white_player=data.get('white_player', 'User'),
+            black_player=data.get('black_player', 'AI')
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    with session.lock:
+        return jsonify(session.to_dict()), 201
+
+@app.route('/api/games/<game_id>', methods=['GET'])
+def get_game(game_id):
+    """Current position, moves and state of a game session"""
+    session = game_sessions.get(game_id)
+    if session is None:
+        return game_session_not_found(game_id)
+    
+    with session.lock:
+        return jsonify(session.to_dict())
+
+@app.route('/api/games/<game_id>', methods=['DELETE'])
+def delete_game(game_id):
+    """End a game session"""
+    if not game_sessions.delete(game_id):
+        return game_session_not_found(game_id)
+    return jsonify({'status': 'success'})
+
+@app.route('/api/games/<game_id>/move', methods=['POST'])
+def play_game_move(game_id):
+    """Play a move (UCI) in a game session"""
+    session = game_sessions.get(game_id)
+    if session is None:
+        return game_session_not_found(game_id)
+    
+    data = request.get_json(silent=True) or {}
+    move = data.get('move') or ''
+    if not isinstance(move, str):
+        return jsonify({'status': 'error', 'message': 'move must be a string'}), 400
+    with session.lock:
+        try:
+            session.push_uci(move)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        return jsonify(session.to_dict())
+
+@app.route('/api/games/<game_id>/ai-move', methods=['POST'])
+def play_game_ai_move(game_id):
+    """Let the AI choose and play the next move of a game session
+    
+    Accepts the same depth and movetime_ms limits as /api/get-ai-move.
+    """
+    session = game_sessions.get(game_id)
+    if session is None:
+        return game_session_not_found(game_id)
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        depth, movetime_ms = search_limits(data)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    agent = agent_registry.current
+    with session.lock:
+        move, confidence, _ = agent.get_move(
+            session.board, depth=depth, movetime_ms=movetime_ms, batcher=inference_batcher
+        )
+        if move is not None:
+            session.push_uci(move)
+        response = session.to_dict()
+    
+    response.update({'move': move, 'confidence': confidence})
+    return jsonify(response)
+
+@app.route('/api/games/<game_id>/undo', methods=['POST'])
+def undo_game_move(game_id):
+    """Take back the last move of a game session"""
+    session = game_sessions.get(game_id)
+    if session is None:
+        return game_session_not_found(game_id)
+    
+    with session.lock:
+        undone = session.undo()
+        response = session.to_dict()
+    
+    response['undone'] = undone
+    return jsonify(response)
+
+@app.route('/api/games/<game_id>/legal-moves', methods=['GET'])
+def get_game_legal_moves(game_id):
+    """Legal moves in a game session, for one piece (?square=e2) or the whole position"""
+    session = game_sessions.get(game_id)
+    if session is None:
+        return game_session_not_found(game_id)
+    
+    square = request.args.get('square')
+    with session.lock:
+        try:
+            if square:
+                moves = chess_engine.legal_moves_from(session.board, square)
+            else:
+                moves = [move.uci() for move in session.board.legal_moves]
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({'moves': moves})
+
+def run_training_job(num_games, progress_callback, should_stop, workers=1, merge="replay", lockstep_games=None):
+    """Run self-play training on the background worker and record the session in the database"""
+    # Checkpoint swaps wait for the job, so its training lands in the serving agent
+    with agent_registry.pinned() as agent:
+        training_results = agent.self_play_training(
+            num_games, progress_callback=progress_callback, should_stop=should_stop,
+            workers=workers, merge=merge, lockstep_games=lockstep_games
+        )
+        
+        # Save the session's games, summary and counters in one transaction
+        game_ids = save_self_play_results(db.engine, agent, training_results)
+        
+        # Self-play games are learned from while playing, so incremental loads skip them
+        with agent.lock:
+            agent.mark_ingested(game_ids)
+        
+        invalidate_training_stats()
+        save_snapshot(force=True)
+    return training_results
+
+# Long self-play runs execute in the background instead of inside the request; jobs are
+# known only to this worker process (see TrainingJobManager), like game sessions
+training_jobs = TrainingJobManager(app, run_training_job)
+
 @app.route('/api/start-training', methods=['POST'])
 def start_training():
-    """Start self-play training for the AI"""
+    """Queue self-play training for the AI and return the job id immediately"""
     data = request.get_json()
     num_games = data.get('num_games', 10)
+    if isinstance(num_games, bool) or not isinstance(num_games, int) or num_games < 1:
+        return jsonify({'status': 'error', 'message': 'num_games must be a positive integer'}), 400
     
-    # Limit max games for web requests to prevent timeout, allowing up to 1000 games
+    # Limit max games per job, allowing up to 1000 games
     if num_games > 1000:
         num_games = min(num_games, 1000)
-        logging.info(f"Limited training games to {num_games} to prevent timeout")
+        logging.info(f"Limited training games to {num_games}")
     
-    # Start training
-    try:
-        training_results = dqn_agent.self_play_training(num_games)
-        
-        # Save training session to database
-        training_id = str(uuid.uuid4())
-        
-        # Create training stats summary
-        total_games = len(training_results)
-        white_wins = sum(1 for game in training_results if game['result'] == '1-0')
-        black_wins = sum(1 for game in training_results if game['result'] == '0-1')
-        draws = sum(1 for game in training_results if game['result'] == '1/2-1/2')
-        avg_game_length = sum(game['moves'] for game in training_results) / max(1, total_games)
-        avg_reward = sum(game['reward'] for game in training_results) / max(1, total_games)
-        
-        # Import models here to avoid circular imports
-        import models
-        
-        # Save to database
-        stats = models.TrainingStats(
-            training_session=training_id,
-            total_games=total_games,
-            white_wins=white_wins,
-            black_wins=black_wins,
-            draws=draws,
-            avg_game_length=avg_game_length,
-            avg_reward=avg_reward,
-            epsilon=dqn_agent.epsilon,
-            alpha=dqn_agent.alpha,
-            gamma=dqn_agent.gamma,
-            positions_evaluated=dqn_agent.position_count
-        )
-        db.session.add(stats)
-        
-        # Save each game to the database
-        for i, game_data in enumerate(training_results):
-            game_id = str(uuid.uuid4())
-            # Convert the move list to JSON string
-            moves_json = json.dumps(game_data.get('moves_list', []))
-            
-            game = models.GameHistory(
-                game_id=game_id,
-                moves=moves_json,
-                result=game_data['result'],
-                white_player="AI",
-                black_player="AI",
-                game_type="self-play",
-                evaluation=game_data.get('reward', 0)
-            )
-            db.session.add(game)
-        
-        db.session.commit()
-        
-        return jsonify({
-            'status': 'success',
-            'games_completed': total_games,
-            'training_data': training_results,
-            'summary': {
-                'white_wins_percent': (white_wins / total_games) * 100 if total_games > 0 else 0,
-                'black_wins_percent': (black_wins / total_games) * 100 if total_games > 0 else 0,
-                'draws_percent': (draws / total_games) * 100 if total_games > 0 else 0
-            }
+    # Parallel self-play: worker processes (capped at the core count) and how their results are merged
+    workers = data.get('workers', _env_int("TRAINING_WORKERS") or 1)
+    if isinstance(workers, bool) or not isinstance(workers, int) or workers < 1:
+        return jsonify({'status': 'error', 'message': 'workers must be a positive integer'}), 400
+    workers = min(workers, os.cpu_count() or 1)
+    merge = data.get('merge', 'replay')
+    if merge not in ('replay', 'average'):
+        return jsonify({'status': 'error', 'message': f"Unknown merge mode: {merge}"}), 400
+    
+    # Lockstep mode: games advanced together per ply with batched move scoring
+    lockstep_games = data.get('lockstep_games')
+    if lockstep_games is not None and (isinstance(lockstep_games, bool) or not isinstance(lockstep_games, int)
+                                       or lockstep_games < 1):
+        return jsonify({'status': 'error', 'message': 'lockstep_games must be a positive integer'}), 400
+    lockstep_games = min(lockstep_games, 256) if lockstep_games else None
+    
+    job = training_jobs.submit(num_games, workers=workers, merge=merge, lockstep_games=lockstep_games)
+    return jsonify({
+        'status': 'accepted',
+        'job_id': job.job_id,
+        'job': job.to_dict()
+    }), 202
+
+@app.route('/api/training-jobs', methods=['GET'])
+def list_training_jobs():
+    """List known training jobs, oldest first"""
+    return jsonify({
+        'status': 'success',
+        'jobs': [job.to_dict() for job in training_jobs.list()]
+    })
+
+@app.route('/api/training-jobs/<job_id>', methods=['GET'])
+def get_training_job(job_id):
+    """Report progress of a training job: games completed, games/sec, epsilon and partial results"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown training job'}), 404
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+@app.route('/api/training-jobs/<job_id>', methods=['DELETE'])
+@app.route('/api/training-jobs/<job_id>/cancel', methods=['POST'])
+def cancel_training_job(job_id):
+    """Cancel a training job; a running job stops after its current game"""
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown training job'}), 404
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+# Stats polled by the training page are cached briefly; writes invalidate the cache
+STATS_CACHE_TTL_SECONDS = float(os.environ.get("STATS_CACHE_TTL_SECONDS", 2))
+training_stats_cache = {'stats': None, 'expires': 0.0}
+
+def invalidate_training_stats():
+    """Drop the cached training stats so the next poll recomputes them"""
+    training_stats_cache['expires'] = 0.0
+
+def compute_training_stats():
+    """Combine the agent's in-memory stats with the latest stored training session"""
+    # Get in-memory stats from the agent
+    agent = agent_registry.current
+    agent_stats = agent.get_training_stats()
+    
+    # Import models here to avoid circular imports
+    import models
+    
+    # Get database stats
+    db_stats = models.TrainingStats.query.order_by(models.TrainingStats.timestamp.desc()).first()
+    
+    if db_stats:
+        # Add database stats if available
+        combined_stats = {
+            'total_games': db_stats.total_games,
+            'white_wins': db_stats.white_wins,
+            'black_wins': db_stats.black_wins,
+            'draws': db_stats.draws,
+            'white_win_percentage': db_stats.white_win_percentage(),
+            'black_win_percentage': db_stats.black_win_percentage(),
+            'draw_percentage': db_stats.draw_percentage(),
+            'avg_game_length': db_stats.avg_game_length,
+            'avg_reward': db_stats.avg_reward,
+            'epsilon': db_stats.epsilon,
+            'alpha': db_stats.alpha,
+            'gamma': db_stats.gamma,
+            'positions_evaluated': db_stats.positions_evaluated,
+            'last_updated': db_stats.timestamp.isoformat(),
+            # Include agent's in-memory data
+            'last_game': agent_stats.get('last_game', []),
+            'training_history': agent_stats.get('training_history', [])
+        }
+        combined_stats.update({
+            key: value for key, value in agent_stats.items() if key.startswith('value_table_')
         })
-    except Exception as e:
-        logging.error(f"Error in training: {e}")
-        db.session.rollback()
-        return jsonify({
-            'status': 'error',
-            'message': str(e)
-        }), 500
+    else:
+        # Fall back to agent stats if no database records
+        combined_stats = agent_stats
+    
+    # Count of games in database, from the stored-game counters
+    if agent_stats.get('db_total_games'):
+        combined_stats['total_stored_games'] = agent_stats['db_total_games']
+    return combined_stats
 
 @app.route('/api/get-training-stats', methods=['GET'])
 def get_training_stats():
     """Get statistics about the AI's training progress"""
     try:
-        # Create a new session to isolate database operations
-        with db.session.begin():
-            # Get in-memory stats from the agent
-            agent_stats = dqn_agent.get_training_stats()
-            
-            # Import models here to avoid circular imports
-            import models
-            
-            # Get database stats
-            db_stats = models.TrainingStats.query.order_by(models.TrainingStats.timestamp.desc()).first()
-            
-            if db_stats:
-                # Add database stats if available
-                combined_stats = {
-                    'total_games': db_stats.total_games,
-                    'white_wins': db_stats.white_wins,
-                    'black_wins': db_stats.black_wins,
-                    'draws': db_stats.draws,
-                    'white_win_percentage': db_stats.white_win_percentage(),
-                    'black_win_percentage': db_stats.black_win_percentage(),
-                    'draw_percentage': db_stats.draw_percentage(),
-                    'avg_game_length': db_stats.avg_game_length,
-                    'avg_reward': db_stats.avg_reward,
-                    'epsilon': db_stats.epsilon,
-                    'alpha': db_stats.alpha,
-                    'gamma': db_stats.gamma,
-                    'positions_evaluated': db_stats.positions_evaluated,
-                    'last_updated': db_stats.timestamp.isoformat(),
-                    # Include agent's in-memory data
-                    'last_game': agent_stats.get('last_game', []),
-                    'training_history': agent_stats.get('training_history', [])
-                }
-            else:
-                # Fall back to agent stats if no database records
-                combined_stats = agent_stats
-            
-        # Get count of games in database
-        game_count = models.GameHistory.query.count()
-        if game_count:
-            combined_stats['total_stored_games'] = game_count
+        now = time.monotonic()
+        if training_stats_cache['stats'] is None or now >= training_stats_cache['expires']:
+            training_stats_cache['stats'] = compute_training_stats()
+            training_stats_cache['expires'] = now + STATS_CACHE_TTL_SECONDS
         
         return jsonify({
             'status': 'success',
-            'stats': combined_stats
+            'stats': training_stats_cache['stats']
         })
     except Exception as e:
         logging.error(f"Error getting training stats: {e}")
@@ -268,22 +617,32 @@ def update_training_parameters():
     """Update the DQN agent's hyperparameters"""
     data = request.get_json()
     
+    agent = agent_registry.current
     try:
-        if 'epsilon' in data:
-            dqn_agent.epsilon = float(data['epsilon'])
-        if 'alpha' in data:
-            dqn_agent.alpha = float(data['alpha'])
-        if 'gamma' in data:
-            dqn_agent.gamma = float(data['gamma'])
+        with agent.lock:
+            # Everything is validated before anything changes, so a bad request leaves the agent as it was
+            updates = {name: float(data[name]) for name in ('epsilon', 'alpha', 'gamma') if name in data}
+            if 'replay_mode' in data or 'per_alpha' in data or 'per_beta' in data:
+                agent.set_replay_mode(
+                    data.get('replay_mode', agent.replay_mode),
+                    per_alpha=data.get('per_alpha'),
+                    per_beta=data.get('per_beta')
+                )
+            for name, value in updates.items():
+                setattr(agent, name, value)
+        invalidate_training_stats()
             
         return jsonify({
             'status': 'success',
             'parameters': {
-                'epsilon': dqn_agent.epsilon,
-                'alpha': dqn_agent.alpha,
-                'gamma': dqn_agent.gamma
+                'epsilon': agent.epsilon,
+                'alpha': agent.alpha,
+                'gamma': agent.gamma,
+                'replay_mode': agent.replay_mode
             }
         })
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         logging.error(f"Error updating parameters: {e}")
         return jsonify({
@@ -291,6 +650,101 @@ def update_training_parameters():
             'message': str(e)
         }), 500
 
+@app.route('/api/load-games', methods=['POST'])
+def load_games():
+    """Learn from stored games newer than the last one ingested, or rebuild from every stored game"""
+    data = request.get_json(silent=True) or {}
+    full_rebuild = bool(data.get('full_rebuild', False))
+    
+    agent = agent_registry.current
+    try:
+        with agent.lock:
+            loaded = agent.load_games_from_database(aggressive_training=True, full_rebuild=full_rebuild)
+            last_ingested_game_id = agent.last_ingested_game_id
+        invalidate_training_stats()
+        if loaded:
+            save_snapshot(force=full_rebuild)
+        
+        return jsonify({
+            'status': 'success',
+            'loaded': loaded,
+            'full_rebuild': full_rebuild,
+            'last_ingested_game_id': last_ingested_game_id,
+            'stats': agent.get_training_stats()
+        })
+    except Exception as e:
+        logging.error(f"Error loading games: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/checkpoints', methods=['GET'])
+def list_checkpoints():
+    """List stored checkpoint versions and the version this worker is serving"""
+    return jsonify({
+        'status': 'success',
+        'serving_version': agent_registry.version,
+        'active_version': checkpoint_store.active_version(),
+        'previous_version': agent_registry.previous_version,
+        'can_rollback': agent_registry.can_rollback,
+        'checkpoints': checkpoint_store.versions()
+    })
+
+@app.route('/api/checkpoints', methods=['POST'])
+def save_checkpoint():
+    """Store the serving agent's current knowledge as a new checkpoint version"""
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        version = checkpoint_store.save_version(agent_registry.current, label=data.get('label'))
+        return jsonify({'status': 'success', 'version': version}), 201
+    except Exception as e:
+        logging.error(f"Error saving checkpoint: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/checkpoints/<int:version>/activate', methods=['POST'])
+def activate_checkpoint(version):
+    """Load a checkpoint version and swap it in as the serving agent (other workers follow)"""
+    try:
+        agent_registry.activate(checkpoint_store, version)
+    except KeyError:
+        return jsonify({'status': 'error', 'message': f'Unknown checkpoint version {version}'}), 404
+    except RuntimeError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    except Exception as e:
+        logging.error(f"Error activating checkpoint {version}: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+    
+    checkpoint_store.set_active(version)
+    invalidate_training_stats()
+    return jsonify({
+        'status': 'success',
+        'serving_version': agent_registry.version,
+        'previous_version': agent_registry.previous_version
+    })
+
+@app.route('/api/checkpoints/rollback', methods=['POST'])
+def rollback_checkpoint():
+    """Swap back to the agent served before the last activation"""
+    try:
+        version = agent_registry.rollback()
+    except (LookupError, RuntimeError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    
+    checkpoint_store.set_active(version)
+    invalidate_training_stats()
+    return jsonify({
+        'status': 'success',
+        'serving_version': version
+    })
+
 @app.route('/api/save-game', methods=['POST'])
 def save_game():
     """Save a completed game to the database for training"""
@@ -323,16 +777,20 @@ def save_game():
         # Set the moves list
         game.set_moves_list(moves_list)
         
-        # Add to database and commit
+        # Add to database and commit, together with the stored-game counters
         db.session.add(game)
+        models.GameCounters.record_games(db.session, [(game.result, game.move_count, game.evaluation)])
         db.session.commit()
+        invalidate_training_stats()
         
-        # After saving, refresh the DQN agent's knowledge
-        # Aggressively train on this new game immediately with True flag
-        dqn_agent.load_games_from_database(aggressive_training=True)
+        # Learn from just this game, aggressively training on it immediately
+        agent = agent_registry.current
+        with agent.lock:
+            agent.ingest_game(game, aggressive_training=True)
+        save_snapshot_in_background()
         
         # Get updated stats for the UI
-        agent_stats = dqn_agent.get_training_stats()
+        agent_stats = agent.get_training_stats()
         
         return jsonify({
             'status': 'success',
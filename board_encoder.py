@@ -0,0 +1,156 @@
+import chess
+import numpy as np
+
+# Plane order follows the piece symbols "PNBRQKpnbrqk": white pieces first, then black
+PLANE_PIECES = [(color, piece_type) for color in (chess.WHITE, chess.BLACK) for piece_type in chess.PIECE_TYPES]
+PLANE_SYMBOLS = [chess.Piece(piece_type, color).symbol() for color, piece_type in PLANE_PIECES]
+
+NUM_PLANES = 12
+NUM_EXTRA_FEATURES = 16
+EXTRAS_OFFSET = 64 * NUM_PLANES
+FEATURE_SIZE = EXTRAS_OFFSET + NUM_EXTRA_FEATURES
+
+# Offsets of the additional features that follow the 12x64 piece planes
+EXTRA_TURN = 0               # 1.0 if white to move
+EXTRA_CASTLING = 1           # 4 slots: white kingside, white queenside, black kingside, black queenside
+EXTRA_EN_PASSANT = 5         # 1.0 if an en passant square is set
+EXTRA_IN_CHECK = 6           # 1.0 if the side to move is in check
+EXTRA_HALFMOVE_CLOCK = 7     # Halfmove clock / 100
+EXTRA_FULLMOVE_NUMBER = 8    # Fullmove number / 100
+EXTRA_MOBILITY = 9           # Legal move count / 100, signed by the side to move
+EXTRA_MATERIAL = 10          # Material balance in pawn units (P=1, N=3, B=3, R=5, Q=9)
+EXTRA_POSITIONAL = 11        # Piece-square table score in pawn units (table values * 0.01)
+EXTRA_WHITE_MATERIAL = 12    # White material in pawn units / 39
+EXTRA_BLACK_MATERIAL = 13    # Black material in pawn units / 39
+EXTRA_PAWN_BALANCE = 14      # White pawns minus black pawns / 8
+EXTRA_BIAS = 15              # Constant 1.0
+
+PAWN_UNIT_VALUES = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0}
+# Kings are left out: both sides always have one, so their value cancels in the balance
+
+
+class BoardEncoder:
+    """Encode chess positions as 12x64 bitboard planes plus additional features
+
+    Planes are built directly from the board's piece bitboards, so a position is
+    encoded without any per-square lookups. The feature layout matches the input
+    layer of the agent's network (64 * 12 + 16 values).
+    """
+
+    def __init__(self, piece_square_tables=None):
+        # Signed per-plane material weights (white positive, black negative)
+        signs = np.array([1.0 if color == chess.WHITE else -1.0 for color, _ in PLANE_PIECES])
+        self.pawn_unit_weights = signs * np.array([PAWN_UNIT_VALUES[pt] for _, pt in PLANE_PIECES], dtype=np.float64)
+        self.white_material_weights = np.where(signs > 0, np.abs(self.pawn_unit_weights), 0.0)
+        self.black_material_weights = np.where(signs < 0, np.abs(self.pawn_unit_weights), 0.0)
+
+        # Piece-square tables flattened to (12, 64), indexed [plane][rank * 8 + file].
+        # The tables are written with rank 8 in the first row, so flip them to square order.
+        if piece_square_tables is not None:
+            self.positional_weights = np.stack([
+                np.flipud(np.asarray(piece_square_tables[symbol], dtype=np.float64)).reshape(64) * 0.01
+                for symbol in PLANE_SYMBOLS
+            ])
+        else:
+            self.positional_weights = np.zeros((NUM_PLANES, 64))
+
+    @staticmethod
+    def _coerce_board(fen_or_board):
+        """Return a chess.Board for a FEN string or an existing board"""
+        if isinstance(fen_or_board, chess.Board):
+            return fen_or_board
+        return chess.Board(fen_or_board)
+
+    @staticmethod
+    def piece_masks(board):
+        """Return the 12 piece bitboards of a position in plane order"""
+        white, black = board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK]
+        pieces = (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings)
+        return [mask & white for mask in pieces] + [mask & black for mask in pieces]
+
+    @staticmethod
+    def unpack_planes(masks):
+        """Expand (N, 12) uint64 bitboards into (N, 12, 64) float32 planes (bit i = square i)"""
+        masks = np.ascontiguousarray(masks, dtype='<u8')
+        bits = np.unpackbits(masks.view(np.uint8).reshape(masks.shape[0], NUM_PLANES, 8), axis=-1, bitorder='little')
+        return bits.astype(np.float32)
+
+    def pack(self, fen_or_board):
+        """Return (masks, extras) for one position: 12 uint64 bitboards and the raw extra features"""
+        masks, extras = self.pack_batch([fen_or_board])
+        return masks[0], extras[0]
+
+    def pack_batch(self, fens_or_boards):
+        """Return (masks[N, 12] uint64, extras[N, 16] float32) for N positions
+
+        The packed form is 160 bytes per position, which makes it suitable for
+        storing alongside replay transitions. Material and positional extras are
+        filled in from the planes in a single vectorized pass.
+        """
+        boards = [self._coerce_board(item) for item in fens_or_boards]
+        count = len(boards)
+        masks = np.zeros((count, NUM_PLANES), dtype=np.uint64)
+        extras = np.zeros((count, NUM_EXTRA_FEATURES), dtype=np.float32)
+        for i, board in enumerate(boards):
+            self._pack_row(board, masks[i], extras[i])
+        self._fill_material(masks, extras)
+        return masks, extras
+
+    def pack_children(self, board, moves):
+        """Pack the positions reached by each of moves from board, using push/pop instead of copies"""
+        count = len(moves)
+        masks = np.zeros((count, NUM_PLANES), dtype=np.uint64)
+        extras = np.zeros((count, NUM_EXTRA_FEATURES), dtype=np.float32)
+        for i, move in enumerate(moves):
+            board.push(move)
+            try:
+                self._pack_row(board, masks[i], extras[i])
+            finally:
+                board.pop()
+        self._fill_material(masks, extras)
+        return masks, extras
+
+    def _pack_row(self, board, masks_row, row):
+        """Fill one row of bitboards and the per-board extras"""
+        masks_row[:] = self.piece_masks(board)
+        row[EXTRA_TURN] = 1.0 if board.turn == chess.WHITE else 0.0
+        row[EXTRA_CASTLING] = board.has_kingside_castling_rights(chess.WHITE)
+        row[EXTRA_CASTLING + 1] = board.has_queenside_castling_rights(chess.WHITE)
+        row[EXTRA_CASTLING + 2] = board.has_kingside_castling_rights(chess.BLACK)
+        row[EXTRA_CASTLING + 3] = board.has_queenside_castling_rights(chess.BLACK)
+        row[EXTRA_EN_PASSANT] = board.ep_square is not None
+        row[EXTRA_IN_CHECK] = board.is_check()
+        row[EXTRA_HALFMOVE_CLOCK] = board.halfmove_clock / 100.0
+        row[EXTRA_FULLMOVE_NUMBER] = board.fullmove_number / 100.0
+        row[EXTRA_MOBILITY] = board.legal_moves.count() * (1 if board.turn == chess.WHITE else -1) / 100.0
+        row[EXTRA_BIAS] = 1.0
+
+    def _fill_material(self, masks, extras):
+        """Fill the material and positional extras from the planes in one vectorized pass"""
+        count = len(masks)
+        if count:
+            planes = self.unpack_planes(masks)
+            counts = planes.sum(axis=2)
+            extras[:, EXTRA_MATERIAL] = counts @ self.pawn_unit_weights
+            extras[:, EXTRA_POSITIONAL] = planes.reshape(count, -1) @ self.positional_weights.reshape(-1)
+            extras[:, EXTRA_WHITE_MATERIAL] = counts @ self.white_material_weights / 39.0
+            extras[:, EXTRA_BLACK_MATERIAL] = counts @ self.black_material_weights / 39.0
+            extras[:, EXTRA_PAWN_BALANCE] = (counts[:, 0] - counts[:, 6]) / 8.0
+
+    def unpack(self, masks, extras):
+        """Combine packed bitboards and extras into (N, 784) float32 feature rows"""
+        masks = np.atleast_2d(masks)
+        extras = np.atleast_2d(extras)
+        features = np.empty((masks.shape[0], FEATURE_SIZE), dtype=np.float32)
+        features[:, :EXTRAS_OFFSET] = self.unpack_planes(masks).reshape(masks.shape[0], -1)
+        features[:, EXTRAS_OFFSET:] = extras
+        return features
+
+    def encode(self, fen_or_board):
+        """Encode one position as a (784,) float32 feature vector"""
+        return self.encode_batch([fen_or_board])[0]
+
+    def encode_batch(self, fens_or_boards):
+        """Encode N positions (FEN strings or chess.Board objects) as one (N, 784) float32 array"""
+        masks, extras = self.pack_batch(fens_or_boards)
+        return self.unpack(masks, extras)
@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from snapshots import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore(SnapshotStore):
+    """Numbered agent checkpoints plus a pointer to the version serving processes should use
+
+    Checkpoints use the snapshot format and are never pruned. The active
+    version is recorded in active.json, so every worker process sharing the
+    directory can follow it (see AgentRegistry.sync).
+    """
+
+    PREFIX = "checkpoint-"
+    ACTIVE_FILE = "active.json"
+
+    def __init__(self, directory):
+        super().__init__(directory, keep=None, interval_seconds=None)
+
+    @classmethod
+    def name_for(cls, version):
+        """Directory name of a checkpoint version"""
+        return f"{cls.PREFIX}{version:06d}"
+
+    @classmethod
+    def version_of(cls, name):
+        """Version number of a checkpoint directory name"""
+        return int(name[len(cls.PREFIX):])
+
+    def _new_name(self):
+        """Reserve the next version number after every existing or reserved one
+
+        The version's directory is created here, which is atomic across
+        processes, so concurrent writers never pick the same version; save
+        renames the finished snapshot over the empty directory.
+        """
+        version = max(
+            (self.version_of(name) for name in os.listdir(self.directory) if name.startswith(self.PREFIX)),
+            default=0
+        ) + 1
+        while True:
+            name = self.name_for(version)
+            try:
+                os.mkdir(os.path.join(self.directory, name))
+                return name
+            except FileExistsError:
+                version += 1
+
+    def exists(self, version):
+        """Return True if a complete checkpoint of version is stored"""
+        return self.name_for(version) in self.list()
+
+    def versions(self):
+        """Return a summary of every checkpoint, newest first"""
+        summaries = []
+        for name in self.list():
+            meta = self.read_meta(name)
+            summaries.append({
+                "version": self.version_of(name),
+                "label": meta.get("label"),
+                "created_at": meta.get("created_at"),
+                "table_entries": meta.get("table_entries"),
+                "replay_size": meta.get("replay_size"),
+                "total_games": meta.get("total_games"),
+                "epsilon": meta.get("epsilon"),
+                "last_ingested_game_id": meta.get("last_ingested_game_id")
+            })
+        return summaries
+
+    def save_version(self, agent, label=None):
+        """Write a new checkpoint of agent and return its version number"""
+        return self.version_of(self.save(agent, {"label": label}))
+
+    def active_version(self):
+        """Return the version serving processes should use, or None for their own live agent"""
+        try:
+            with open(os.path.join(self.directory, self.ACTIVE_FILE)) as f:
+                return json.load(f).get("version")
+        except FileNotFoundError:
+            return None
+
+    def set_active(self, version):
+        """Point serving processes at version (None clears the pointer)"""
+        path = os.path.join(self.directory, self.ACTIVE_FILE)
+        if version is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"version": version}, f)
+        os.replace(temporary, path)
+
+
+class AgentRegistry:
+    """Holds the agent that serves requests and swaps it atomically between checkpoint versions
+
+    Request handlers read registry.current once and use that agent to the end,
+    so requests in flight during a swap finish on the old version. Replaced
+    agents are kept in memory for instant rollback. Long-running work that
+    updates the agent (training jobs) pins it, which refuses swaps meanwhile.
+
+    Args:
+        agent: Initial serving agent (version None: not loaded from a checkpoint)
+        factory: Callable returning a new, empty agent to load checkpoints into
+        history: Number of replaced agents kept for rollback
+    """
+
+    def __init__(self, agent, factory, history=2):
+        self.factory = factory
+        self._current = (agent, None)
+        self._previous = deque(maxlen=history)
+        self._swap_lock = threading.Lock()  # One activation or rollback at a time
+        self._pins = 0  # Holders of pinned(); swaps are refused while nonzero
+        self._sync_lock = threading.Lock()  # One sync at a time; others return immediately
+
+    @property
+    def current(self):
+        """The serving agent"""
+        return self._current[0]
+
+    @property
+    def version(self):
+        """Checkpoint version of the serving agent, or None"""
+        return self._current[1]
+
+    @property
+    def can_rollback(self):
+        """True if a replaced agent is available for rollback"""
+        return bool(self._previous)
+
+    @property
+    def previous_version(self):
+        """Version rollback would return to (None for the initial agent or when there is none)"""
+        return self._previous[-1][1] if self._previous else None
+
+    @property
+    def pinned_now(self):
+        """True while some caller holds the serving agent with pinned()"""
+        return self._pins > 0
+
+    @contextmanager
+    def pinned(self):
+        """Hold the serving agent in place and yield it; activate and rollback raise RuntimeError meanwhile
+
+        Without this a training job would keep updating an agent that was
+        swapped out, and its progress would be lost.
+        """
+        with self._swap_lock:
+            self._pins += 1
+            agent = self.current
+        try:
+            yield agent
+        finally:
+            with self._swap_lock:
+                self._pins -= 1
+
+    def _check_unpinned(self):
+        """Raise RuntimeError if the serving agent is pinned (call with _swap_lock held)"""
+        if self._pins:
+            raise RuntimeError("The serving agent is in use by a training job; try again when it finishes")
+
+    def activate(self, store, version):
+        """Load a checkpoint version into a new agent and make it the serving agent
+
+        The checkpoint is loaded before the swap, so serving continues on the
+        current agent meanwhile. Raises KeyError if the version doesn't exist
+        and RuntimeError while the agent is pinned.
+        """
+        if not store.exists(version):
+            raise KeyError(version)
+        with self._swap_lock:
+            self._check_unpinned()
+            agent = self.factory()
+            if store.load(agent, store.name_for(version)) is None:
+                raise ValueError(f"Checkpoint {version} could not be loaded")
+            self._previous.append(self._current)
+            self._current = (agent, version)
+        logger.info(f"Serving agent switched to checkpoint {version}")
+        return agent
+
+    def rollback(self):
+        """Switch back to the agent served before the last activation and return its version
+
+        Raises LookupError if there is nothing to roll back to and RuntimeError
+        while the agent is pinned.
+        """
+        with self._swap_lock:
+            self._check_unpinned()
+            if not self._previous:
+                raise LookupError("No previous agent to roll back to")
+            self._current = self._previous.pop()
+        logger.info(f"Serving agent rolled back to checkpoint {self.version}")
+        return self.version
+
+    def sync(self, store):
+        """Follow the store's active pointer set by another process
+
+        Rolls back when the pointer names the previous agent, otherwise loads
+        the pointed-to checkpoint. A cleared pointer is only followed by rollback.
+        While the agent is pinned nothing happens; a later sync catches up.
+        """
+        if self.pinned_now or not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            target = store.active_version()
+            if target == self.version:
+                return
+            if self._previous and target == self.previous_version:
+                self.rollback()
+            elif target is not None and store.exists(target):
+                self.activate(store, target)
+        except Exception as e:
+            logger.error(f"Error switching to checkpoint {target}: {e}")
+        finally:
+            self._sync_lock.release()
@@ -1,28 +1,82 @@
 import chess
 import logging
+import threading
+from collections import OrderedDict
+
+def encode_move(move):
+    """Pack a move (chess.Move or UCI string) into 16 bits: from | to << 6 | promotion << 12"""
+    if not isinstance(move, chess.Move):
+        move = chess.Move.from_uci(move)
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+def decode_move(code):
+    """Unpack a 16-bit move code produced by encode_move into a chess.Move"""
+    code = int(code)
+    promotion = code >> 12
+    return chess.Move(code & 0x3F, (code >> 6) & 0x3F, promotion=promotion or None)
 
 class ChessEngine:
     """Chess engine to handle game mechanics and rules"""
     
-    def __init__(self):
+    def __init__(self, position_cache_size=256):
         self.logger = logging.getLogger(__name__)
+        # FEN -> position summary, least recently used first
+        self.position_cache_size = position_cache_size
+        self.position_cache = OrderedDict()
+        self.position_cache_lock = threading.Lock()
+    
+    def get_position(self, fen):
+        """Legal move map and game state of a position, computed once per FEN
+        
+        Returns a dict with the side to move, "moves" mapping every from-square to
+        its legal moves (UCI), "check", and the board_state "state" and "message".
+        Results are kept in a small LRU cache so every click and state check on
+        the same ply is a lookup; treat them as read-only. Raises ValueError for an
+        invalid FEN.
+        """
+        with self.position_cache_lock:
+            position = self.position_cache.get(fen)
+            if position is not None:
+                self.position_cache.move_to_end(fen)
+                return position
+        
+        # Summaries are cached rather than boards: claim checks push and pop moves,
+        # so a parsed board can't be shared between request threads
+        position = self.position_summary(chess.Board(fen))
+        with self.position_cache_lock:
+            self.position_cache[fen] = position
+            while len(self.position_cache) > self.position_cache_size:
+                self.position_cache.popitem(last=False)
+        return position
+    
+    @classmethod
+    def position_summary(cls, board):
+        """Legal moves grouped by from-square plus the game state of a chess.Board, with one full move generation"""
+        moves = {}
+        for move in board.legal_moves:
+            moves.setdefault(chess.square_name(move.from_square), []).append(move.uci())
+        return {
+            "fen": board.fen(),
+            "turn": "white" if board.turn == chess.WHITE else "black",
+            "moves": moves,
+            "check": board.is_check(),
+            **cls.board_state(board)
+        }
     
     def get_legal_moves(self, fen, square):
         """Get all legal moves for a piece at a specific square"""
         try:
-            board = chess.Board(fen)
-            square_idx = chess.parse_square(square)
-            
-            legal_moves = []
-            for move in board.legal_moves:
-                if move.from_square == square_idx:
-                    legal_moves.append(move.uci())
-            
-            return legal_moves
+            return list(self.get_position(fen)["moves"].get(square, []))
         except Exception as e:
             self.logger.error(f"Error getting legal moves: {e}")
             return []
     
+    @staticmethod
+    def legal_moves_from(board, square):
+        """Get the legal moves (UCI) of the piece on square in a chess.Board"""
+        square_idx = chess.parse_square(square)
+        return [move.uci() for move in board.legal_moves if move.from_square == square_idx]
+    
     def make_move(self, fen, move_uci):
         """Make a move on the board and return the new position"""
         try:
@@ -42,48 +96,8 @@ class ChessEngine:
     def check_game_state(self, fen):
         """Check if the game is in a terminal state"""
         try:
-            board = chess.Board(fen)
-            
-            # Check for checkmate
-            if board.is_checkmate():
-                return {
-                    "state": "checkmate",
-                    "message": "Checkmate! " + ("Black" if board.turn == chess.WHITE else "White") + " wins."
-                }
-            
-            # Check for stalemate
-            if board.is_stalemate():
-                return {
-                    "state": "stalemate",
-                    "message": "Draw by stalemate."
-                }
-            
-            # Check for insufficient material
-            if board.is_insufficient_material():
-                return {
-                    "state": "draw",
-                    "message": "Draw by insufficient material."
-                }
-            
-            # Check for threefold repetition
-            if board.can_claim_threefold_repetition():
-                return {
-                    "state": "repetition",
-                    "message": "Draw by threefold repetition can be claimed."
-                }
-            
-            # Check for fifty-move rule
-            if board.can_claim_fifty_moves():
-                return {
-                    "state": "fifty_moves",
-                    "message": "Draw by fifty-move rule can be claimed."
-                }
-            
-            # Game is ongoing
-            return {
-                "state": "ongoing",
-                "message": "Game in progress."
-            }
+            position = self.get_position(fen)
+            return {"state": position["state"], "message": position["message"]}
         except Exception as e:
             self.logger.error(f"Error checking game state: {e}")
             return {
@@ -91,6 +105,55 @@ class ChessEngine:
                 "message": "Error checking game state."
             }
     
+    @staticmethod
+    def board_state(board):
+        """Check if the game on a chess.Board is in a terminal state
+        
+        Repetition claims need the board's move stack: a board built from a FEN
+        alone has no history, so only a board that played the game (e.g. a
+        game_sessions.GameSession) detects threefold repetition.
+        """
+        # Check for checkmate
+        if board.is_checkmate():
+            return {
+                "state": "checkmate",
+                "message": "Checkmate! " + ("Black" if board.turn == chess.WHITE else "White") + " wins."
+            }
+        
+        # Check for stalemate
+        if board.is_stalemate():
+            return {
+                "state": "stalemate",
+                "message": "Draw by stalemate."
+            }
+        
+        # Check for insufficient material
+        if board.is_insufficient_material():
+            return {
+                "state": "draw",
+                "message": "Draw by insufficient material."
+            }
+        
+        # Check for threefold repetition
+        if board.can_claim_threefold_repetition():
+            return {
+                "state": "repetition",
+                "message": "Draw by threefold repetition can be claimed."
+            }
+        
+        # Check for fifty-move rule
+        if board.can_claim_fifty_moves():
+            return {
+                "state": "fifty_moves",
+                "message": "Draw by fifty-move rule can be claimed."
+            }
+        
+        # Game is ongoing
+        return {
+            "state": "ongoing",
+            "message": "Game in progress."
+        }
+    
     def get_piece_at(self, fen, square):
         """Get the piece at a specific square"""
         try:
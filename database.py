@@ -1,5 +1,21 @@
 import os
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 # Create a shared database instance to be used throughout the application
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection for concurrent readers and fast batched writes"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")     # Readers don't block the writer (and vice versa)
+    cursor.execute("PRAGMA synchronous=NORMAL")   # Safe with WAL; fsync at checkpoints instead of every commit
+    cursor.execute("PRAGMA busy_timeout=5000")    # Wait for another worker's write lock instead of failing
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-16000")    # 16 MB page cache
+    cursor.close()
@@ -1,19 +1,40 @@
 import logging
 import chess
+import chess.polyglot
 import numpy as np
 import random
-import json
 import math
-import time
-import uuid
-from datetime import datetime
-from collections import deque
+import threading
+from collections import OrderedDict
+from board_encoder import BoardEncoder, FEATURE_SIZE, EXTRA_MATERIAL, EXTRA_POSITIONAL
+from value_table import ValueTable
+from replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+from chess_engine import encode_move
+from search import AlphaBetaSearch, TranspositionTable
+from evaluation import IncrementalEvaluator
+from value_network import ValueNetwork
 
 class DQNAgent:
     """Deep Q-Learning Neural Network agent for chess"""
     
-    def __init__(self):
+    def __init__(self, max_table_entries=1000000, max_table_bytes=None, eviction_policy="lfu",
+                 replay_capacity=5000, replay_mode="uniform"):
+        """Create the agent
+        
+        Args:
+            max_table_entries: Cap on the number of positions kept in board_values (None for no cap)
+            max_table_bytes: Cap on the memory used by board_values in bytes (None for no cap)
+            eviction_policy: "lfu" to evict least-visited positions first, "lru" for least-recently-used
+            replay_capacity: Number of transitions kept in the replay buffer
+            replay_mode: "uniform" for recency-split sampling, "prioritized" for TD-error prioritized replay
+        """
         self.logger = logging.getLogger(__name__)
+        # Serializes access from request threads and the background training worker
+        self.lock = threading.RLock()
+        # Guards the value network's weights and activations, held only for forward and backward
+        # passes so batched inference can run while another thread holds self.lock
+        self.network_lock = threading.RLock()
+        
         # Hyperparameters
         self.epsilon = 0.1           # Exploration rate
         self.epsilon_decay = 0.999   # Epsilon decay rate for reducing exploration over time
@@ -22,11 +43,18 @@ class DQNAgent:
         self.alpha = 0.01            # Learning rate
         
         # Enhanced network with experience replay
-        self.board_values = {}       # State-value mapping
-        self.memory = deque(maxlen=5000)  # Experience replay buffer - increased for larger training sets
+        self.board_values = ValueTable(  # State-value mapping keyed by Zobrist hash, bounded in size
+            max_entries=max_table_entries,
+            max_bytes=max_table_bytes,
+            eviction_policy=eviction_policy
+        )
+        self.replay_mode = "uniform"
+        self.memory = ReplayBuffer(maxlen=replay_capacity, store_features=True)  # Experience replay ring buffer
+        self.set_replay_mode(replay_mode)
         self.batch_size = 64         # Batch size for experience replay - increased for better learning
         self.min_replay_size = 100   # Minimum experiences before learning
         self.train_count = 0         # Counter for training iterations
+        self.network_train_interval = 8  # Replay steps between value network gradient steps
         
         # Game history for learning from past games
         self.game_history = []
@@ -39,7 +67,7 @@ class DQNAgent:
         
         # Network visualization data (enhanced for demonstration)
         self.network_layers = [
-            {"name": "input", "neurons": 64 * 12 + 16},  # 8x8 board x 12 piece types + additional features
+            {"name": "input", "neurons": FEATURE_SIZE},  # 8x8 board x 12 piece types + additional features
             {"name": "hidden1", "neurons": 512},         # Increased capacity
             {"name": "hidden2", "neurons": 256},         # Increased capacity
             {"name": "hidden3", "neurons": 128},         # Added another layer
@@ -49,20 +77,71 @@ class DQNAgent:
         # Initialize piece-square tables
         self.piece_square_tables = self.init_piece_square_tables()
         
-        # Weights and biases for the neural network layers (simplified)
+        # Bitboard feature encoder shared by every evaluation and training path
+        self.encoder = BoardEncoder(self.piece_square_tables)
+        
+        # One transposition table per request thread, so concurrent searches don't share state
+        self._search_tables = threading.local()
+        
+        # Value network weight matrices (the network itself is self.network)
         self.weights = self.initialize_weights()
+        self.model_version = 0       # Bumped on every network training step
+        self.network_state_cache = OrderedDict()  # (model version, position key) -> visualization
         self.position_count = 0
+        
+        # Database ingestion high-water mark: games with ids up to this one have been learned from
+        self.last_ingested_game_id = 0
+        self.ingested_game_ids = set()  # Learned-from games above the mark (saved games, own self-play)
+    
+    REPLAY_MODES = ("uniform", "prioritized")
+    
+    # Rows read per database query when streaming stored games
+    GAME_LOAD_CHUNK_SIZE = 500
+    
+    def set_replay_mode(self, mode, per_alpha=None, per_beta=None):
+        """Switch between uniform and prioritized replay, keeping the stored transitions
+        
+        Args:
+            mode: "uniform" or "prioritized"
+            per_alpha: Priority exponent for prioritized replay (0 = uniform)
+            per_beta: Initial importance-sampling exponent for prioritized replay, in [0, 1]
+        
+        Raises ValueError for an unknown mode or an out-of-range exponent.
+        """
+        if mode not in self.REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        if per_alpha is not None and not float(per_alpha) >= 0:
+            raise ValueError("per_alpha must be non-negative")
+        if per_beta is not None and not 0 <= float(per_beta) <= 1:
+            raise ValueError("per_beta must be between 0 and 1")
+        
+        if mode == "prioritized":
+            if isinstance(self.memory, PrioritizedReplayBuffer):
+                buffer = self.memory
+            else:
+                buffer = PrioritizedReplayBuffer(maxlen=self.memory.maxlen, store_features=True)
+                buffer.extend(*self.memory.transitions(), features=self.memory.transition_features())
+            if per_alpha is not None:
+                buffer.alpha = float(per_alpha)
+            if per_beta is not None:
+                buffer.beta = float(per_beta)
+        elif isinstance(self.memory, PrioritizedReplayBuffer):
+            buffer = ReplayBuffer(maxlen=self.memory.maxlen, store_features=True)
+            buffer.extend(*self.memory.transitions(), features=self.memory.transition_features())
+        else:
+            buffer = self.memory
+        
+        self.memory = buffer
+        self.replay_mode = mode
     
     def initialize_weights(self):
-        """Initialize random weights for the neural network (simplified)"""
-        weights = []
-        for i in range(len(self.network_layers) - 1):
-            layer_weights = np.random.randn(
-                min(10, self.network_layers[i]["neurons"]),  # Input size (limited for demo)
-                min(10, self.network_layers[i+1]["neurons"])  # Output size (limited for demo)
-            ) * 0.1  # Scale weights to be small initially
-            weights.append(layer_weights)
-        return weights
+        """Build the value network described by network_layers and return its weight matrices
+        
+        The network predicts a correction on top of the material and piece-square
+        prior, so an untrained network leaves evaluations at the prior.
+        """
+        self.network = ValueNetwork([layer["neurons"] for layer in self.network_layers])
+        return self.network.weights
     
     def init_piece_square_tables(self):
         """Initialize piece-square tables for positional evaluation"""
@@ -147,112 +226,230 @@ class DQNAgent:
         return tables
     
     def board_to_features(self, fen):
-        """Convert board FEN to input features for neural network"""
-        board = chess.Board(fen)
+        """Convert board FEN (or a chess.Board) to input features for neural network"""
+        board = fen if isinstance(fen, chess.Board) else chess.Board(fen)
+        return self.encoder.encode(board)
+    
+    def position_key(self, fen):
+        """Return the 64-bit Zobrist hash used to key board_values for a FEN or chess.Board"""
+        board = fen if isinstance(fen, chess.Board) else chess.Board(fen)
         self.position_count += 1
+        return chess.polyglot.zobrist_hash(board)
+    
+    # Small bonus for white to counter the observed black advantage
+    WHITE_ADVANTAGE_BONUS = 0.25
+    
+    def new_evaluator(self, board):
+        """Create an IncrementalEvaluator tracking material, piece-square score and Zobrist key of board"""
+        return IncrementalEvaluator(board, self.encoder)
+    
+    def _prior_value(self, evaluator):
+        """Deterministic value of an unseen position: material plus piece-square score"""
+        return evaluator.score + self.WHITE_ADVANTAGE_BONUS
+    
+    def _prior_from_extras(self, extras):
+        """Vectorized _prior_value for packed positions"""
+        return extras[:, EXTRA_MATERIAL] + extras[:, EXTRA_POSITIONAL] + self.WHITE_ADVANTAGE_BONUS
+    
+    def network_values(self, masks, extras):
+        """Value of packed positions: the prior plus the network's correction, in one batched forward pass"""
+        features = self.encoder.unpack(masks, extras)
+        with self.network_lock:
+            corrections = self.network.predict(features)
+        return self._prior_from_extras(extras) + corrections
+    
+    def evaluate_batch(self, fens_or_boards):
+        """Evaluate many positions at once and return their values from white's perspective
         
-        # Material balance with enhanced values
-        piece_values = {
-            'P': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 900, 'K': 20000,
-            'p': -100, 'n': -320, 'b': -330, 'r': -500, 'q': -900, 'k': -20000
-        }
+        Terminal positions get their fixed scores, positions in board_values their
+        learned value, and every other position is scored by one batched network call.
+        """
+        boards = [item if isinstance(item, chess.Board) else chess.Board(item) for item in fens_or_boards]
+        values = np.zeros(len(boards), dtype=np.float32)
+        open_positions = []
+        for i, board in enumerate(boards):
+            if board.is_checkmate():
+                values[i] = -100 if board.turn == chess.WHITE else 100
+            elif not (board.is_stalemate() or board.is_insufficient_material()):
+                open_positions.append(i)
+        if not open_positions:
+            return values
         
-        # Calculate material balance and positional score
-        material_balance = 0
-        positional_score = 0
+        # One vectorized table lookup, then one network pass over the positions it misses
+        self.position_count += len(open_positions)
+        open_positions = np.array(open_positions)
+        keys = np.array([chess.polyglot.zobrist_hash(boards[i]) for i in open_positions], dtype=np.uint64)
+        known = self.board_values.get_many(keys)
+        missing = np.isnan(known)
+        values[open_positions[~missing]] = known[~missing]
+        if missing.any():
+            unseen = open_positions[missing]
+            masks, extras = self.encoder.pack_batch([boards[i] for i in unseen])
+            values[unseen] = self.network_values(masks, extras)
+        return values
+    
+    @staticmethod
+    def game_positions(moves, start_fen=chess.STARTING_FEN):
+        """Return the boards of a game: the start position and the position after every move
         
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                material_balance += piece_values[piece.symbol()]
-                
-                # Add positional value based on piece-square tables
-                piece_symbol = piece.symbol()
-                rank = chess.square_rank(square)
-                file = chess.square_file(square)
-                positional_score += self.piece_square_tables[piece_symbol][rank][file] * 0.01
-        
-        # Additional features
-        mobility = len(list(board.legal_moves)) * (1 if board.turn == chess.WHITE else -1)
-        in_check = 10 if board.is_check() else 0
-        castling_rights = sum([board.has_queenside_castling_rights(chess.WHITE),
-                              board.has_kingside_castling_rights(chess.WHITE),
-                              -board.has_queenside_castling_rights(chess.BLACK),
-                              -board.has_kingside_castling_rights(chess.BLACK)])
-        
-        # Combine features
-        combined_score = material_balance + positional_score + mobility * 0.1 + in_check + castling_rights * 5
-        
-        # Create a more sophisticated feature fingerprint
-        feature_key = f"{fen}:{combined_score:.2f}"
-        return feature_key
-    
-    def evaluate_position(self, fen):
-        """Evaluate a position using the DQN"""
+        Args:
+            moves: UCI move strings, applied in order
+            start_fen: Position the moves are played from
+        
+        Raises ValueError for an invalid FEN or an illegal move.
+        """
+        board = chess.Board(start_fen)
+        boards = [board.copy(stack=False)]
+        for move_uci in moves:
+            move = chess.Move.from_uci(move_uci)
+            if not board.is_legal(move):
+                raise ValueError(f"Illegal move {move_uci} in {board.fen()}")
+            board.push(move)
+            boards.append(board.copy(stack=False))
+        return boards
+    
+    def _initial_value(self, board):
+        """Value assigned to a position the agent has not seen before
+        
+        The deterministic prior until the network has been trained, then the
+        network's value, matching what evaluate_position and evaluate_batch return.
+        """
+        if self.model_version == 0:
+            return self._prior_value(self.new_evaluator(board))
+        masks, extras = self.encoder.pack(board)
+        return float(self.network_values(masks[None], extras[None])[0])
+    
+    def _score_moves(self, evaluator, moves, batcher=None):
+        """Values of the positions reached by moves, with unseen children scored in one network batch
+        
+        Only the value table lookup runs under self.lock. Unseen children are
+        scored directly, or through batcher (an InferenceBatcher) so that
+        concurrent requests share one forward pass.
+        """
+        values = [None] * len(moves)
+        keys = []
+        key_moves = []
+        for i, move in enumerate(moves):
+            evaluator.push(move)
+            board = evaluator.board
+            if board.is_checkmate():
+                values[i] = -100 if board.turn == chess.WHITE else 100
+            elif board.is_stalemate() or board.is_insufficient_material():
+                values[i] = 0
+            else:
+                keys.append(evaluator.zobrist_key)
+                key_moves.append(i)
+            evaluator.pop()
+        if not keys:
+            return values
+        
+        with self.lock:
+            self.position_count += len(keys)
+            known = self.board_values.get_many(np.array(keys, dtype=np.uint64)).tolist()
+        unseen = []
+        for i, value in zip(key_moves, known):
+            if math.isnan(value):
+                unseen.append(i)
+            else:
+                values[i] = value
+        if unseen:
+            masks, extras = self.encoder.pack_children(evaluator.board, [moves[i] for i in unseen])
+            if batcher is not None:
+                scores = batcher.evaluate(self.network_values, masks, extras)
+            else:
+                scores = self.network_values(masks, extras)
+            for i, value in zip(unseen, scores.tolist()):
+                values[i] = value
+        return values
+    
+    def evaluate_position(self, fen, include_network_states=False):
+        """Evaluate a position using the DQN
+        
+        Returns (evaluation, network_states); network_states is None unless
+        include_network_states is set.
+        """
+        network_states = self.network_snapshot(fen) if include_network_states else None
         try:
             board = chess.Board(fen)
-            features = self.board_to_features(fen)
+            features = self.position_key(board)
             
             # Check if terminal state
             if board.is_checkmate():
-                return -100 if board.turn == chess.WHITE else 100, self.generate_network_visual()
+                return -100 if board.turn == chess.WHITE else 100, network_states
             if board.is_stalemate() or board.is_insufficient_material():
-                return 0, self.generate_network_visual()
+                return 0, network_states
             
-            # Simplified: Use material balance as evaluation if we haven't seen this position
+            # Unseen positions start from the network's value (prior plus learned correction)
             if features not in self.board_values:
-                material_balance = 0
-                piece_values = {
-                    'P': 1, 'N': 3, 'B': 3, 'R': 5, 'Q': 9, 'K': 0,
-                    'p': -1, 'n': -3, 'b': -3, 'r': -5, 'q': -9, 'k': 0
-                }
-                
-                # Add a small bonus for white to counter the observed black advantage
-                white_advantage_bonus = 0.25
-                
-                for square in chess.SQUARES:
-                    piece = board.piece_at(square)
-                    if piece:
-                        material_balance += piece_values[piece.symbol()]
-                
-                # Give white a small advantage to balance performance
-                material_balance += white_advantage_bonus
-                
-                # Add some randomness to evaluation for demonstration
-                evaluation = material_balance + (random.random() - 0.5) * 0.3
-                self.board_values[features] = evaluation
+                masks, extras = self.encoder.pack(board)
+                self.board_values[features] = float(self.network_values(masks[None], extras[None])[0])
             
-            return self.board_values[features], self.generate_network_visual()
+            return self.board_values[features], network_states
         except Exception as e:
             self.logger.error(f"Error evaluating position: {e}")
-            return 0, self.generate_network_visual()
+            return 0, network_states
     
-    def get_move(self, fen):
-        """Get the best move according to the DQN agent with epsilon-greedy exploration"""
+    # Upper bounds for per-request search limits
+    MAX_SEARCH_DEPTH = 5
+    MAX_SEARCH_MOVETIME_MS = 1000
+    SEARCH_TABLE_SIZE = 1 << 16
+    
+    def get_move(self, fen, depth=None, movetime_ms=None, include_network_states=False, batcher=None):
+        """Get the best move according to the DQN agent with epsilon-greedy exploration
+        
+        Takes self.lock only around shared state, so callers need not hold it,
+        in one-ply and search mode alike. With a batcher, concurrent one-ply calls
+        share network forward passes; search mode scores leaves from the value
+        table and material prior only, so it never uses the batcher.
+        
+        Args:
+            fen: Position to move from (FEN or chess.Board, which is left unchanged)
+            depth: If set, run an alpha-beta search to this depth instead of one-ply lookahead
+            movetime_ms: If set, run an alpha-beta search for at most this many milliseconds
+            include_network_states: If set, also return the network visualization for fen
+            batcher: Optional InferenceBatcher for scoring unseen children
+        
+        Returns:
+            (move in UCI or None, confidence, network_states or None)
+        """
+        move, confidence = self._choose_move(fen, depth, movetime_ms, batcher)
+        network_states = None
+        if include_network_states:
+            with self.lock:
+                network_states = self.network_snapshot(fen)
+        return move, confidence, network_states
+    
+    def _choose_move(self, fen, depth, movetime_ms, batcher=None):
+        """Return (move in UCI or None, confidence) for get_move"""
+        legal_moves = []
         try:
-            board = chess.Board(fen)
+            # Scoring pushes and pops moves, so a caller's board is copied (without its move stack)
+            board = fen.copy(stack=False) if isinstance(fen, chess.Board) else chess.Board(fen)
             legal_moves = list(board.legal_moves)
             
             if not legal_moves:
-                return None, 0, self.generate_network_visual()
+                return None, 0
+            
+            if depth or movetime_ms:
+                # The search locks only around its value table reads (see _static_eval)
+                return self.search_move(board, depth, movetime_ms)
+            
+            # Children are scored by make/unmake on one board with incremental totals
+            evaluator = self.new_evaluator(board)
             
             # Epsilon-greedy exploration
             if random.random() < self.epsilon:
                 # Exploration: choose a random move
                 chosen_move = random.choice(legal_moves)
-                next_fen = self.make_move_and_get_fen(board, chosen_move)
-                evaluation, _ = self.evaluate_position(next_fen)
-                return chosen_move.uci(), evaluation, self.generate_network_visual()
+                evaluation = self._score_moves(evaluator, [chosen_move], batcher)[0]
+                return chosen_move.uci(), evaluation
             
             # Exploitation: choose the best move according to the value function
             best_move = None
             best_value = float('-inf') if board.turn == chess.WHITE else float('inf')
             move_values = []
             
-            for move in legal_moves:
-                next_fen = self.make_move_and_get_fen(board, move)
-                value, _ = self.evaluate_position(next_fen)
-                
+            for move, value in zip(legal_moves, self._score_moves(evaluator, legal_moves, batcher)):
                 move_values.append({
                     "move": move.uci(),
                     "value": value
@@ -277,19 +474,53 @@ class DQNAgent:
             else:
                 confidence = 1.0
             
-            return best_move.uci(), confidence, self.generate_network_visual()
+            return best_move.uci(), confidence
         except Exception as e:
             self.logger.error(f"Error getting move: {e}")
             # Return a random move if there's an error
             if legal_moves:
-                return random.choice(legal_moves).uci(), 0, self.generate_network_visual()
-            return None, 0, self.generate_network_visual()
+                return random.choice(legal_moves).uci(), 0
+            return None, 0
     
-    def make_move_and_get_fen(self, board, move):
-        """Make a move on a copy of the board and return the new FEN"""
-        board_copy = board.copy()
-        board_copy.push(move)
-        return board_copy.fen()
+    def search_move(self, board, depth=None, movetime_ms=None):
+        """Pick a move with iterative-deepening alpha-beta search (no exploration) and return (move, confidence)
+        
+        The depth is capped at MAX_SEARCH_DEPTH and the search never runs longer
+        than MAX_SEARCH_MOVETIME_MS, so latency stays bounded whatever the limits.
+        Callers need not hold self.lock: the search uses the calling thread's own
+        transposition table and takes the lock only for each value table read.
+        The table is cleared first, so scores from before the agent last learned
+        are never reused.
+        """
+        depth = min(int(depth), self.MAX_SEARCH_DEPTH) if depth else self.MAX_SEARCH_DEPTH
+        movetime_ms = min(int(movetime_ms or self.MAX_SEARCH_MOVETIME_MS), self.MAX_SEARCH_MOVETIME_MS)
+        
+        table = self._search_table()
+        table.clear()
+        search = AlphaBetaSearch(self._static_eval, table)
+        result = search.search(self.new_evaluator(board), depth=depth, movetime_ms=movetime_ms)
+        self.logger.debug(
+            f"Search depth {result['depth']}, {result['nodes']} nodes in {result['time_ms']:.0f} ms, "
+            f"score {result['score']:.2f}"
+        )
+        
+        # Map the side-to-move score onto a 0-1 confidence
+        confidence = (math.tanh(result["score"] / 10) + 1) / 2
+        return result["move"].uci(), confidence
+    
+    def _search_table(self):
+        """The calling thread's transposition table, reused (after clearing) by each of its searches"""
+        table = getattr(self._search_tables, "table", None)
+        if table is None:
+            table = self._search_tables.table = TranspositionTable(self.SEARCH_TABLE_SIZE)
+        return table
+    
+    def _static_eval(self, evaluator):
+        """Search leaf evaluation from white's perspective: learned value if known, else the prior"""
+        # peek leaves counters untouched; the lock keeps a concurrent insert from resizing the table mid-read
+        with self.lock:
+            value = self.board_values.peek(evaluator.zobrist_key)
+        return value if value is not None else self._prior_value(evaluator)
     
     def generate_network_visual(self, skip_for_training=False):
         """Generate a visualization of the neural network state"""
@@ -297,435 +528,502 @@ class DQNAgent:
         if skip_for_training:
             return []
             
-        # In a real implementation, this would extract actual weights and activations
-        # For this demo, we'll generate random activations
-        visual_data = []
-        
-        # Generate random activations for visualization
-        for layer in self.network_layers:
-            neurons = []
-            for i in range(min(10, layer["neurons"])):  # Limit to first 10 neurons for visualization
-                activation = random.random()
-                neurons.append({
-                    "id": i,
-                    "activation": activation,
-                    "weight": random.random() * 2 - 1  # Random weight between -1 and 1
-                })
+        # Activations come from the network's last forward pass; run one on the
+        # starting position if nothing has been evaluated yet
+        with self.network_lock:
+            if self.network.last_activations is None:
+                self.network.predict(self.encoder.encode(chess.Board())[None])
             
-            visual_data.append({
-                "layer": layer["name"],
-                "neurons": neurons
-            })
+            # Limit to first 10 neurons per layer for visualization
+            return self.network.visualize([layer["name"] for layer in self.network_layers], max_neurons=10)
+    
+    NETWORK_STATE_CACHE_SIZE = 256
+    
+    def network_snapshot(self, fen):
+        """Network visualization for one position, cached per model version
         
-        return visual_data
+        The snapshot is built from a forward pass on the position itself, so it
+        is the same for every request until the network is trained again.
+        """
+        try:
+            board = fen if isinstance(fen, chess.Board) else chess.Board(fen)
+            cache_key = (self.model_version, chess.polyglot.zobrist_hash(board))
+            snapshot = self.network_state_cache.get(cache_key)
+            if snapshot is not None:
+                self.network_state_cache.move_to_end(cache_key)
+                return snapshot
+            
+            with self.network_lock:
+                self.network.predict(self.encoder.encode(board)[None])
+                snapshot = self.generate_network_visual()
+            self.network_state_cache[cache_key] = snapshot
+            if len(self.network_state_cache) > self.NETWORK_STATE_CACHE_SIZE:
+                self.network_state_cache.popitem(last=False)
+            return snapshot
+        except Exception as e:
+            self.logger.error(f"Error building network snapshot: {e}")
+            return []
     
-    def update_network(self, fen, move, reward, next_fen):
-        """Update the DQN based on the observed transition"""
+    def update_network(self, fen, move, reward, next_fen, include_network_states=False):
+        """Update the DQN based on the observed transition
+        
+        Returns the network visualization for next_fen if include_network_states
+        is set, otherwise None.
+        """
         # In a real implementation, this would update the neural network weights
         # For this demo, we'll do a simple value function update
-        features = self.board_to_features(fen)
-        next_features = self.board_to_features(next_fen)
-        
-        if features not in self.board_values:
-            self.board_values[features] = 0
+        board = chess.Board(fen)
+        features = self.position_key(board)
+        next_board = chess.Board(next_fen)
+        next_features = self.position_key(next_board)
         
-        if next_features not in self.board_values:
-            next_value, _ = self.evaluate_position(next_fen)
-            self.board_values[next_features] = next_value
+        # Unseen next positions start from their evaluation (terminal score, or the network's value)
+        slots = self._transition_slots(features, next_features, lambda: float(self.evaluate_batch([next_board])[0]))
         
         # Q-learning update
-        self.board_values[features] += self.alpha * (
-            reward + self.gamma * self.board_values[next_features] - self.board_values[features]
-        )
+        if slots is not None:
+            self._q_update(slots, reward)
         
         # Decay epsilon (reduce exploration over time as the agent learns)
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
             
         # Store experience in replay memory
-        self.memory.append((features, move, reward, next_features))
+        self.memory.append(features, encode_move(move), reward, next_features, next_board.is_game_over(),
+                           self.encoder.pack(board))
         
         # Update network with mini-batch of experiences if we have enough samples
         if len(self.memory) >= self.min_replay_size:
             self.train_with_replay()
             
-        return self.generate_network_visual()
+        return self.network_snapshot(next_fen) if include_network_states else None
+        
+    def _transition_slots(self, state_key, next_key, next_default):
+        """Slots of a transition's state and next state in board_values, inserting missing ones together
+        
+        A missing state starts at 0 and a missing next state at next_default().
+        Resolving both in one lookup_slots call keeps either from being evicted
+        to make room for the other. Returns None if the entry cap can't hold them.
+        """
+        defaults = np.zeros(2, dtype=np.float32)
+        if self.board_values.peek(next_key) is None:
+            defaults[1] = next_default()
+        slots = self.board_values.lookup_slots(np.array([state_key, next_key], dtype=np.uint64), default=defaults)
+        return None if (slots < 0).any() else slots
+    
+    def _q_update(self, slots, reward):
+        """One-step Q-learning update of the state at slots[0] towards the next state at slots[1]"""
+        values = self.board_values.values
+        state_slot, next_slot = slots
+        values[state_slot] += self.alpha * (reward + self.gamma * values[next_slot] - values[state_slot])
+    
+    def train_with_replay(self, recent_ratio=0.7, batch_size=None):
+        """Train the DQN using experience replay with optimized batch processing
         
-    def train_with_replay(self):
-        """Train the DQN using experience replay with optimized batch processing"""
+        Args:
+            recent_ratio: Share of the batch drawn from the newest 30% of transitions
+                          in uniform mode (None samples uniformly, ignored when prioritized)
+            batch_size: Transitions per update (defaults to self.batch_size)
+        """
         self.train_count += 1
         
         # Sample a mini-batch from the replay memory with progressive batch sizing
         memory_size = len(self.memory)
         # Adaptive batch size based on memory size for more efficient training
-        batch_size = min(self.batch_size, memory_size)
+        batch_size = min(batch_size or self.batch_size, memory_size)
         
         # Skip if not enough samples
         if memory_size < self.min_replay_size:
             return
             
-        # Sample mini-batch with priority for newer experiences (70% new, 30% old)
-        if memory_size > batch_size * 2:
-            # Split between recent and older experiences
-            recent_idx = int(memory_size * 0.3)  # Get 30% most recent
-            recent_batch_size = int(batch_size * 0.7)  # 70% of batch from recent
-            old_batch_size = batch_size - recent_batch_size
-            
-            recent_samples = random.sample(list(self.memory)[-recent_idx:], recent_batch_size)
-            old_samples = random.sample(list(self.memory)[:-recent_idx], old_batch_size)
-            mini_batch = recent_samples + old_samples
-        else:
-            mini_batch = random.sample(self.memory, batch_size)
+        # Sample mini-batch with priority for newer experiences (70% new, 30% old),
+        # or proportionally to TD error with importance-sampling weights in prioritized mode
+        indices, weights = self.memory.sample_with_weights(batch_size, recent_fraction=0.3, recent_ratio=recent_ratio)
+        self.replay_update(indices, weights, train_network=self.train_count % self.network_train_interval == 0)
+    
+    def learn_from_transitions(self, transitions, features=None):
+        """Store externally generated transitions and replay TD updates over them in order
         
-        # Update network based on batch of experiences
-        for state, action, reward, next_state in mini_batch:
-            if state not in self.board_values:
-                self.board_values[state] = 0
-                
-            if next_state not in self.board_values:
-                try:
-                    # Handle the case where next_state might be a string or a board object
-                    if isinstance(next_state, str) and ":" in next_state:
-                        fen_str = next_state.split(":")[0]
-                        next_value, _ = self.evaluate_position(fen_str)
-                    else:
-                        next_value, _ = self.evaluate_position(next_state)
-                    self.board_values[next_state] = next_value
-                except Exception as e:
-                    self.logger.error(f"Error in replay training: {e}")
-                    self.board_values[next_state] = 0  # Use default value on error
-            
-            # Update with higher learning rate for replay experiences to prioritize them
-            self.board_values[state] += self.alpha * 0.5 * (
-                reward + self.gamma * self.board_values[next_state] - self.board_values[state]
-            )
-    
-    def load_games_from_database(self, aggressive_training=True):
+        Args:
+            transitions: (states, moves, rewards, next_states, dones) arrays
+            features: Optional (masks, extras) packed states of the transitions
+        """
+        slots = self.memory.extend(*transitions, features=features)
+        for start in range(0, len(slots), self.batch_size):
+            chunk = slots[start:start + self.batch_size]
+            self.train_count += 1
+            self.replay_update(chunk, np.ones(len(chunk), dtype=np.float32),
+                               train_network=self.train_count % self.network_train_interval == 0)
+    
+    def replay_update(self, indices, weights, train_network=False):
+        """Apply one batched TD update to the replay transitions stored at ring slots indices
+        
+        Args:
+            indices: Ring slots of the transitions in self.memory
+            weights: Per-transition importance-sampling weights
+            train_network: Also take a value network gradient step on the batch
+        """
+        states, actions, rewards, next_states, dones = self.memory.batch(indices)
+        
+        # Next states are only read: one that is no longer in the table (evicted)
+        # has no learned value to bootstrap from, so its transition is skipped
+        # rather than bootstrapping from (and storing) a made-up value
+        next_values = self.board_values.get_many(next_states)
+        usable = dones | ~np.isnan(next_values)
+        if not usable.all():
+            indices, weights = indices[usable], weights[usable]
+            states, rewards, next_values, dones = states[usable], rewards[usable], next_values[usable], dones[usable]
+            if not len(indices):
+                return
+        
+        # Missing states are inserted at their material prior, like evaluate_position does
+        # (transitions stored without features have all-zero masks and start at 0)
+        defaults = 0.0
+        features = self.memory.features(indices)
+        if features is not None:
+            masks, extras = features
+            defaults = np.where(masks.any(axis=1), self._prior_from_extras(extras), 0.0)
+        state_slots = self.board_values.lookup_slots(states, default=defaults)
+        stored = state_slots >= 0  # States that didn't fit under the table's entry cap are skipped
+        if not stored.all():
+            indices, weights, state_slots = indices[stored], weights[stored], state_slots[stored]
+            rewards, next_values, dones = rewards[stored], next_values[stored], dones[stored]
+            if features is not None:
+                masks, extras = masks[stored], extras[stored]
+            if not len(indices):
+                return
+        values = self.board_values.values
+        
+        # Gather, compute the TD errors for the whole batch, and scatter the updates.
+        # Terminal transitions don't bootstrap from the next state, and np.add.at
+        # accumulates updates for states that appear more than once in the batch.
+        next_values = np.where(dones, 0.0, next_values)
+        td_errors = rewards + self.gamma * next_values - values[state_slots]
+        
+        # Update with higher learning rate for replay experiences to prioritize them
+        np.add.at(values, state_slots, self.alpha * 0.5 * weights * td_errors)
+        
+        self.memory.update_priorities(indices, td_errors)
+        
+        # Periodically fit the value network to the updated values of the sampled states,
+        # as a correction on top of the prior
+        if train_network:
+            if features is not None:
+                targets = values[state_slots] - self._prior_from_extras(extras)
+                features = self.encoder.unpack(masks, extras)
+                with self.network_lock:
+                    self.network.train_step(features, targets, weights)
+                self.model_version += 1
+    
+    def load_games_from_database(self, aggressive_training=True, full_rebuild=False):
         """Load past games from the database for learning
         
+        Only games with an id above the highest one already ingested are read,
+        so repeated calls cost time proportional to the new games.
+        
         Args:
             aggressive_training: If True, trains on each game after loading to 
                                 immediately incorporate knowledge
+            full_rebuild: If True, forget the learned values and replay memory and
+                          re-ingest every stored game
         """
         try:
             # Import here to avoid circular imports
             import models
-            from app import db
             
-            # Count available games
-            game_count = models.GameHistory.query.count()
+            if full_rebuild:
+                self.logger.info("Full rebuild: clearing learned values and replay memory")
+                self.board_values.clear()
+                self.memory.clear()
+                self.last_ingested_game_id = 0
+                self.ingested_game_ids.clear()
+            
+            # Count available games newer than the high-water mark
+            new_games = models.GameHistory.query.filter(models.GameHistory.id > self.last_ingested_game_id)
+            game_count = new_games.count()
             if game_count == 0:
-                self.logger.info("No past games found in the database.")
+                self.logger.info("No new games found in the database.")
                 return False
                 
-            self.logger.info(f"Loading knowledge from {game_count} past games...")
+            self.logger.info(f"Loading knowledge from {game_count} new games...")
             
-            # Get past games from database - sort by timestamp to prioritize newer games
-            past_games = models.GameHistory.query.order_by(models.GameHistory.timestamp.desc()).all()
+            # Stream oldest first, so the newest games end up as the most recent replay transitions
+            past_games = models.GameHistory.iter_move_records(self.last_ingested_game_id, self.GAME_LOAD_CHUNK_SIZE)
             games_processed = 0
             
             # Dynamically adjust batch size based on total game count for better efficiency with large datasets
             batch_size = 50 if game_count > 500 else (25 if game_count > 100 else 10)
             
             # Process each game
-            for game_idx, game in enumerate(past_games):
-                try:
-                    # Get moves list from JSON string
-                    moves = game.get_moves_list()
-                    if not moves:
-                        continue
-                        
-                    # Extract game result to assign appropriate rewards
-                    result = game.result
-                    white_win = result == "1-0"
-                    black_win = result == "0-1"
-                    is_draw = result == "1/2-1/2"
-                    
-                    # Play through the game to learn from it
-                    board = chess.Board()
-                    for i in range(len(moves) - 1):
-                        move_uci = moves[i]
-                        move = chess.Move.from_uci(move_uci)
-                        
-                        # Current state before the move
-                        current_fen = board.fen()
-                        current_features = self.board_to_features(current_fen)
-                        
-                        # Make the move
-                        board.push(move)
-                        next_fen = board.fen()
-                        next_features = self.board_to_features(next_fen)
-                        
-                        # Calculate reward based on game outcome
-                        # Higher rewards for moves that led to victory
-                        reward = 0
-                        if board.is_checkmate():
-                            reward = 100 if not board.turn == chess.WHITE else -100
-                        elif board.is_stalemate() or board.is_insufficient_material():
-                            reward = 0
-                        elif board.is_check():
-                            reward = 1 if board.turn == chess.WHITE else -1
-                        elif i == len(moves) - 2:  # Last move
-                            if white_win and board.turn == chess.BLACK:  # White's move led to win
-                                reward = 10
-                            elif black_win and board.turn == chess.WHITE:  # Black's move led to win
-                                reward = -10
-                            elif is_draw:
-                                reward = 0
-                                               
-                        # Store transitions in both raw form and feature form for flexibility
-                        self.memory.append((current_fen, move_uci, reward, next_fen))
-                        
-                        # Also store processed features for faster training
-                        if current_features not in self.board_values:
-                            self.board_values[current_features] = 0
-                            
-                        # Update position values directly from stored games
-                        if white_win and board.turn == chess.WHITE:
-                            self.board_values[current_features] += 0.1
-                        elif black_win and board.turn == chess.BLACK:
-                            self.board_values[current_features] -= 0.1
-                    
-                    games_processed += 1
-                    
-                    # Train in batches to immediately incorporate knowledge
-                    if aggressive_training and games_processed % batch_size == 0:
-                        self.logger.info(f"Processing batch of {batch_size} games, running training...")
-                        if len(self.memory) >= self.min_replay_size:
-                            # More efficient training for different batch sizes
-                            training_iterations = 2 if batch_size > 25 else 3
-                            for _ in range(training_iterations):  # Adjust training iterations based on batch size
-                                self.train_with_replay()
-                except Exception as e:
-                    self.logger.error(f"Error processing game: {e}")
+            for game_id, moves, result in past_games:
+                self.last_ingested_game_id = max(self.last_ingested_game_id, game_id)
+                
+                # Games already ingested one at a time (ingest_game) are not replayed again
+                if game_id in self.ingested_game_ids:
+                    continue
+                if not self._ingest_moves(moves, result):
                     continue
+                games_processed += 1
+                
+                # Train in batches to immediately incorporate knowledge
+                if aggressive_training and games_processed % batch_size == 0:
+                    self.logger.info(f"Processing batch of {batch_size} games, running training...")
+                    if len(self.memory) >= self.min_replay_size:
+                        # More efficient training for different batch sizes
+                        training_iterations = 2 if batch_size > 25 else 3
+                        for _ in range(training_iterations):  # Adjust training iterations based on batch size
+                            self.train_with_replay()
             
+            # Ids at or below the high-water mark no longer need tracking
+            self.ingested_game_ids = {
+                game_id for game_id in self.ingested_game_ids if game_id > self.last_ingested_game_id
+            }
             self.logger.info(f"Successfully processed {games_processed} games from database.")
             
             # Final training pass after loading all games, with optimized iterations based on memory size
-            if len(self.memory) >= self.min_replay_size:
-                self.logger.info("Running final training pass on all loaded games...")
-                # Use fewer iterations for very large datasets to avoid diminishing returns
-                iterations = 3 if len(self.memory) > 1000 else (4 if len(self.memory) > 500 else 5)
-                for _ in range(iterations):
-                    self.train_with_replay()
+            self._final_training_pass()
                 
             return games_processed > 0
         except Exception as e:
             self.logger.error(f"Error loading past games: {e}")
             return False
     
-    def self_play_training(self, num_games=10):
-        """Perform self-play training to improve the agent"""
-        # First load knowledge from past games with aggressive training
-        loaded_games = self.load_games_from_database(aggressive_training=True)
-        self.logger.info(f"Loaded and trained on {loaded_games} games from database")
+    def ingest_game(self, game, aggressive_training=True):
+        """Learn from a single stored GameHistory row (e.g. one just saved) without rereading the database
         
-        # Update database stats total for UI
-        self.get_training_stats()
-        
-        training_data = []
+        The id is remembered so a later load_games_from_database skips the game.
+        """
+        if game.id <= self.last_ingested_game_id or game.id in self.ingested_game_ids:
+            return False
+        self.ingested_game_ids.add(game.id)
+        ingested = self._ingest_moves(game.get_moves_list(), game.result)
+        if ingested and aggressive_training:
+            self._final_training_pass()
+        return ingested
+    
+    def mark_ingested(self, game_ids):
+        """Record stored games the agent has already learned from (e.g. its own self-play games)"""
+        self.ingested_game_ids.update(
+            game_id for game_id in game_ids if game_id is not None and game_id > self.last_ingested_game_id
+        )
+    
+    def _final_training_pass(self):
+        """Replay training after ingesting games, with iterations based on memory size"""
+        if len(self.memory) >= self.min_replay_size:
+            self.logger.info("Running final training pass on all loaded games...")
+            # Use fewer iterations for very large datasets to avoid diminishing returns
+            iterations = 3 if len(self.memory) > 1000 else (4 if len(self.memory) > 500 else 5)
+            for _ in range(iterations):
+                self.train_with_replay()
+    
+    def _ingest_moves(self, moves, result):
+        """Replay one stored game (chess.Move objects or UCI strings) into replay memory and the value table
         
-        # Run self-play games
-        self.logger.info(f"Starting self-play training with {num_games} games")
-        for game_num in range(num_games):
+        Returns False if the game was skipped.
+        """
+        try:
+            if not moves:
+                return False
+                
+            # Extract game result to assign appropriate rewards
+            white_win = result == "1-0"
+            black_win = result == "0-1"
+            is_draw = result == "1/2-1/2"
+            
+            # Play through the game to learn from it
             board = chess.Board()
-            game_moves = []
-            move_count = 0
-            game_reward = 0
-            
-            # Play a complete game against itself
-            while not board.is_game_over():
-                move_count += 1
-                current_fen = board.fen()
+            for i in range(len(moves) - 1):
+                # Compact stored games decode straight to moves; JSON games hold UCI strings
+                move = moves[i] if isinstance(moves[i], chess.Move) else chess.Move.from_uci(moves[i])
                 
-                # Get AI move for current board state
-                move_uci, confidence, _ = self.get_move(current_fen)
-                if move_uci is None:
-                    break
-                    
-                move = chess.Move.from_uci(move_uci)
-                game_moves.append(move_uci)
+                # Current state before the move
+                current_features = self.position_key(board)
+                packed_state = self.encoder.pack(board)
                 
                 # Make the move
                 board.push(move)
-                next_fen = board.fen()
+                next_features = self.position_key(board)
                 
-                # Calculate reward
+                # Calculate reward based on game outcome
+                # Higher rewards for moves that led to victory
                 reward = 0
                 if board.is_checkmate():
                     reward = 100 if not board.turn == chess.WHITE else -100
-                    game_reward = reward
                 elif board.is_stalemate() or board.is_insufficient_material():
                     reward = 0
-                    game_reward = 0
                 elif board.is_check():
                     reward = 1 if board.turn == chess.WHITE else -1
-                    
-                # Store the transition
-                self.memory.append((current_fen, move_uci, reward, next_fen))
-                
-                # Update the network without generating visualization during training
-                features = self.board_to_features(current_fen)
-                next_features = self.board_to_features(next_fen)
-                
-                if features not in self.board_values:
-                    self.board_values[features] = 0
-                
-                if next_features not in self.board_values:
-                    # Evaluate position without visualization during training
-                    board = chess.Board(next_fen)
-                    material_balance = 0
-                    piece_values = {"P": 1, "N": 3, "B": 3, "R": 5, "Q": 9, "K": 0,
-                                  "p": -1, "n": -3, "b": -3, "r": -5, "q": -9, "k": 0}
-                    
-                    # Add a small bonus for white to counter the observed black advantage
-                    white_advantage_bonus = 0.25
-                    
-                    for square in chess.SQUARES:
-                        piece = board.piece_at(square)
-                        if piece:
-                            material_balance += piece_values[piece.symbol()]
-                    
-                    # Give white a small advantage to balance performance
-                    material_balance += white_advantage_bonus
-                    
-                    # Add some randomness to evaluation but reduce the range
-                    evaluation = material_balance + (random.random() - 0.5) * 0.3
-                    self.board_values[next_features] = evaluation
-                
-                # Q-learning update
-                self.board_values[features] += self.alpha * (
-                    reward + self.gamma * self.board_values[next_features] - self.board_values[features]
-                )
-                
-                # Decay epsilon (reduce exploration over time as the agent learns)
-                if self.epsilon > self.epsilon_min:
-                    self.epsilon *= self.epsilon_decay
-                    
-                # Store experience in replay memory
-                self.memory.append((features, move_uci, reward, next_features))
-                
-                # Perform mini-batch training without visualization
-                if len(self.memory) >= self.min_replay_size:
-                    self.train_count += 1
-                    
-                    # Sample a mini-batch 
-                    batch_size = min(self.batch_size, len(self.memory))
-                    mini_batch = random.sample(self.memory, batch_size)
-                    
-                    # Update network based on batch of experiences
-                    for state, action, r, next_state in mini_batch:
-                        if state not in self.board_values:
-                            self.board_values[state] = 0
-                            
-                        if next_state not in self.board_values:
-                            self.board_values[next_state] = 0
-                        
-                        # Update with higher learning rate for experiences
-                        self.board_values[state] += self.alpha * 0.5 * (
-                            r + self.gamma * self.board_values[next_state] - self.board_values[state]
-                        )
-                
-            # Record game result
-            result = board.result()
-            self.total_games += 1
-            self.last_game_moves = game_moves
-            
-            if result == "1-0":
-                self.wins += 1
-            elif result == "0-1":
-                self.losses += 1
-            else:
-                self.draws += 1
+                elif i == len(moves) - 2:  # Last move
+                    if white_win and board.turn == chess.BLACK:  # White's move led to win
+                        reward = 10
+                    elif black_win and board.turn == chess.WHITE:  # Black's move led to win
+                        reward = -10
+                    elif is_draw:
+                        reward = 0
+                                       
+                # Store the transition under the same Zobrist keys used by every other path
+                done = board.is_game_over() or i == len(moves) - 2
+                self.memory.append(current_features, encode_move(move), reward, next_features, done,
+                                   packed_state)
                 
-            # Record training statistics
-            training_data.append({
-                "game": self.total_games,
-                "moves": move_count,
-                "moves_list": game_moves,  # Store the actual list of moves in UCI format
-                "result": result,
-                "reward": game_reward,
-                "epsilon": self.epsilon
-            })
-            
-        self.training_stats.extend(training_data)
-        
-        # Save games to database for future training
-        try:
-            # Import here to avoid circular imports
-            import models
-            import json
-            import uuid
-            from app import db
-            from datetime import datetime
-            
-            # For each completed game, save to database
-            for game_data in training_data:
-                try:
-                    # Create a new game history entry
-                    game_history = models.GameHistory(
-                        game_id=str(uuid.uuid4()),
-                        result=game_data["result"],
-                        white_player="AI",
-                        black_player="AI",
-                        timestamp=datetime.utcnow(),
-                        game_type="self-play",
-                        evaluation=game_data["reward"]
-                    )
-                    
-                    # Set moves list
-                    game_history.set_moves_list(game_data["moves_list"])
+                slots = self._transition_slots(current_features, next_features,
+                                               lambda: self._initial_value(board))
                     
-                    # Add to database
-                    db.session.add(game_history)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error saving game to database: {e}")
-                    continue
-                    
-            # Commit all games at once
-            db.session.commit()
-            self.logger.info(f"Successfully saved {len(training_data)} games to database")
-            
-            # Update training statistics in database
-            try:
-                # Calculate stats
-                session_id = str(uuid.uuid4())[:8]  # Use part of UUID as session ID
-                white_wins = sum(1 for game in training_data if game["result"] == "1-0")
-                black_wins = sum(1 for game in training_data if game["result"] == "0-1")
-                draws = sum(1 for game in training_data if game["result"] == "1/2-1/2")
-                avg_game_length = sum(game["moves"] for game in training_data) / max(1, len(training_data))
-                avg_reward = sum(game["reward"] for game in training_data) / max(1, len(training_data))
-                
-                # Create training stats record
-                training_stats = models.TrainingStats(
-                    training_session=session_id,
-                    total_games=len(training_data),
-                    white_wins=white_wins,
-                    black_wins=black_wins,
-                    draws=draws,
-                    avg_game_length=avg_game_length,
-                    avg_reward=avg_reward,
-                    epsilon=self.epsilon,
-                    alpha=self.alpha,
-                    gamma=self.gamma,
-                    positions_evaluated=self.position_count
-                )
+                # Update position values directly from stored games
+                if slots is not None:
+                    if white_win and board.turn == chess.WHITE:
+                        self.board_values.values[slots[0]] += 0.1
+                    elif black_win and board.turn == chess.BLACK:
+                        self.board_values.values[slots[0]] -= 0.1
+            return True
+        except Exception as e:
+            self.logger.error(f"Error processing game: {e}")
+            return False
+    
+    def self_play_training(self, num_games=10, progress_callback=None, should_stop=None, workers=1, merge="replay",
+                           lockstep_games=None):
+        """Perform self-play training to improve the agent
+        
+        Args:
+            num_games: Number of self-play games
+            progress_callback: Called with each finished game's training data
+            should_stop: Checked before every game; returning True ends training early
+            workers: Number of processes playing games in parallel (1 plays in this process)
+            merge: How parallel results are merged: "replay" the transitions or "average" the values
+            lockstep_games: If set (and workers is 1), advance this many games in lockstep with
+                            batched child scoring instead of playing one game at a time
+        
+        Returns:
+            List of per-game training data; storing it is left to the caller
+            (see persistence.save_self_play_results)
+        """
+        # First load knowledge from past games with aggressive training
+        with self.lock:
+            loaded_games = self.load_games_from_database(aggressive_training=True)
+        self.logger.info(f"Loaded and trained on {loaded_games} games from database")
+        
+        # Update database stats total for UI
+        self.get_training_stats()
+        
+        training_data = []
+        
+        # Run self-play games
+        self.logger.info(f"Starting self-play training with {num_games} games")
+        if workers > 1:
+            from parallel_selfplay import parallel_self_play
+            training_data = parallel_self_play(self, num_games, workers, merge,
+                                               progress_callback=progress_callback, should_stop=should_stop)
+        elif lockstep_games and lockstep_games > 1:
+            from lockstep_selfplay import lockstep_self_play
+            training_data = lockstep_self_play(self, num_games, lockstep_games,
+                                               progress_callback=progress_callback, should_stop=should_stop)
+        else:
+            for game_num in range(num_games):
+                if should_stop is not None and should_stop():
+                    self.logger.info(f"Self-play stopped after {game_num} of {num_games} games")
+                    break
                 
-                db.session.add(training_stats)
-                db.session.commit()
-                self.logger.info(f"Successfully saved training stats to database")
+                # Hold the agent only for one game at a time so inference requests can run in between
+                with self.lock:
+                    game_data = self.play_training_game()
+                training_data.append(game_data)
                 
-            except Exception as e:
-                self.logger.error(f"Error saving training stats to database: {e}")
-                db.session.rollback()
+                if progress_callback is not None:
+                    progress_callback(game_data)
+        
+        return training_data
+        
+    def play_training_game(self):
+        """Play one self-play game, learning from every move, and return its training data"""
+        board = chess.Board()
+        game_moves = []
+        move_count = 0
+        game_reward = 0
+        
+        # Play a complete game against itself
+        while not board.is_game_over():
+            move_count += 1
+            
+            # Get AI move for current board state
+            move_uci, confidence, _ = self.get_move(board.fen())
+            if move_uci is None:
+                break
                 
-        except Exception as e:
-            self.logger.error(f"Database operation failed: {e}")
+            game_moves.append(move_uci)
+            reward = self.apply_training_move(board, chess.Move.from_uci(move_uci))
+            if board.is_checkmate() or board.is_stalemate() or board.is_insufficient_material():
+                game_reward = reward
             
-        return training_data
+            # Perform mini-batch training without visualization
+            if len(self.memory) >= self.min_replay_size:
+                self.train_with_replay(recent_ratio=None)
+            
+        return self.record_game_result(board.result(), game_moves, move_count, game_reward)
+    
+    def apply_training_move(self, board, move):
+        """Play move on board during self-play, learn from the transition and return its reward
+        
+        Applies the Q-learning update, decays epsilon and stores the transition in
+        replay memory; replay training itself is left to the caller.
+        """
+        features = self.position_key(board)
+        packed_state = self.encoder.pack(board)
+        
+        # Make the move
+        board.push(move)
+        
+        # Calculate reward
+        reward = 0
+        if board.is_checkmate():
+            reward = 100 if not board.turn == chess.WHITE else -100
+        elif board.is_stalemate() or board.is_insufficient_material():
+            reward = 0
+        elif board.is_check():
+            reward = 1 if board.turn == chess.WHITE else -1
+            
+        # Update the network without generating visualization during training
+        next_features = self.position_key(board)
+        
+        # Evaluate unseen positions without visualization during training
+        slots = self._transition_slots(features, next_features, lambda: self._initial_value(board))
+        
+        # Q-learning update
+        if slots is not None:
+            self._q_update(slots, reward)
         
+        # Decay epsilon (reduce exploration over time as the agent learns)
+        if self.epsilon > self.epsilon_min:
+            self.epsilon *= self.epsilon_decay
+            
+        # Store experience in replay memory
+        self.memory.append(features, encode_move(move), reward, next_features, board.is_game_over(),
+                           packed_state)
+        return reward
+    
+    def record_game_result(self, result, game_moves, move_count, game_reward):
+        """Count a finished self-play game in the session statistics and return its training data"""
+        self.total_games += 1
+        self.last_game_moves = game_moves
+        
+        if result == "1-0":
+            self.wins += 1
+        elif result == "0-1":
+            self.losses += 1
+        else:
+            self.draws += 1
+            
+        # Record training statistics
+        game_data = {
+            "game": self.total_games,
+            "moves": move_count,
+            "moves_list": game_moves,  # Store the actual list of moves in UCI format
+            "result": result,
+            "reward": game_reward,
+            "epsilon": self.epsilon
+        }
+        self.training_stats.append(game_data)
+        return game_data
+    
     def get_training_stats(self):
         """Return statistics about the training progress"""
         # Calculate local stats from current session
@@ -748,29 +1046,13 @@ class DQNAgent:
         try:
             # Import here to avoid circular imports
             import models
-            from app import db
-            from sqlalchemy import func
-            
-            # Get game counts by result
-            game_counts = db.session.query(
-                models.GameHistory.result,
-                func.count(models.GameHistory.id).label('count')
-            ).group_by(models.GameHistory.result).all()
-            
-            # Calculate stats
-            total_db_games = 0
-            white_wins = 0
-            black_wins = 0
-            draws = 0
-            
-            for result, count in game_counts:
-                total_db_games += count
-                if result == "1-0":
-                    white_wins = count
-                elif result == "0-1":
-                    black_wins = count
-                else:  # Draw results like "1/2-1/2"
-                    draws = count
+            
+            # Running totals maintained on every game insert (one primary-key read)
+            counters = models.GameCounters.current()
+            total_db_games = counters.total_games if counters else 0
+            white_wins = counters.white_wins if counters else 0
+            black_wins = counters.black_wins if counters else 0
+            draws = counters.draws if counters else 0
             
             # Calculate percentages
             if total_db_games > 0:
@@ -780,22 +1062,9 @@ class DQNAgent:
             else:
                 white_win_pct = black_win_pct = draw_pct = 0
                 
-            # Get average game length without using JSON functions 
-            # which might not be available in all PostgreSQL versions
-            games = models.GameHistory.query.all()
-            move_counts = []
-            for game in games:
-                # Use the get_moves_list method which loads JSON
-                moves = game.get_moves_list()
-                move_counts.append(len(moves))
-            
-            # Calculate average
-            avg_db_game_length = sum(move_counts) / max(1, len(move_counts)) if move_counts else 0
-            
-            # Get average reward
-            avg_db_reward = db.session.query(
-                func.avg(models.GameHistory.evaluation)
-            ).scalar() or 0
+            # Averages from the stored move counts and evaluations
+            avg_db_game_length = counters.total_moves / total_db_games if total_db_games else 0
+            avg_db_reward = counters.total_evaluation / counters.evaluated_games if counters and counters.evaluated_games else 0
             
             # Update db_stats
             db_stats = {
@@ -829,6 +1098,10 @@ class DQNAgent:
             "training_history": self.training_stats[-10:] if self.training_stats else []
         }
         
+        # Value table size, eviction and hit-rate counters
+        for name, value in self.board_values.stats().items():
+            combined_stats[f"value_table_{name}"] = value
+        
         # Merge with database stats
         combined_stats.update(db_stats)
         
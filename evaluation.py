@@ -0,0 +1,108 @@
+import chess
+import chess.polyglot
+
+ZOBRIST = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+
+
+class IncrementalEvaluator:
+    """Running material, piece-square and Zobrist totals for a board under push/pop
+
+    Instead of copying the board and re-scoring every child from a FEN string,
+    callers push and pop moves through the evaluator. Each move's delta (moved
+    piece, capture, promotion, castling rook) is applied to the totals on push
+    and reverted on pop, so scoring a child costs a handful of additions.
+
+    Args:
+        board: The board to track; the evaluator pushes and pops moves on it
+        encoder: BoardEncoder providing the signed per-plane material weights
+                 (pawn units) and the (12, 64) piece-square tables
+    """
+
+    def __init__(self, board, encoder):
+        self.board = board
+        self.material_weights = encoder.pawn_unit_weights.tolist()
+        self.square_weights = encoder.positional_weights.tolist()
+        self.material = 0.0
+        self.positional = 0.0
+        self.piece_key = 0
+        self._deltas = []
+
+        for square, piece in board.piece_map().items():
+            material, positional, key = self._term(piece.piece_type, piece.color, square)
+            self.material += material
+            self.positional += positional
+            self.piece_key ^= key
+
+    def _term(self, piece_type, color, square):
+        """Material, positional and Zobrist contributions of one piece on one square"""
+        plane = piece_type - 1 if color == chess.WHITE else piece_type + 5
+        key = chess.polyglot.POLYGLOT_RANDOM_ARRAY[64 * ((piece_type - 1) * 2 + int(color)) + square]
+        return self.material_weights[plane], self.square_weights[plane][square], key
+
+    def _move_delta(self, move):
+        """Compute (material, positional, key) changes of move on the current board"""
+        board = self.board
+        color = board.turn
+        piece_type = board.piece_type_at(move.from_square)
+        removed = [(piece_type, color, move.from_square)]
+        added = [(move.promotion or piece_type, color, move.to_square)]
+
+        if board.is_castling(move):
+            rank = chess.square_rank(move.from_square)
+            if board.is_kingside_castling(move):
+                rook_from, rook_to = chess.square(7, rank), chess.square(5, rank)
+                king_to = chess.square(6, rank)
+            else:
+                rook_from, rook_to = chess.square(0, rank), chess.square(3, rank)
+                king_to = chess.square(2, rank)
+            removed.append((chess.ROOK, color, rook_from))
+            added = [(chess.KING, color, king_to), (chess.ROOK, color, rook_to)]
+        elif board.is_en_passant(move):
+            captured_square = move.to_square + (-8 if color == chess.WHITE else 8)
+            removed.append((chess.PAWN, not color, captured_square))
+        else:
+            captured = board.piece_type_at(move.to_square)
+            if captured:
+                removed.append((captured, not color, move.to_square))
+
+        material = positional = 0.0
+        key = 0
+        for piece_type, piece_color, square in removed:
+            m, p, k = self._term(piece_type, piece_color, square)
+            material -= m
+            positional -= p
+            key ^= k
+        for piece_type, piece_color, square in added:
+            m, p, k = self._term(piece_type, piece_color, square)
+            material += m
+            positional += p
+            key ^= k
+        return material, positional, key
+
+    def push(self, move):
+        """Make move on the tracked board and update the totals"""
+        delta = self._move_delta(move)
+        self.board.push(move)
+        self.material += delta[0]
+        self.positional += delta[1]
+        self.piece_key ^= delta[2]
+        self._deltas.append(delta)
+
+    def pop(self):
+        """Unmake the last move and revert the totals"""
+        material, positional, key = self._deltas.pop()
+        self.material -= material
+        self.positional -= positional
+        self.piece_key ^= key
+        return self.board.pop()
+
+    @property
+    def zobrist_key(self):
+        """Polyglot Zobrist hash of the current position (same value as chess.polyglot.zobrist_hash)"""
+        board = self.board
+        return self.piece_key ^ ZOBRIST.hash_castling(board) ^ ZOBRIST.hash_ep_square(board) ^ ZOBRIST.hash_turn(board)
+
+    @property
+    def score(self):
+        """Material plus piece-square score from white's perspective, in pawn units"""
+        return self.material + self.positional
@@ -0,0 +1,115 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import chess
+from chess_engine import ChessEngine
+
+
+class GameSession:
+    """A game in progress kept on the server as a live chess.Board
+
+    Moves are pushed onto the board incrementally, so requests don't re-parse
+    a FEN and the board's move stack makes repetition detection correct. Hold
+    lock while reading or changing the board.
+    """
+
+    def __init__(self, fen=None, white_player="User", black_player="AI"):
+        self.session_id = str(uuid.uuid4())
+        self.board = chess.Board(fen) if fen else chess.Board()
+        self.start_fen = self.board.fen()
+        self.white_player = white_player
+        self.black_player = black_player
+        self.created_at = time.time()
+        self.last_access = time.monotonic()
+        self.lock = threading.Lock()
+
+    def push_uci(self, move_uci):
+        """Play a move given in UCI; raises ValueError if it is malformed or illegal"""
+        move = chess.Move.from_uci(move_uci)
+        if move not in self.board.legal_moves:
+            raise ValueError(f"Illegal move {move_uci} in {self.board.fen()}")
+        self.board.push(move)
+        return move
+
+    def undo(self):
+        """Take back the last move and return it (UCI), or None at the start of the game"""
+        if not self.board.move_stack:
+            return None
+        return self.board.pop().uci()
+
+    def to_dict(self):
+        """JSON-serializable session state"""
+        game_state = ChessEngine.board_state(self.board)
+        return {
+            "game_id": self.session_id,
+            "fen": self.board.fen(),
+            "start_fen": self.start_fen,
+            "moves": [move.uci() for move in self.board.move_stack],
+            "turn": "white" if self.board.turn == chess.WHITE else "black",
+            "white_player": self.white_player,
+            "black_player": self.black_player,
+            "state": game_state["state"],
+            "message": game_state["message"]
+        }
+
+
+class GameSessionStore:
+    """In-memory game sessions, bounded by count (least recently used first out) and idle time
+
+    Sessions live in the process that created them; with several server
+    workers, clients must be routed back to the same worker.
+
+    Args:
+        max_sessions: Number of sessions kept; creating one more drops the least recently used
+        ttl_seconds: Idle time after which a session expires
+    """
+
+    def __init__(self, max_sessions=1000, ttl_seconds=3600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.sessions = OrderedDict()  # session_id -> GameSession, least recently used first
+        self.lock = threading.Lock()
+
+    def create(self, fen=None, white_player="User", black_player="AI"):
+        """Start a session from fen (the starting position by default) and return it
+
+        Raises ValueError for an invalid FEN.
+        """
+        session = GameSession(fen, white_player, black_player)
+        with self.lock:
+            self._expire()
+            self.sessions[session.session_id] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        """Return the session and mark it used, or None if it is unknown or expired"""
+        with self.lock:
+            self._expire()
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self.sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        """Drop a session; returns False if it was unknown"""
+        with self.lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    def __len__(self):
+        with self.lock:
+            self._expire()
+            return len(self.sessions)
+
+    def _expire(self):
+        """Drop sessions idle for longer than ttl_seconds (call with lock held)"""
+        # Sessions are in last-access order, so expired ones are at the front
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_access >= cutoff:
+                break
+            del self.sessions[session_id]
@@ -0,0 +1,156 @@
+import logging
+import queue
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingEvaluation:
+    """One caller's positions waiting for a batched forward pass"""
+
+    def __init__(self, predict, masks, extras):
+        self.predict = predict
+        self.masks = masks
+        self.extras = extras
+        self.size = len(masks)
+        self.values = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceBatcher:
+    """Gathers network evaluations from concurrent requests and runs them as one batch
+
+    Callers block in evaluate() while a dispatcher thread collects work for up
+    to max_wait_ms after the first pending request (or until max_positions
+    positions are waiting, or every caller inside evaluate() has joined the
+    batch), runs one forward pass per predict function over the concatenated
+    positions, and hands every caller its slice of the results. A lone request
+    therefore doesn't wait for the window. A caller whose batch isn't answered
+    within timeout_ms (dispatcher stalled or dead) runs its own forward pass.
+
+    Args:
+        max_wait_ms: Longest time the first request of a batch waits for others
+        max_positions: Positions that trigger a batch immediately
+        timeout_ms: Longest time a caller waits for its batch before scoring directly
+    """
+
+    def __init__(self, max_wait_ms=2.0, max_positions=512, timeout_ms=1000):
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_positions = max_positions
+        self.timeout = timeout_ms / 1000.0
+        self._queue = queue.Queue()
+        self._active = 0  # Callers inside evaluate()
+        self._active_lock = threading.Lock()
+
+        # Counters reported by stats()
+        self.batches = 0
+        self.requests = 0
+        self.positions = 0
+        self.largest_batch = 0
+        self.fallbacks = 0  # Callers that scored directly after a timeout or with no dispatcher
+
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def evaluate(self, predict, masks, extras):
+        """Score packed positions with predict(masks, extras) as part of a shared batch and return the values
+
+        Errors raised by predict in the batch are re-raised here. If the batch
+        isn't answered within the timeout, predict is called directly instead.
+        """
+        if not self._thread.is_alive():
+            self.fallbacks += 1
+            return predict(masks, extras)
+
+        pending = _PendingEvaluation(predict, masks, extras)
+        with self._active_lock:
+            self._active += 1
+        try:
+            self._queue.put(pending)
+            answered = pending.done.wait(self.timeout)
+        finally:
+            with self._active_lock:
+                self._active -= 1
+        if not answered:
+            logger.warning(f"Batched inference not answered within {self.timeout * 1000:.0f} ms; scoring directly")
+            self.fallbacks += 1
+            return predict(masks, extras)
+        if pending.error is not None:
+            raise pending.error
+        return pending.values
+
+    def _collect(self):
+        """Block for the first pending request, then gather more until the window closes or the batch is full"""
+        batch = [self._queue.get()]
+        count = batch[0].size
+        deadline = time.monotonic() + self.max_wait
+        # Callers still in evaluate() for an already-answered batch may lag in
+        # decrementing _active; that only costs the window, never correctness
+        while count < self.max_positions and len(batch) < self._active:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            count += pending.size
+        return batch
+
+    def _run(self):
+        """Dispatcher loop: one forward pass per predict function for every collected batch"""
+        while True:
+            batch = self._collect()
+            try:
+                self._dispatch(batch)
+            except Exception as e:
+                # Keep the dispatcher alive; hand the error to every caller not answered yet
+                logger.error(f"Inference batcher failed: {e}")
+                for pending in batch:
+                    if not pending.done.is_set():
+                        pending.error = e
+                        pending.done.set()
+
+    def _dispatch(self, batch):
+        """Score one collected batch: a forward pass per predict function, results scattered to callers"""
+        # Requests for different agents (e.g. around a checkpoint swap) are scored separately
+        groups = {}
+        for pending in batch:
+            groups.setdefault(pending.predict, []).append(pending)
+
+        for predict, group in groups.items():
+            try:
+                values = predict(np.concatenate([pending.masks for pending in group]),
+                                 np.concatenate([pending.extras for pending in group]))
+                offset = 0
+                for pending in group:
+                    pending.values = values[offset:offset + pending.size]
+                    offset += pending.size
+            except Exception as e:
+                logger.error(f"Batched inference failed: {e}")
+                for pending in group:
+                    pending.error = e
+            for pending in group:
+                pending.done.set()
+
+            size = sum(pending.size for pending in group)
+            self.batches += 1
+            self.requests += len(group)
+            self.positions += size
+            self.largest_batch = max(self.largest_batch, size)
+
+    def stats(self):
+        """Return batch counts and average batch sizes"""
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "positions": self.positions,
+            "largest_batch": self.largest_batch,
+            "fallbacks": self.fallbacks,
+            "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "avg_positions_per_batch": self.positions / self.batches if self.batches else 0.0
+        }
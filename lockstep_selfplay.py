@@ -0,0 +1,129 @@
+import logging
+import random
+import chess
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LockstepGame:
+    """One self-play game advanced by lockstep_self_play"""
+
+    def __init__(self):
+        self.board = chess.Board()
+        self.moves = []
+        self.reward = 0
+
+
+def choose_moves(agent, boards):
+    """Pick one move per board with epsilon-greedy, scoring every candidate child in one batch
+
+    Children of all exploiting boards are resolved together: terminal positions
+    get fixed scores, known positions come from one ValueTable.get_many call,
+    and the rest are scored by a single network forward pass.
+    """
+    choices = [None] * len(boards)
+    candidates = []  # (board index, legal moves, child values)
+    keys = []
+    key_owners = []  # (candidate index, move index) of every entry in keys
+
+    for board_index, board in enumerate(boards):
+        legal_moves = list(board.legal_moves)
+        if random.random() < agent.epsilon:
+            # Exploration: choose a random move
+            choices[board_index] = random.choice(legal_moves)
+            continue
+
+        evaluator = agent.new_evaluator(board)
+        values = [None] * len(legal_moves)
+        for move_index, move in enumerate(legal_moves):
+            evaluator.push(move)
+            child = evaluator.board
+            if child.is_checkmate():
+                values[move_index] = -100 if child.turn == chess.WHITE else 100
+            elif child.is_stalemate() or child.is_insufficient_material():
+                values[move_index] = 0
+            else:
+                keys.append(evaluator.zobrist_key)
+                key_owners.append((len(candidates), move_index))
+            evaluator.pop()
+        candidates.append((board_index, legal_moves, values))
+
+    if keys:
+        agent.position_count += len(keys)
+        known = agent.board_values.get_many(np.array(keys, dtype=np.uint64))
+
+        # Children missing from the table are packed per board and scored in one network call
+        unseen = {}
+        for (candidate_index, move_index), value in zip(key_owners, known.tolist()):
+            if np.isnan(value):
+                unseen.setdefault(candidate_index, []).append(move_index)
+            else:
+                candidates[candidate_index][2][move_index] = value
+        if unseen:
+            packed = [
+                agent.encoder.pack_children(boards[candidates[c][0]], [candidates[c][1][m] for m in move_indices])
+                for c, move_indices in unseen.items()
+            ]
+            masks = np.concatenate([item[0] for item in packed])
+            extras = np.concatenate([item[1] for item in packed])
+            scores = iter(agent.network_values(masks, extras).tolist())
+            for candidate_index, move_indices in unseen.items():
+                for move_index in move_indices:
+                    candidates[candidate_index][2][move_index] = next(scores)
+
+    # Exploitation: white maximizes, black minimizes
+    for board_index, legal_moves, values in candidates:
+        pick = max if boards[board_index].turn == chess.WHITE else min
+        best_index = pick(range(len(legal_moves)), key=values.__getitem__)
+        choices[board_index] = legal_moves[best_index]
+    return choices
+
+
+def lockstep_self_play(agent, num_games, parallel_games=16, progress_callback=None, should_stop=None):
+    """Play num_games self-play games, advancing up to parallel_games of them in lockstep
+
+    At every ply each active game picks a move (see choose_moves), learns from
+    it with the same per-move update as sequential self-play, and one replay
+    update sized for all the moves of the ply is applied. Finished games are
+    replaced with new ones until num_games have been started. The agent lock
+    is held for one ply at a time.
+
+    Returns:
+        List of per-game training data, in the order the games finished
+    """
+    training_data = []
+    active = [LockstepGame() for _ in range(min(parallel_games, num_games))]
+    started = len(active)
+
+    while active:
+        if should_stop is not None and should_stop():
+            logger.info(f"Lockstep self-play stopped after {len(training_data)} of {num_games} games")
+            break
+
+        with agent.lock:
+            moves = choose_moves(agent, [game.board for game in active])
+            for game, move in zip(active, moves):
+                game.moves.append(move.uci())
+                reward = agent.apply_training_move(game.board, move)
+                board = game.board
+                if board.is_checkmate() or board.is_stalemate() or board.is_insufficient_material():
+                    game.reward = reward
+
+            # One replay update covering every move of this ply
+            if len(agent.memory) >= agent.min_replay_size:
+                agent.train_with_replay(recent_ratio=None, batch_size=agent.batch_size * len(active))
+
+            finished = [game for game in active if game.board.is_game_over()]
+            for game in finished:
+                game_data = agent.record_game_result(game.board.result(), game.moves, len(game.moves), game.reward)
+                training_data.append(game_data)
+                if progress_callback is not None:
+                    progress_callback(game_data)
+
+        active = [game for game in active if not game.board.is_game_over()]
+        while len(active) < parallel_games and started < num_games:
+            active.append(LockstepGame())
+            started += 1
+
+    return training_data
@@ -1,14 +1,16 @@
 from flask import Flask
 from database import db
 import models
+from migrations import upgrade_schema
 from app import app
 
 # Initialize the Flask app with the database
 db.init_app(app)
 
-# Create database tables if they don't exist
+# Create database tables if they don't exist, then add newer columns and indexes to existing ones
 with app.app_context():
     db.create_all()
+    upgrade_schema(db.engine)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
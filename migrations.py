@@ -0,0 +1,187 @@
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import bindparam, func, insert, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+import models
+
+logger = logging.getLogger(__name__)
+
+# Rows backfilled or converted per batch
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def upgrade_schema(engine):
+    """Bring an existing database up to the current models
+
+    db.create_all() creates missing tables but never alters existing ones, so
+    columns and indexes added since a database was created are added here.
+    Safe to run on every startup.
+    """
+    table = models.GameHistory.__table__
+    columns = {column["name"] for column in inspect(engine).get_columns(table.name)}
+
+    if "move_count" not in columns:
+        logger.info("Adding game_history.move_count and backfilling it from the stored moves")
+        # The worker that adds the column backfills it
+        if _add_column(engine, table.name, "move_count", "INTEGER NOT NULL DEFAULT 0"):
+            backfill_move_counts(engine)
+
+    if "moves_blob" not in columns:
+        logger.info("Adding game_history.moves_blob for compact move storage")
+        _add_column(engine, table.name, "moves_blob", table.c.moves_blob.type.compile(dialect=engine.dialect))
+
+    # Indexes declared on the model but missing from an older table
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+    ensure_game_counters(engine)
+
+
+def _add_column(engine, table_name, column_name, ddl):
+    """Add a column to an existing table and return True, or False if another worker added it first"""
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}"))
+        return True
+    except (OperationalError, ProgrammingError):
+        # A concurrent ALTER fails with a duplicate-column error; anything else is re-raised
+        columns = {column["name"] for column in inspect(engine).get_columns(table_name)}
+        if column_name not in columns:
+            raise
+        return False
+
+
+def ensure_game_counters(engine):
+    """Create the game_counters row from the stored games if it doesn't exist yet"""
+    try:
+        _create_game_counters(engine)
+    except IntegrityError:
+        # Another worker created the row first
+        pass
+
+
+def _create_game_counters(engine):
+    """Aggregate game_history once and insert the counters row"""
+    counters = models.GameCounters.__table__
+    with engine.begin() as connection:
+        if connection.execute(select(counters.c.id).where(counters.c.id == models.GameCounters.ROW_ID)).first():
+            return
+
+        games = models.GameHistory.__table__
+        rows = connection.execute(
+            select(games.c.result, func.count(games.c.id), func.sum(games.c.move_count),
+                   func.sum(games.c.evaluation), func.count(games.c.evaluation))
+            .group_by(games.c.result)
+        ).all()
+        values = dict(id=models.GameCounters.ROW_ID, total_games=0, white_wins=0, black_wins=0, draws=0,
+                      total_moves=0, total_evaluation=0.0, evaluated_games=0, updated_at=datetime.utcnow())
+        for result, count, moves, evaluation, evaluated in rows:
+            values["total_games"] += count
+            if result == "1-0":
+                values["white_wins"] += count
+            elif result == "0-1":
+                values["black_wins"] += count
+            else:
+                values["draws"] += count
+            values["total_moves"] += moves or 0
+            values["total_evaluation"] += evaluation or 0.0
+            values["evaluated_games"] += evaluated
+        connection.execute(insert(counters).values(**values))
+    logger.info(f"Created game counters from {values['total_games']} stored games")
+
+
+def backfill_move_counts(engine):
+    """Fill move_count from the moves JSON, paging through the table by id"""
+    table = models.GameHistory.__table__
+    last_id = 0
+    updated = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(table.c.id, table.c.moves)
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(BACKFILL_CHUNK_SIZE)
+            ).all()
+            if not rows:
+                break
+            connection.execute(
+                update(table).where(table.c.id == bindparam("row_id")).values(move_count=bindparam("count")),
+                [
+                    {"row_id": row_id, "count": len(models.GameHistory.parse_moves(moves))}
+                    for row_id, moves in rows
+                ]
+            )
+        last_id = rows[-1][0]
+        updated += len(rows)
+    logger.info(f"Backfilled move_count for {updated} games")
+
+
+def compact_stored_moves(engine, chunk_size=BACKFILL_CHUNK_SIZE):
+    """Convert legacy JSON move lists to moves_blob, paging through the table by id
+
+    Converted rows keep an empty moves string. Rows whose moves are not a JSON
+    list of valid UCI moves are logged and left as they are. Returns the number
+    of rows converted.
+    """
+    table = models.GameHistory.__table__
+    last_id = 0
+    converted = 0
+    skipped = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(table.c.id, table.c.moves)
+                .where(table.c.id > last_id, table.c.moves_blob.is_(None))
+                .order_by(table.c.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            updates = []
+            for row_id, moves in rows:
+                blob = _compact_moves(moves)
+                if blob is None:
+                    logger.warning(f"Keeping JSON moves of game_history row {row_id}: not a list of UCI moves")
+                    skipped += 1
+                    continue
+                updates.append({"row_id": row_id, "moves_json": "", "blob": blob})
+            if updates:
+                connection.execute(
+                    update(table).where(table.c.id == bindparam("row_id"))
+                    .values(moves=bindparam("moves_json"), moves_blob=bindparam("blob")),
+                    updates
+                )
+        last_id = rows[-1][0]
+        converted += len(updates)
+    logger.info(f"Converted {converted} games to compact move storage ({skipped} left as JSON)")
+    return converted
+
+
+def _compact_moves(moves_json):
+    """Encoded moves_blob for a JSON list of UCI moves, or None if it can't be converted losslessly"""
+    try:
+        moves = json.loads(moves_json)
+        if not isinstance(moves, list):
+            return None
+        return models.GameHistory.encode_moves(moves)
+    except (TypeError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    # python migrations.py [compact-moves]: upgrade the schema, optionally converting stored games
+    import sys
+    from database import db
+    from main import app
+
+    logging.basicConfig(level=logging.INFO)
+    with app.app_context():
+        upgrade_schema(db.engine)
+        if "compact-moves" in sys.argv[1:]:
+            compact_stored_moves(db.engine)
+            if db.engine.dialect.name == "sqlite":
+                # Give the freed pages back to the filesystem
+                with db.engine.connect() as connection:
+                    connection.execute(text("VACUUM"))
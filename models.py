@@ -1,7 +1,13 @@
 from datetime import datetime
 import json
 import os
+import numpy as np
 from database import db
+from sqlalchemy import update
+from chess_engine import encode_move, decode_move
+
+# Store new games' moves as 16-bit codes in moves_blob instead of JSON (COMPACT_MOVES=1)
+COMPACT_MOVES = os.environ.get("COMPACT_MOVES", "0") == "1"
 
 class GameHistory(db.Model):
     """Model to represent a chess game played by the AI or a user"""
@@ -9,28 +15,138 @@ class GameHistory(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.String(36), unique=True, nullable=False)  # UUID
-    moves = db.Column(db.Text, nullable=False)  # Stores moves in UCI format as JSON string
-    result = db.Column(db.String(10), nullable=False)  # "1-0" (white wins), "0-1" (black wins), "1/2-1/2" (draw)
+    moves = db.Column(db.Text, nullable=False)  # Stores moves in UCI format as JSON string ("" when moves_blob is set)
+    moves_blob = db.Column(db.LargeBinary, nullable=True)  # Compact moves: one little-endian 16-bit code per move
+    move_count = db.Column(db.Integer, nullable=False, default=0)  # Number of moves, kept in sync by set_moves_list
+    result = db.Column(db.String(10), nullable=False, index=True)  # "1-0" (white wins), "0-1" (black wins), "1/2-1/2" (draw)
     white_player = db.Column(db.String(50), nullable=False, default="AI")  # Player name or "AI"
     black_player = db.Column(db.String(50), nullable=False, default="AI")  # Player name or "AI"
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     fen_position = db.Column(db.String(100), nullable=True)  # Final position in FEN format
-    game_type = db.Column(db.String(20), nullable=False, default="self-play")  # "self-play", "user-vs-ai", etc.
+    game_type = db.Column(db.String(20), nullable=False, default="self-play", index=True)  # "self-play", "user-vs-ai", etc.
     evaluation = db.Column(db.Float, nullable=True)  # Final position evaluation
     
     def __repr__(self):
         return f"<GameHistory {self.game_id}: {self.result}>"
         
-    def get_moves_list(self):
-        """Returns the moves as a Python list"""
+    @staticmethod
+    def parse_moves(moves_json):
+        """Returns a stored JSON moves string as a Python list"""
         try:
-            return json.loads(self.moves)
+            return json.loads(moves_json)
         except:
             return []
             
-    def set_moves_list(self, moves_list):
-        """Sets the moves from a Python list"""
-        self.moves = json.dumps(moves_list)
+    @staticmethod
+    def encode_moves(moves_list):
+        """Packs UCI moves (or chess.Move objects) into bytes, 16 bits per move (see chess_engine.encode_move)"""
+        return np.array([encode_move(move) for move in moves_list], dtype="<u2").tobytes()
+        
+    @staticmethod
+    def decode_moves(moves_blob):
+        """Unpacks bytes from encode_moves into a list of chess.Move objects"""
+        return [decode_move(code) for code in np.frombuffer(moves_blob, dtype="<u2").tolist()]
+        
+    @classmethod
+    def stored_moves(cls, moves_json, moves_blob):
+        """Returns the moves of a row as chess.Move objects (compact rows) or UCI strings (legacy JSON rows)"""
+        if moves_blob is not None:
+            return cls.decode_moves(moves_blob)
+        return cls.parse_moves(moves_json)
+            
+    def get_moves_list(self):
+        """Returns the moves as a Python list of UCI strings"""
+        if self.moves_blob is not None:
+            return [move.uci() for move in self.decode_moves(self.moves_blob)]
+        return self.parse_moves(self.moves)
+            
+    def set_moves_list(self, moves_list, compact=None):
+        """Sets the moves from a Python list, packed into moves_blob if compact (default: COMPACT_MOVES)"""
+        for column, value in self.moves_columns(moves_list, compact).items():
+            setattr(self, column, value)
+            
+    @classmethod
+    def moves_columns(cls, moves_list, compact=None):
+        """Returns the moves, moves_blob and move_count column values for a list of moves"""
+        if COMPACT_MOVES if compact is None else compact:
+            return {"moves": "", "moves_blob": cls.encode_moves(moves_list), "move_count": len(moves_list)}
+        return {"moves": json.dumps(moves_list), "moves_blob": None, "move_count": len(moves_list)}
+        
+    @classmethod
+    def iter_move_records(cls, after_id=0, chunk_size=500):
+        """Stream (id, moves, result) for games with id > after_id in id order
+        
+        Reads only those columns, chunk_size rows per query, paging on the primary
+        key (keyset pagination) so memory use doesn't grow with the table. Moves
+        are chess.Move objects for compact rows, so they skip JSON and UCI parsing,
+        and UCI strings for legacy JSON rows.
+        """
+        while True:
+            rows = db.session.query(cls.id, cls.moves, cls.moves_blob, cls.result).filter(
+                cls.id > after_id
+            ).order_by(cls.id).limit(chunk_size).all()
+            if not rows:
+                return
+            for game_id, moves_json, moves_blob, result in rows:
+                yield game_id, cls.stored_moves(moves_json, moves_blob), result
+            after_id = rows[-1][0]
+        
+class GameCounters(db.Model):
+    """Running totals over game_history so stats reads don't aggregate the whole table
+    
+    A single row (ROW_ID), created and backfilled by migrations.upgrade_schema and
+    incremented by record_games in the same transaction as every game insert.
+    """
+    __tablename__ = 'game_counters'
+    
+    ROW_ID = 1
+    
+    id = db.Column(db.Integer, primary_key=True)
+    total_games = db.Column(db.Integer, nullable=False, default=0)
+    white_wins = db.Column(db.Integer, nullable=False, default=0)
+    black_wins = db.Column(db.Integer, nullable=False, default=0)
+    draws = db.Column(db.Integer, nullable=False, default=0)  # Every non-decisive result
+    total_moves = db.Column(db.BigInteger, nullable=False, default=0)
+    total_evaluation = db.Column(db.Float, nullable=False, default=0.0)
+    evaluated_games = db.Column(db.Integer, nullable=False, default=0)  # Games with a non-null evaluation
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<GameCounters games={self.total_games}>"
+        
+    @classmethod
+    def record_games(cls, session, games):
+        """Add games, given as (result, move count, evaluation) tuples, to the counters
+        
+        Runs one UPDATE on the caller's session or connection, so the counters
+        commit or roll back together with the inserted games.
+        """
+        increments = dict(total_games=0, white_wins=0, black_wins=0, draws=0,
+                          total_moves=0, total_evaluation=0.0, evaluated_games=0)
+        for result, move_count, evaluation in games:
+            increments["total_games"] += 1
+            if result == "1-0":
+                increments["white_wins"] += 1
+            elif result == "0-1":
+                increments["black_wins"] += 1
+            else:
+                increments["draws"] += 1
+            increments["total_moves"] += move_count or 0
+            if evaluation is not None:
+                increments["total_evaluation"] += evaluation
+                increments["evaluated_games"] += 1
+        if not increments["total_games"]:
+            return
+        
+        table = cls.__table__
+        values = {name: table.c[name] + amount for name, amount in increments.items()}
+        values["updated_at"] = datetime.utcnow()
+        session.execute(update(table).where(table.c.id == cls.ROW_ID).values(**values))
+        
+    @classmethod
+    def current(cls):
+        """Return the counters row, or None before the migration has created it"""
+        return db.session.get(cls, cls.ROW_ID)
         
 class TrainingStats(db.Model):
     """Model to track AI training statistics"""
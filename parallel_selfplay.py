@@ -0,0 +1,205 @@
+import logging
+import multiprocessing
+import os
+import random
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# How worker results are folded into the main agent:
+#   "replay"  - store the workers' transitions and replay TD updates over them in order
+#   "average" - store the transitions and average the workers' values with the main table
+MERGE_MODES = ("replay", "average")
+
+# Keep each worker's BLAS single-threaded so N processes use N cores, not N * cores threads
+BLAS_THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+# Agent owned by a worker process, built once from the snapshot by _init_worker
+_worker_agent = None
+
+
+def agent_snapshot(agent):
+    """Picklable copy of the state a worker needs to play like agent"""
+    keys, values = agent.board_values.items()
+    return {
+        "table_keys": keys,
+        "table_values": values,
+        "network_weights": [weight.copy() for weight in agent.network.weights],
+        "network_biases": [bias.copy() for bias in agent.network.biases],
+        "alpha": agent.alpha,
+        "gamma": agent.gamma,
+        "epsilon_decay": agent.epsilon_decay,
+        "epsilon_min": agent.epsilon_min
+    }
+
+
+def _init_worker(snapshot):
+    """Process pool initializer: build this worker's agent from the snapshot"""
+    global _worker_agent
+    from dqn_agent import DQNAgent
+
+    agent = DQNAgent(max_table_entries=None)
+    agent.board_values.set_many(snapshot["table_keys"], snapshot["table_values"])
+    for target, source in zip(agent.network.weights, snapshot["network_weights"]):
+        target[...] = source
+    for target, source in zip(agent.network.biases, snapshot["network_biases"]):
+        target[...] = source
+    agent.alpha = snapshot["alpha"]
+    agent.gamma = snapshot["gamma"]
+    agent.epsilon_decay = snapshot["epsilon_decay"]
+    agent.epsilon_min = snapshot["epsilon_min"]
+    _worker_agent = agent
+
+
+@contextmanager
+def _worker_environment():
+    """Set the unset BLAS_THREAD_VARIABLES to 1 while worker processes start, then unset them again
+
+    Spawned workers copy the environment when they start and NumPy reads these
+    variables when it is imported, before a pool initializer could set them, so
+    they are set around the submits that start the workers rather than left set
+    in the server process.
+    """
+    added = [variable for variable in BLAS_THREAD_VARIABLES if variable not in os.environ]
+    for variable in added:
+        os.environ[variable] = "1"
+    try:
+        yield
+    finally:
+        for variable in added:
+            os.environ.pop(variable, None)
+
+
+def _play_games(num_games, seed, epsilon):
+    """Worker task: play num_games self-play games and return their results and transitions
+
+    The worker keeps learning locally between games. It returns the games, the
+    transitions they produced (with packed state features) and the worker's
+    current values for every position those transitions touched.
+    """
+    agent = _worker_agent
+    random.seed(seed)
+    agent.memory.rng = np.random.default_rng(seed)
+    agent.epsilon = epsilon
+
+    games = []
+    for _ in range(num_games):
+        game_data = agent.play_training_game()
+        games.append((game_data["result"], game_data["moves_list"], game_data["moves"], game_data["reward"]))
+
+    # play_training_game stores one transition per move
+    memory = agent.memory
+    slots = memory.recent_slots(sum(game[2] for game in games))
+    transitions = memory.batch(slots)
+    keys = np.unique(np.concatenate([transitions[0], transitions[3]]))
+    return {
+        "games": games,
+        "transitions": transitions,
+        "features": memory.features(slots),
+        "keys": keys,
+        "values": agent.board_values.get_many(keys)
+    }
+
+
+def merge_worker_result(agent, result, merge="replay"):
+    """Fold one worker result into agent and return the training data of its games"""
+    keys, worker_values = result["keys"], result["values"]
+    current = agent.board_values.get_many(keys)
+    unseen = np.isnan(current)
+
+    if merge == "average":
+        agent.memory.extend(*result["transitions"], features=result["features"])
+        merged = np.where(unseen, worker_values, (current + worker_values) / 2)
+        agent.board_values.set_many(keys, merged)
+    else:
+        # Positions new to the main table start from the worker's value, then the
+        # transitions are replayed through the regular TD update
+        agent.board_values.set_many(keys[unseen], worker_values[unseen])
+        agent.learn_from_transitions(result["transitions"], result["features"])
+
+    training_data = []
+    for result_string, game_moves, move_count, game_reward in result["games"]:
+        # Decay epsilon as if the moves had been played here
+        if agent.epsilon > agent.epsilon_min:
+            agent.epsilon = max(agent.epsilon_min, agent.epsilon * agent.epsilon_decay ** move_count)
+        training_data.append(agent.record_game_result(result_string, game_moves, move_count, game_reward))
+    return training_data
+
+
+def parallel_self_play(agent, num_games, workers, merge="replay", progress_callback=None, should_stop=None,
+                       games_per_task=1):
+    """Play num_games self-play games across a pool of worker processes
+
+    Every worker starts from a snapshot of agent's value table and network and
+    plays with its own random seed. Finished tasks are merged into agent as they
+    arrive, and each new task starts from the main agent's current epsilon.
+
+    Args:
+        agent: DQNAgent that receives the merged results
+        num_games: Number of games to play
+        workers: Number of worker processes
+        merge: "replay" or "average" (see MERGE_MODES)
+        progress_callback: Called with each merged game's training data
+        should_stop: Checked after each merged task; returning True stops submitting games
+        games_per_task: Games a worker plays before reporting back
+
+    Returns:
+        List of per-game training data, in the order the games were merged
+    """
+    if merge not in MERGE_MODES:
+        raise ValueError(f"Unknown merge mode: {merge}")
+
+    with agent.lock:
+        snapshot = agent_snapshot(agent)
+
+    # Spawned workers don't inherit the server's threads or locks
+    context = multiprocessing.get_context("spawn")
+    base_seed = random.randrange(2 ** 31)
+    training_data = []
+    submitted = 0
+    stopping = False
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(snapshot,)) as pool:
+        pending = set()
+
+        def submit():
+            nonlocal submitted
+            count = min(games_per_task, num_games - submitted)
+            # The pool starts a worker process on submit when none is idle
+            with _worker_environment():
+                pending.add(pool.submit(_play_games, count, base_seed + submitted, agent.epsilon))
+            submitted += count
+
+        # Keep two tasks per worker in flight so no worker idles while results are merged
+        while submitted < num_games and len(pending) < workers * 2:
+            submit()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Self-play worker failed: {e}")
+                    continue
+                with agent.lock:
+                    games = merge_worker_result(agent, result, merge)
+                for game_data in games:
+                    training_data.append(game_data)
+                    if progress_callback is not None:
+                        progress_callback(game_data)
+
+            if not stopping and should_stop is not None and should_stop():
+                logger.info(f"Parallel self-play stopping after {len(training_data)} of {num_games} games")
+                stopping = True
+                for future in pending:
+                    future.cancel()
+            while not stopping and submitted < num_games and len(pending) < workers * 2:
+                submit()
+
+    return training_data
@@ -0,0 +1,74 @@
+import logging
+import uuid
+from sqlalchemy import insert
+import models
+
+logger = logging.getLogger(__name__)
+
+
+def game_rows(training_results, game_type="self-play"):
+    """Build game_history rows for the per-game training data returned by self-play"""
+    rows = []
+    for game_data in training_results:
+        row = {
+            "game_id": str(uuid.uuid4()),
+            "result": game_data["result"],
+            "white_player": "AI",
+            "black_player": "AI",
+            "game_type": game_type,
+            "evaluation": game_data.get("reward", 0)
+        }
+        row.update(models.GameHistory.moves_columns(game_data.get("moves_list", [])))
+        rows.append(row)
+    return rows
+
+
+def training_stats_row(agent, training_results, session_id):
+    """Build the training_stats summary row of one self-play session"""
+    total_games = len(training_results)
+    return {
+        "training_session": session_id,
+        "total_games": total_games,
+        "white_wins": sum(1 for game in training_results if game["result"] == "1-0"),
+        "black_wins": sum(1 for game in training_results if game["result"] == "0-1"),
+        "draws": sum(1 for game in training_results if game["result"] == "1/2-1/2"),
+        "avg_game_length": sum(game["moves"] for game in training_results) / max(1, total_games),
+        "avg_reward": sum(game["reward"] for game in training_results) / max(1, total_games),
+        "epsilon": agent.epsilon,
+        "alpha": agent.alpha,
+        "gamma": agent.gamma,
+        "positions_evaluated": agent.position_count
+    }
+
+
+def save_self_play_results(engine, agent, training_results, session_id=None):
+    """Persist a self-play session: its games, its TrainingStats summary and the game counters
+
+    Everything is written in one transaction with batched Core inserts (one
+    executemany for all games), so each game is stored exactly once and a
+    failed write leaves nothing behind.
+
+    Returns:
+        The game_history ids of the stored games, in training_results order
+    """
+    session_id = session_id or str(uuid.uuid4())
+    rows = game_rows(training_results)
+    games = models.GameHistory.__table__
+
+    with engine.begin() as connection:
+        game_ids = []
+        if rows:
+            inserted = connection.execute(
+                insert(games).returning(games.c.id, sort_by_parameter_order=True), rows
+            )
+            game_ids = [row_id for (row_id,) in inserted]
+        connection.execute(
+            insert(models.TrainingStats.__table__),
+            [training_stats_row(agent, training_results, session_id)]
+        )
+        models.GameCounters.record_games(
+            connection, ((row["result"], row["move_count"], row["evaluation"]) for row in rows)
+        )
+
+    logger.info(f"Saved training session {session_id} with {len(game_ids)} games")
+    return game_ids
@@ -0,0 +1,262 @@
+import numpy as np
+from board_encoder import NUM_PLANES, NUM_EXTRA_FEATURES
+
+
+class ReplayBuffer:
+    """Experience replay buffer backed by preallocated NumPy ring arrays
+
+    Each transition is stored as (state key, move code, reward, next-state key,
+    done flag): 8 + 2 + 4 + 8 + 1 bytes regardless of maxlen, so capacity can be
+    raised to millions of transitions at a fixed, known memory cost. Sampling
+    draws indices directly into the ring without copying the buffer.
+
+    With store_features=True the packed state (12 bitboards and the extra
+    features, 160 bytes) is kept as well, so replay batches can train the
+    value network without re-encoding positions.
+    """
+
+    def __init__(self, maxlen=5000, seed=None, store_features=False):
+        self.maxlen = maxlen
+        self.store_features = store_features
+        self.states = np.zeros(maxlen, dtype=np.uint64)
+        self.moves = np.zeros(maxlen, dtype=np.uint16)
+        self.rewards = np.zeros(maxlen, dtype=np.float32)
+        self.next_states = np.zeros(maxlen, dtype=np.uint64)
+        self.dones = np.zeros(maxlen, dtype=bool)
+        if store_features:
+            self.state_masks = np.zeros((maxlen, NUM_PLANES), dtype=np.uint64)
+            self.state_extras = np.zeros((maxlen, NUM_EXTRA_FEATURES), dtype=np.float32)
+        self.position = 0  # Next slot to write
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, state, move, reward, next_state, done=False, features=None):
+        """Store one transition, overwriting the oldest one when the buffer is full
+
+        features is the packed (masks, extras) pair of the state, kept only when
+        the buffer stores features.
+        """
+        slot = self.position
+        self.states[slot] = state
+        self.moves[slot] = move
+        self.rewards[slot] = reward
+        self.next_states[slot] = next_state
+        self.dones[slot] = done
+        if self.store_features:
+            if features is None:
+                self.state_masks[slot] = 0
+                self.state_extras[slot] = 0
+            else:
+                self.state_masks[slot], self.state_extras[slot] = features
+        self.position = (slot + 1) % self.maxlen
+        self.size = min(self.size + 1, self.maxlen)
+        return slot
+
+    def extend(self, states, moves, rewards, next_states, dones, features=None):
+        """Append arrays of transitions in order (oldest first), with optional (masks, extras) arrays"""
+        count = len(states)
+        if count > self.maxlen:
+            states, moves, rewards, next_states, dones = (
+                array[-self.maxlen:] for array in (states, moves, rewards, next_states, dones)
+            )
+            if features is not None:
+                features = tuple(array[-self.maxlen:] for array in features)
+            count = self.maxlen
+        slots = (self.position + np.arange(count)) % self.maxlen
+        self.states[slots] = states
+        self.moves[slots] = moves
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.dones[slots] = dones
+        if self.store_features:
+            if features is None:
+                self.state_masks[slots] = 0
+                self.state_extras[slots] = 0
+            else:
+                self.state_masks[slots], self.state_extras[slots] = features
+        self.position = (self.position + count) % self.maxlen
+        self.size = min(self.size + count, self.maxlen)
+        return slots
+
+    def transitions(self):
+        """Return every stored transition as arrays in logical order (oldest first)"""
+        return self.batch(self._physical(np.arange(self.size)))
+
+    def features(self, indices):
+        """Gather the packed (masks, extras) states for ring slots, or None if features are not stored"""
+        if not self.store_features:
+            return None
+        return self.state_masks[indices], self.state_extras[indices]
+
+    def transition_features(self):
+        """Return the packed states of every transition in logical order, or None if not stored"""
+        return self.features(self._physical(np.arange(self.size)))
+
+    def recent_slots(self, count):
+        """Ring slots of the newest count transitions (at most the whole buffer), oldest first"""
+        count = min(count, self.size)
+        return self._physical(np.arange(self.size - count, self.size))
+
+    def clear(self):
+        """Forget every stored transition"""
+        self.position = 0
+        self.size = 0
+
+    def _physical(self, logical):
+        """Map logical indices (0 = oldest transition) to ring slots"""
+        return (self.position - self.size + logical) % self.maxlen
+
+    def sample_indices(self, batch_size, recent_fraction=0.3, recent_ratio=0.7):
+        """Draw ring slots for a mini-batch in O(batch_size)
+
+        When the buffer holds more than twice the batch size, recent_ratio of the
+        batch comes from the newest recent_fraction of transitions and the rest
+        from the older ones; recent_ratio=None samples uniformly. Indices are
+        drawn with replacement, so a transition can appear more than once.
+        """
+        batch_size = min(batch_size, self.size)
+        if batch_size == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        if recent_ratio is not None and self.size > batch_size * 2:
+            recent_count = max(1, int(self.size * recent_fraction))
+            recent_batch_size = int(batch_size * recent_ratio)
+            old_batch_size = batch_size - recent_batch_size
+            old_count = self.size - recent_count
+            logical = np.concatenate([
+                self.rng.integers(old_count, self.size, recent_batch_size),
+                self.rng.integers(0, old_count, old_batch_size)
+            ])
+        else:
+            logical = self.rng.integers(0, self.size, batch_size)
+        return self._physical(logical)
+
+    def batch(self, indices):
+        """Gather (states, moves, rewards, next_states, dones) arrays for ring slots"""
+        return (self.states[indices], self.moves[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices])
+
+    def sample_with_weights(self, batch_size, recent_fraction=0.3, recent_ratio=0.7):
+        """Return (ring slots, importance-sampling weights); uniform sampling uses unit weights"""
+        indices = self.sample_indices(batch_size, recent_fraction, recent_ratio)
+        return indices, np.ones(len(indices), dtype=np.float32)
+
+    def update_priorities(self, indices, td_errors):
+        """Uniform replay ignores TD errors"""
+
+
+class SumTree:
+    """Binary tree whose internal nodes hold the sum of their children's priorities
+
+    Leaves live at [capacity, 2 * capacity) of a flat array. Updates and
+    prefix-sum lookups touch one node per level, and both are vectorized over a
+    whole batch, so sampling and reprioritizing a batch cost O(batch * log n).
+    """
+
+    def __init__(self, size):
+        self.capacity = 1
+        while self.capacity < size:
+            self.capacity <<= 1
+        self.tree = np.zeros(2 * self.capacity, dtype=np.float64)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        """Return the priorities stored at leaf indices"""
+        return self.tree[np.asarray(indices) + self.capacity]
+
+    def update(self, indices, priorities):
+        """Set leaf priorities and refresh the sums on the path to the root"""
+        nodes = np.asarray(indices, dtype=np.int64) + self.capacity
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes >> 1)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes >> 1)
+
+    def find(self, values):
+        """Return the leaf indices whose cumulative priority ranges contain values"""
+        values = np.asarray(values, dtype=np.float64).copy()
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.capacity:
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.capacity
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Proportional prioritized experience replay
+
+    Transitions are sampled with probability proportional to (|TD error| + eps) ** alpha
+    using a sum tree, and each sample carries an importance-sampling weight
+    (N * P(i)) ** -beta, normalized by the batch maximum, to correct the bias.
+    beta is annealed towards 1 as training proceeds. New transitions get the
+    current maximum priority so they are replayed at least once.
+    """
+
+    def __init__(self, maxlen=5000, alpha=0.6, beta=0.4, beta_increment=0.001, epsilon=1e-3, seed=None,
+                 store_features=False):
+        super().__init__(maxlen, seed, store_features)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.tree = SumTree(maxlen)
+        self.max_priority = 1.0
+
+    def append(self, state, move, reward, next_state, done=False, features=None):
+        """Store one transition with the current maximum priority"""
+        slot = super().append(state, move, reward, next_state, done, features)
+        self.tree.update([slot], [self.max_priority])
+        return slot
+
+    def extend(self, states, moves, rewards, next_states, dones, features=None):
+        """Append arrays of transitions, all with the current maximum priority"""
+        slots = super().extend(states, moves, rewards, next_states, dones, features)
+        if len(slots):
+            self.tree.update(slots, np.full(len(slots), self.max_priority))
+        return slots
+
+    def clear(self):
+        """Forget every stored transition and priority"""
+        super().clear()
+        self.tree = SumTree(self.maxlen)
+        self.max_priority = 1.0
+
+    def sample_indices(self, batch_size, recent_fraction=0.3, recent_ratio=0.7):
+        """Draw ring slots proportionally to priority (the recency split does not apply)"""
+        return self.sample_with_weights(batch_size)[0]
+
+    def sample_with_weights(self, batch_size, recent_fraction=0.3, recent_ratio=0.7):
+        """Return (ring slots, importance-sampling weights) using stratified proportional sampling"""
+        batch_size = min(batch_size, self.size)
+        if batch_size == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # One uniform draw per equal-mass segment of the cumulative priority
+        total = self.tree.total
+        segment = total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        indices = self.tree.find(np.minimum(values, np.nextafter(total, 0)))
+
+        probabilities = self.tree.get(indices) / total
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return indices, weights.astype(np.float32)
+
+    def update_priorities(self, indices, td_errors):
+        """Reprioritize sampled transitions from their latest TD errors"""
+        priorities = (np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
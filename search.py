@@ -0,0 +1,278 @@
+import time
+import chess
+import numpy as np
+from chess_engine import encode_move, decode_move
+
+# Scores are in the agent's value units (pawns); mates dominate every material score
+MATE_SCORE = 1000.0
+MATE_THRESHOLD = MATE_SCORE - 500
+
+# Transposition table bound types
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Piece values for MVV-LVA ordering (most valuable victim, least valuable attacker)
+ORDERING_VALUES = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 20}
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the move time budget is exhausted"""
+
+
+class TranspositionTable:
+    """Fixed-size transposition table keyed by Zobrist hash
+
+    Entries live in preallocated NumPy arrays indexed by the low bits of the
+    hash, so memory use never grows. A slot is replaced when the new entry was
+    searched at least as deep or belongs to a different position.
+    """
+
+    def __init__(self, size=1 << 20):
+        capacity = 1
+        while capacity < size:
+            capacity <<= 1
+        self.mask = capacity - 1
+        self.keys = np.zeros(capacity, dtype=np.uint64)
+        self.depths = np.full(capacity, -1, dtype=np.int8)
+        self.scores = np.zeros(capacity, dtype=np.float32)
+        self.flags = np.zeros(capacity, dtype=np.int8)
+        self.moves = np.zeros(capacity, dtype=np.uint16)
+
+    def probe(self, key):
+        """Return (depth, score, flag, move code) for key, or None on a miss"""
+        slot = key & self.mask
+        if self.depths[slot] < 0 or int(self.keys[slot]) != key:
+            return None
+        return int(self.depths[slot]), float(self.scores[slot]), int(self.flags[slot]), int(self.moves[slot])
+
+    def store(self, key, depth, score, flag, move_code):
+        """Record a search result for key"""
+        slot = key & self.mask
+        if int(self.keys[slot]) == key and self.depths[slot] > depth:
+            return
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.scores[slot] = score
+        self.flags[slot] = flag
+        self.moves[slot] = move_code
+
+    def clear(self):
+        """Forget every stored entry"""
+        self.depths[:] = -1
+
+
+class AlphaBetaSearch:
+    """Negamax alpha-beta search with iterative deepening
+
+    Moves are ordered by the transposition table move first, then captures by
+    MVV-LVA, then quiet moves. Leaves are resolved with a quiescence search over
+    captures. The search runs until the depth limit is reached or the move
+    time budget runs out, and returns the best move of the deepest completed
+    iteration.
+
+    Positions are explored with make/unmake on an IncrementalEvaluator, which
+    keeps the Zobrist key and static score up to date without copying boards.
+
+    Args:
+        evaluate: Callable (evaluator) -> score from white's perspective
+        transposition_table: TranspositionTable shared across searches
+    """
+
+    MAX_QUIESCENCE_PLY = 8
+    TIME_CHECK_INTERVAL = 256
+
+    def __init__(self, evaluate, transposition_table):
+        self.evaluate = evaluate
+        self.tt = transposition_table
+        self.nodes = 0
+        self.deadline = None
+
+    def search(self, evaluator, depth=None, movetime_ms=None, max_depth=64):
+        """Search the evaluator's position and return a dict with the best move, score and statistics
+
+        The score is from the side to move's perspective. At least one legal
+        move must exist. The evaluator's board is left as it was passed in.
+        """
+        start = time.monotonic()
+        self.nodes = 0
+        self.deadline = start + movetime_ms / 1000.0 if movetime_ms else None
+        depth_limit = min(depth or max_depth, max_depth)
+
+        best_move, best_score, completed_depth = None, 0.0, 0
+        for current_depth in range(1, depth_limit + 1):
+            try:
+                move, score = self._search_root(evaluator, current_depth, best_move)
+            except SearchTimeout:
+                break
+            best_move, best_score, completed_depth = move, score, current_depth
+            if abs(score) >= MATE_THRESHOLD or self._out_of_time():
+                break
+
+        if best_move is None:
+            # Not even depth 1 finished: fall back to the best-ordered move
+            best_move = self._ordered_moves(evaluator.board, None)[0]
+
+        return {
+            "move": best_move,
+            "score": best_score,
+            "depth": completed_depth,
+            "nodes": self.nodes,
+            "time_ms": (time.monotonic() - start) * 1000
+        }
+
+    def _out_of_time(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _check_time(self):
+        self.nodes += 1
+        if self.nodes % self.TIME_CHECK_INTERVAL == 0 and self._out_of_time():
+            raise SearchTimeout()
+
+    def _static_score(self, evaluator):
+        """Evaluation from the side to move's perspective"""
+        score = self.evaluate(evaluator)
+        return score if evaluator.board.turn == chess.WHITE else -score
+
+    def _search_root(self, evaluator, depth, previous_best):
+        """Search every root move at depth, trying the previous iteration's best move first"""
+        alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+        best_move, best_score = None, -MATE_SCORE - 1
+        for move in self._ordered_moves(evaluator.board, previous_best):
+            evaluator.push(move)
+            try:
+                score = -self._negamax(evaluator, depth - 1, -beta, -alpha, 1)
+            finally:
+                evaluator.pop()
+            if score > best_score:
+                best_move, best_score = move, score
+            alpha = max(alpha, score)
+        self.tt.store(evaluator.zobrist_key, depth, best_score, EXACT, encode_move(best_move))
+        return best_move, best_score
+
+    def _negamax(self, evaluator, depth, alpha, beta, ply):
+        self._check_time()
+        board = evaluator.board
+
+        if board.is_repetition(2) or board.is_fifty_moves() or board.is_insufficient_material():
+            return 0.0
+
+        key = evaluator.zobrist_key
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, flag, move_code = entry
+            tt_move = decode_move(move_code)
+            if entry_depth >= depth:
+                score = self._score_from_tt(entry_score, ply)
+                if flag == EXACT:
+                    return score
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                elif flag == UPPER_BOUND:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        if depth <= 0:
+            return self._quiescence(evaluator, alpha, beta, ply, 0)
+
+        moves = self._ordered_moves(board, tt_move)
+        if not moves:
+            return -MATE_SCORE + ply if board.is_check() else 0.0
+
+        original_alpha = alpha
+        best_score, best_move = -MATE_SCORE - 1, moves[0]
+        for move in moves:
+            evaluator.push(move)
+            try:
+                score = -self._negamax(evaluator, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                evaluator.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, self._score_to_tt(best_score, ply), flag, encode_move(best_move))
+        return best_score
+
+    def _quiescence(self, evaluator, alpha, beta, ply, qply):
+        """Extend the search over captures until the position is quiet"""
+        self._check_time()
+        board = evaluator.board
+
+        if board.is_check():
+            if not any(board.generate_legal_moves()):
+                return -MATE_SCORE + ply
+        elif not any(board.generate_legal_moves()):
+            return 0.0
+
+        stand_pat = self._static_score(evaluator)
+        if stand_pat >= beta or qply >= self.MAX_QUIESCENCE_PLY:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        for move in self._ordered_captures(board):
+            evaluator.push(move)
+            try:
+                score = -self._quiescence(evaluator, -beta, -alpha, ply + 1, qply + 1)
+            finally:
+                evaluator.pop()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    @staticmethod
+    def _mvv_lva(board, move):
+        """Ordering score for a capture: victim value first, cheaper attacker breaks ties"""
+        if board.is_en_passant(move):
+            victim = chess.PAWN
+        else:
+            victim = board.piece_type_at(move.to_square)
+        attacker = board.piece_type_at(move.from_square)
+        return ORDERING_VALUES[victim] * 10 - ORDERING_VALUES[attacker]
+
+    def _ordered_captures(self, board):
+        captures = list(board.generate_legal_captures())
+        captures.sort(key=lambda move: self._mvv_lva(board, move), reverse=True)
+        return captures
+
+    def _ordered_moves(self, board, tt_move):
+        """Legal moves with the TT move first, then captures by MVV-LVA, then promotions, then quiet moves"""
+        scored = []
+        for move in board.legal_moves:
+            if move == tt_move:
+                score = 10000
+            elif board.is_capture(move):
+                score = 1000 + self._mvv_lva(board, move)
+            elif move.promotion:
+                score = 900 + move.promotion
+            else:
+                score = 0
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    @staticmethod
+    def _score_to_tt(score, ply):
+        """Store mate scores relative to the node rather than the root"""
+        if score >= MATE_THRESHOLD:
+            return score + ply
+        if score <= -MATE_THRESHOLD:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_tt(score, ply):
+        if score >= MATE_THRESHOLD:
+            return score - ply
+        if score <= -MATE_THRESHOLD:
+            return score + ply
+        return score
@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Agent counters written to meta.json and restored as plain attributes
+COUNTER_FIELDS = (
+    "epsilon", "wins", "losses", "draws", "total_games", "train_count",
+    "position_count", "model_version", "last_ingested_game_id"
+)
+
+# Replay buffer arrays, saved in logical order (oldest transition first)
+REPLAY_ARRAYS = ("replay_states", "replay_moves", "replay_rewards", "replay_next_states", "replay_dones")
+
+
+def capture_agent_state(agent):
+    """Copy the agent state a snapshot stores: (dict of name -> array, metadata dict)
+
+    Call with the agent lock held; the returned copies can be written without it.
+    """
+    table_keys, table_values = agent.board_values.items()
+    arrays = {"table_keys": table_keys, "table_values": table_values}
+    for name, array in zip(REPLAY_ARRAYS, agent.memory.transitions()):
+        arrays[name] = array
+    features = agent.memory.transition_features()
+    if features is not None:
+        arrays["replay_masks"], arrays["replay_extras"] = features
+    for i, (weight, bias) in enumerate(zip(agent.network.weights, agent.network.biases)):
+        arrays[f"network_weight_{i}"] = weight.copy()
+        arrays[f"network_bias_{i}"] = bias.copy()
+
+    meta = {field: getattr(agent, field) for field in COUNTER_FIELDS}
+    meta.update({
+        "format_version": SnapshotStore.FORMAT_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "ingested_game_ids": sorted(agent.ingested_game_ids),
+        "replay_mode": agent.replay_mode,
+        "network_layers": agent.network.layer_sizes,
+        "network_steps": agent.network.steps,
+        "table_entries": len(table_keys),
+        "replay_size": len(agent.memory)
+    })
+    return arrays, meta
+
+
+def restore_agent_state(agent, arrays, meta):
+    """Replace the agent's learned state with a captured one (call with the agent lock held)"""
+    agent.board_values.clear()
+    agent.board_values.set_many(arrays["table_keys"], arrays["table_values"])
+
+    agent.set_replay_mode(meta.get("replay_mode", agent.replay_mode))
+    agent.memory.clear()
+    features = None
+    if "replay_masks" in arrays:
+        features = (arrays["replay_masks"], arrays["replay_extras"])
+    if meta["replay_size"]:
+        agent.memory.extend(*(arrays[name] for name in REPLAY_ARRAYS), features=features)
+
+    # A snapshot taken with a different network shape keeps the current network
+    if meta["network_layers"] == agent.network.layer_sizes:
+        for i, (weight, bias) in enumerate(zip(agent.network.weights, agent.network.biases)):
+            weight[...] = arrays[f"network_weight_{i}"]
+            bias[...] = arrays[f"network_bias_{i}"]
+        agent.network.steps = meta["network_steps"]
+    else:
+        logger.warning(f"Snapshot network layers {meta['network_layers']} don't match "
+                       f"{agent.network.layer_sizes}; keeping the current network")
+
+    for field in COUNTER_FIELDS:
+        setattr(agent, field, meta[field])
+    agent.ingested_game_ids = set(meta["ingested_game_ids"])
+    agent.network_state_cache.clear()
+
+
+class SnapshotStore:
+    """Directory of agent snapshots used to warm-start the agent without replaying every stored game
+
+    Each snapshot is a subdirectory holding one .npy file per array (value table,
+    replay buffer, network parameters) and a meta.json with epsilon, counters and
+    the database ingestion mark. Snapshots are written to a temporary directory
+    and renamed into place, so a reader never sees a partial one. Only the newest
+    keep snapshots are retained.
+
+    Args:
+        directory: Where snapshots are stored (created if missing)
+        keep: Number of snapshots to retain, or None to retain all
+        interval_seconds: Minimum time between snapshots written by save_if_due
+    """
+
+    FORMAT_VERSION = 1
+    PREFIX = "snapshot-"
+
+    def __init__(self, directory, keep=3, interval_seconds=300):
+        self.directory = directory
+        self.keep = keep
+        self.interval_seconds = interval_seconds
+        self.last_saved = None  # time.monotonic() of the last snapshot written by this process
+        os.makedirs(directory, exist_ok=True)
+
+    def list(self):
+        """Return the names of complete snapshots, newest first"""
+        names = [
+            name for name in os.listdir(self.directory)
+            if name.startswith(self.PREFIX) and os.path.exists(os.path.join(self.directory, name, "meta.json"))
+        ]
+        return sorted(names, reverse=True)
+
+    def latest(self):
+        """Return the name of the newest snapshot, or None"""
+        names = self.list()
+        return names[0] if names else None
+
+    def _new_name(self):
+        """Name for the next snapshot; names must sort oldest to newest"""
+        # Timestamp first so names sort by age; the pid keeps concurrent workers apart
+        return f"{self.PREFIX}{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}"
+
+    def save(self, agent, metadata=None):
+        """Write a snapshot of agent and return its name
+
+        The agent lock is held only while the state is copied, not while it is
+        written. metadata is merged into the snapshot's meta.json.
+        """
+        with agent.lock:
+            arrays, meta = capture_agent_state(agent)
+        meta.update(metadata or {})
+
+        name = self._new_name()
+        temporary = os.path.join(self.directory, f".tmp-{name}")
+        os.makedirs(temporary)
+        try:
+            for array_name, array in arrays.items():
+                np.save(os.path.join(temporary, f"{array_name}.npy"), array)
+            with open(os.path.join(temporary, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            os.replace(temporary, os.path.join(self.directory, name))
+        except Exception:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+        self.last_saved = time.monotonic()
+        logger.info(f"Saved agent snapshot {name} ({meta['table_entries']} positions, "
+                    f"{meta['replay_size']} transitions)")
+        self.prune()
+        return name
+
+    def is_due(self):
+        """True if interval_seconds have passed since the last snapshot written by this process"""
+        return self.last_saved is None or time.monotonic() - self.last_saved >= self.interval_seconds
+
+    def save_if_due(self, agent):
+        """Write a snapshot if interval_seconds have passed since the last one; returns its name or None"""
+        if not self.is_due():
+            return None
+        return self.save(agent)
+
+    def read_meta(self, name):
+        """Return the meta.json contents of a snapshot"""
+        with open(os.path.join(self.directory, name, "meta.json")) as f:
+            return json.load(f)
+
+    def load(self, agent, name=None, mmap=True):
+        """Restore agent from a snapshot (the newest by default) and return its metadata
+
+        Arrays are memory-mapped when mmap is True, so they are read straight
+        from the page cache into the agent's own arrays. Returns None if there is
+        no snapshot or it was written in another format.
+        """
+        name = name or self.latest()
+        if name is None:
+            return None
+        path = os.path.join(self.directory, name)
+        meta = self.read_meta(name)
+        if meta.get("format_version") != self.FORMAT_VERSION:
+            logger.warning(f"Skipping snapshot {name} with format version {meta.get('format_version')}")
+            return None
+
+        arrays = {
+            file_name[:-len(".npy")]: np.load(os.path.join(path, file_name), mmap_mode="r" if mmap else None)
+            for file_name in os.listdir(path) if file_name.endswith(".npy")
+        }
+        with agent.lock:
+            restore_agent_state(agent, arrays, meta)
+        logger.info(f"Loaded agent snapshot {name} ({meta['table_entries']} positions, "
+                    f"{meta['replay_size']} transitions, games up to id {meta['last_ingested_game_id']})")
+        return meta
+
+    def prune(self):
+        """Delete snapshots beyond the newest keep (keep=None retains every snapshot)"""
+        if self.keep is None:
+            return
+        for name in self.list()[self.keep:]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
@@ -11,7 +11,11 @@ class DQNInterface {
         this.networkState = null;
         this.moveHistory = [];
         this.trainingInProgress = false;
+        this.trainingJobId = null;
         this.trainingStats = null;
+        // FEN -> legal move map and game state, so each ply is fetched once
+        this.positionCache = new Map();
+        this.positionCacheSize = 32;
     }
     
     /**
@@ -28,7 +32,7 @@ class DQNInterface {
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ fen })
+                body: JSON.stringify({ fen, include_network_states: true })
             });
             
             if (!response.ok) {
@@ -72,7 +76,7 @@ class DQNInterface {
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ fen })
+                body: JSON.stringify({ fen, include_network_states: true })
             });
             
             if (!response.ok) {
@@ -95,25 +99,73 @@ class DQNInterface {
     }
     
     /**
-     * Check the current game state
-     * @param {string} fen - The current board state in FEN notation
-     * @returns {Promise<Object>} - The game state data
+     * Evaluate many positions in one request
+     * @param {Object} positions - Either {fens: [...]} or {fen: startFen, moves: [uci, ...]}
+     * @returns {Promise<Array>} - Evaluations in order (for moves: the start position, then after each move)
      */
-    async checkGameState(fen) {
+    async evaluateBatch(positions) {
         try {
-            const response = await fetch('/api/check-game-state', {
+            const response = await fetch('/api/evaluate-batch', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ fen })
+                body: JSON.stringify(positions)
             });
             
             if (!response.ok) {
                 throw new Error(`Server returned ${response.status}: ${response.statusText}`);
             }
             
-            return await response.json();
+            const data = await response.json();
+            return data.evaluations;
+        } catch (error) {
+            console.error('Error evaluating positions:', error);
+            return null;
+        }
+    }
+    
+    /**
+     * Get every legal move and the game state of a position, fetched once per FEN
+     * @param {string} fen - The current board state in FEN notation
+     * @returns {Promise<Object>} - {moves: {fromSquare: [uci, ...]}, state, message, check, turn}
+     */
+    async getPosition(fen) {
+        const cached = this.positionCache.get(fen);
+        if (cached) {
+            return cached;
+        }
+        
+        const response = await fetch('/api/position-moves', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ fen })
+        });
+        
+        if (!response.ok) {
+            throw new Error(`Server returned ${response.status}: ${response.statusText}`);
+        }
+        
+        const position = await response.json();
+        this.positionCache.set(fen, position);
+        // Maps iterate in insertion order, so the first key is the oldest position
+        if (this.positionCache.size > this.positionCacheSize) {
+            this.positionCache.delete(this.positionCache.keys().next().value);
+        }
+        return position;
+    }
+    
+    /**
+     * Check the current game state
+     * @param {string} fen - The current board state in FEN notation
+     * @returns {Promise<Object>} - The game state data
+     */
+    async checkGameState(fen) {
+        try {
+            const position = await this.getPosition(fen);
+            return { state: position.state, message: position.message };
         } catch (error) {
             console.error('Error checking game state:', error);
             return null;
@@ -128,20 +180,8 @@ class DQNInterface {
      */
     async getLegalMoves(fen, square) {
         try {
-            const response = await fetch('/api/get-legal-moves', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({ fen, square })
-            });
-            
-            if (!response.ok) {
-                throw new Error(`Server returned ${response.status}: ${response.statusText}`);
-            }
-            
-            const data = await response.json();
-            return data.moves;
+            const position = await this.getPosition(fen);
+            return position.moves[square] || [];
         } catch (error) {
             console.error('Error getting legal moves:', error);
             return [];
@@ -206,11 +246,13 @@ class DQNInterface {
     
     /**
      * Start AI self-play training with specified parameters
+     * Training runs as a background job on the server; this polls it until it finishes
      * @param {number} numGames - Number of games to play
      * @param {Object} parameters - Training parameters
-     * @returns {Promise<Object>} - Training results
+     * @param {Function} onProgress - Optional callback receiving the job status on every poll
+     * @returns {Promise<Object>} - The finished training job
      */
-    async startTraining(numGames, parameters = {}) {
+    async startTraining(numGames, parameters = {}, onProgress = null) {
         try {
             this.trainingInProgress = true;
             
@@ -229,7 +271,7 @@ class DQNInterface {
                 }
             }
             
-            // Start the training
+            // Queue the training job
             const trainingResponse = await fetch('/api/start-training', {
                 method: 'POST',
                 headers: {
@@ -243,8 +285,10 @@ class DQNInterface {
             }
             
             const data = await trainingResponse.json();
+            this.trainingJobId = data.job_id;
+            const job = await this.waitForTrainingJob(data.job_id, onProgress);
             this.trainingInProgress = false;
-            return data;
+            return job;
         } catch (error) {
             console.error('Error starting training:', error);
             this.trainingInProgress = false;
@@ -252,6 +296,50 @@ class DQNInterface {
         }
     }
     
+    /**
+     * Poll a training job until it completes, is cancelled or fails
+     * @param {string} jobId - The id returned by /api/start-training
+     * @param {Function} onProgress - Optional callback receiving the job status on every poll
+     * @param {number} intervalMs - Delay between polls
+     * @returns {Promise<Object>} - The finished job status
+     */
+    async waitForTrainingJob(jobId, onProgress = null, intervalMs = 2000) {
+        while (true) {
+            const response = await fetch(`/api/training-jobs/${jobId}`);
+            if (!response.ok) {
+                throw new Error(`Failed to get training job: ${response.status}`);
+            }
+            
+            const data = await response.json();
+            if (onProgress) {
+                onProgress(data.job);
+            }
+            if (['completed', 'cancelled', 'failed'].includes(data.job.status)) {
+                return data.job;
+            }
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+    
+    /**
+     * Cancel the running training job; it stops after its current game
+     * @returns {Promise<Object>} - The job status, or null if no job is running
+     */
+    async cancelTraining() {
+        if (!this.trainingJobId) {
+            return null;
+        }
+        
+        try {
+            const response = await fetch(`/api/training-jobs/${this.trainingJobId}/cancel`, { method: 'POST' });
+            const data = await response.json();
+            return data.job || null;
+        } catch (error) {
+            console.error('Error cancelling training:', error);
+            return null;
+        }
+    }
+    
     /**
      * Get current training statistics
      * @returns {Promise<Object>} - Training statistics
@@ -0,0 +1,43 @@
+import os
+import pytest
+from flask import Flask
+from database import db
+
+
+@pytest.fixture
+def app_db(tmp_path):
+    """Application context with the models' tables created in a fresh SQLite file"""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'test.db'}"
+    db.init_app(app)
+    with app.app_context():
+        import models
+        models.db.create_all()  # Importing models registered the tables on db
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture(scope="session")
+def web_app(tmp_path_factory):
+    """The application module with its database, checkpoints and snapshots kept in a temporary directory
+
+    app.py configures itself at import time, so it is imported once per test session.
+    """
+    workspace = tmp_path_factory.mktemp("workspace")
+    os.environ["CHECKPOINT_DIR"] = str(workspace / "checkpoints")
+    os.environ["SNAPSHOT_DIR"] = str(workspace / "snapshots")
+    import app as web
+    from migrations import upgrade_schema  # Imports models, registering the tables
+
+    web.app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{workspace / 'app.db'}"
+    web.app.config["TESTING"] = True
+    db.init_app(web.app)
+    with web.app.app_context():
+        db.create_all()
+        upgrade_schema(db.engine)
+    return web
+
+
+@pytest.fixture
+def client(web_app):
+    return web_app.app.test_client()
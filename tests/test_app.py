@@ -0,0 +1,154 @@
+import chess
+
+
+def test_update_training_parameters_rejects_bad_replay_settings(client, web_app):
+    agent = web_app.agent_registry.current
+    epsilon = agent.epsilon
+    for body in [{"replay_mode": "bogus"}, {"replay_mode": "prioritized", "per_alpha": -1},
+                 {"replay_mode": "prioritized", "per_beta": 2}, {"per_beta": "high"},
+                 {"epsilon": 0.5, "replay_mode": "bogus"}]:
+        response = client.post("/api/update-training-parameters", json=body)
+        assert response.status_code == 400, body
+        assert response.get_json()["status"] == "error"
+    # A rejected request changes nothing
+    assert agent.epsilon == epsilon and agent.replay_mode == "uniform"
+
+    response = client.post("/api/update-training-parameters", json={"replay_mode": "prioritized", "per_beta": 0.5})
+    assert response.status_code == 200
+    assert response.get_json()["parameters"]["replay_mode"] == "prioritized"
+    client.post("/api/update-training-parameters", json={"replay_mode": "uniform"})
+
+
+def test_start_training_rejects_bad_options(client, web_app):
+    for body in [{"workers": "abc"}, {"workers": None}, {"workers": 0}, {"workers": 2.5}, {"workers": True},
+                 {"merge": "sum"}, {"merge": None}, {"lockstep_games": "four"}, {"lockstep_games": 0},
+                 {"lockstep_games": 1.5}, {"num_games": "x"}, {"num_games": 2.5}, {"num_games": -3},
+                 {"num_games": 0}, {"num_games": False}]:
+        response = client.post("/api/start-training", json=dict({"num_games": 1}, **body))
+        assert response.status_code == 400, body
+        assert response.get_json()["status"] == "error"
+    assert web_app.training_jobs.list() == []
+
+
+def counter_totals(web_app):
+    import models
+    with web_app.app.app_context():
+        counters = models.GameCounters.current()
+        return (counters.total_games, counters.white_wins, counters.black_wins, counters.draws,
+                counters.total_moves, counters.total_evaluation, counters.evaluated_games)
+
+
+def test_save_game_updates_counters_exactly(client, web_app):
+    before = counter_totals(web_app)
+    games = [
+        {"moves": ["e2e4", "e7e5", "d1h5", "b8c6", "f1c4", "g8f6", "h5f7"], "result": "1-0", "evaluation": 100},
+        {"moves": ["f2f3", "e7e5", "g2g4", "d8h4"], "result": "0-1", "evaluation": -2.5},
+        {"moves": ["d2d4", "d7d5"], "result": "1/2-1/2", "evaluation": None},
+    ]
+    for game in games:
+        response = client.post("/api/save-game", json=game)
+        assert response.status_code == 200, response.get_json()
+
+    after = counter_totals(web_app)
+    assert tuple(a - b for a, b in zip(after, before)) == (3, 1, 1, 1, 13, 97.5, 2)
+    # The stats endpoint is invalidated by the writes and reports the new total
+    stats = client.get("/api/get-training-stats").get_json()["stats"]
+    assert stats["total_stored_games"] == after[0]
+
+
+def test_evaluate_batch(client, web_app):
+    mated = "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3"
+    response = client.post("/api/evaluate-batch", json={"fens": [chess.STARTING_FEN, mated]})
+    assert response.status_code == 200
+    evaluations = response.get_json()["evaluations"]
+    assert len(evaluations) == 2 and evaluations[1] == -100
+
+    # A move list scores the start position and the position after every move
+    response = client.post("/api/evaluate-batch", json={"moves": ["f2f3", "e7e5", "g2g4", "d8h4"]})
+    evaluations = response.get_json()["evaluations"]
+    assert len(evaluations) == 5 and evaluations[-1] == -100
+
+
+def test_evaluate_batch_rejects_bad_input(client, web_app):
+    for body in [{}, {"fens": [], "moves": []}, {"fens": chess.STARTING_FEN}, {"fens": [1, 2]},
+                 {"moves": None}, {"moves": ["e2e5"]}, {"moves": ["e2e4"], "fen": 7}, {"fens": ["not a fen"]},
+                 {"fens": [chess.STARTING_FEN] * (web_app.MAX_BATCH_POSITIONS + 1)}]:
+        response = client.post("/api/evaluate-batch", json=body)
+        assert response.status_code == 400, body
+        assert response.get_json()["status"] == "error"
+    assert client.post("/api/evaluate-batch", data="not json").status_code == 400
+
+
+def test_game_session_flow(client, web_app):
+    response = client.post("/api/games", json={"white_player": "Ann"})
+    assert response.status_code == 201
+    game = response.get_json()
+    game_id = game["game_id"]
+    assert game["fen"] == chess.STARTING_FEN and game["white_player"] == "Ann"
+
+    for move in ["g1f3", "g8f6", "f3g1", "f6g8", "g1f3", "g8f6", "f3g1"]:
+        game = client.post(f"/api/games/{game_id}/move", json={"move": move}).get_json()
+    assert game["turn"] == "black" and len(game["moves"]) == 7
+    # The server keeps the move stack, so the repetition is seen
+    game = client.post(f"/api/games/{game_id}/move", json={"move": "f6g8"}).get_json()
+    assert game["state"] == "repetition"
+
+    undo = client.post(f"/api/games/{game_id}/undo").get_json()
+    assert undo["undone"] == "f6g8" and len(undo["moves"]) == 7
+    board = chess.Board(undo["fen"])
+    assert client.get(f"/api/games/{game_id}/legal-moves?square=f6").get_json()["moves"] == [
+        move.uci() for move in board.legal_moves if move.from_square == chess.F6]
+    assert len(client.get(f"/api/games/{game_id}/legal-moves").get_json()["moves"]) == board.legal_moves.count()
+
+    response = client.post(f"/api/games/{game_id}/ai-move", json={"depth": 1})
+    assert response.status_code == 200
+    ai_game = response.get_json()
+    assert ai_game["moves"][-1] == ai_game["move"] and len(ai_game["moves"]) == 8
+
+    assert client.delete(f"/api/games/{game_id}").status_code == 200
+    assert client.get(f"/api/games/{game_id}").status_code == 404
+
+
+def test_game_session_endpoints_reject_bad_input(client, web_app):
+    for fen in ["not a fen", 42, ["8/8/8/8/8/8/8/8 w - - 0 1"]]:
+        assert client.post("/api/games", json={"fen": fen}).status_code == 400, fen
+    game_id = client.post("/api/games", json={}).get_json()["game_id"]
+    for body in [{}, {"move": "e2e5"}, {"move": "zz"}, {"move": 5}, {"move": ["e2e4"]}]:
+        assert client.post(f"/api/games/{game_id}/move", json=body).status_code == 400, body
+    for body in [{"depth": 0}, {"depth": "3"}, {"movetime_ms": -5}]:
+        assert client.post(f"/api/games/{game_id}/ai-move", json=body).status_code == 400, body
+    assert client.get(f"/api/games/{game_id}/legal-moves?square=z9").status_code == 400
+    assert client.get(f"/api/games/{game_id}").get_json()["moves"] == []
+
+    for path in ["", "/legal-moves"]:
+        assert client.get(f"/api/games/unknown{path}").status_code == 404
+    for path in ["/move", "/ai-move", "/undo"]:
+        assert client.post(f"/api/games/unknown{path}", json={}).status_code == 404
+    assert client.delete("/api/games/unknown").status_code == 404
+
+
+def test_position_moves(client, web_app):
+    fen = "r3k2r/pPpp1ppp/8/3Pp3/8/8/P1PPPPpP/R3K2R w KQkq e6 0 1"
+    position = client.post("/api/position-moves", json={"fen": fen}).get_json()
+    board = chess.Board(fen)
+    assert sorted(move for moves in position["moves"].values() for move in moves) == sorted(
+        move.uci() for move in board.legal_moves)
+    assert all(move.startswith(square) for square, moves in position["moves"].items() for move in moves)
+    assert position["turn"] == "white" and position["check"] is False and position["state"] == "ongoing"
+    # The per-square endpoint answers from the same cached map
+    legal = client.post("/api/get-legal-moves", json={"fen": fen, "square": "b7"}).get_json()["moves"]
+    assert legal == position["moves"]["b7"]
+
+    for body in [{}, {"fen": "not a fen"}, {"fen": 42}]:
+        assert client.post("/api/position-moves", json=body).status_code == 400, body
+
+
+def test_network_states_are_opt_in(client, web_app):
+    for endpoint in ["/api/get-ai-move", "/api/evaluate-position"]:
+        response = client.post(endpoint, json={"fen": chess.STARTING_FEN})
+        assert response.status_code == 200
+        assert "network_states" not in response.get_json()
+
+        response = client.post(endpoint, json={"fen": chess.STARTING_FEN, "include_network_states": True})
+        assert response.status_code == 200
+        assert response.get_json()["network_states"], endpoint
@@ -0,0 +1,80 @@
+import chess
+import numpy as np
+from board_encoder import (BoardEncoder, PLANE_SYMBOLS, EXTRAS_OFFSET, FEATURE_SIZE, EXTRA_TURN, EXTRA_CASTLING,
+                           EXTRA_EN_PASSANT, EXTRA_IN_CHECK, EXTRA_HALFMOVE_CLOCK, EXTRA_FULLMOVE_NUMBER,
+                           EXTRA_MOBILITY, EXTRA_MATERIAL, EXTRA_POSITIONAL, EXTRA_WHITE_MATERIAL,
+                           EXTRA_BLACK_MATERIAL, EXTRA_PAWN_BALANCE, EXTRA_BIAS)
+from dqn_agent import DQNAgent
+
+TABLES = DQNAgent().piece_square_tables
+VALUES = {"p": 1, "n": 3, "b": 3, "r": 5, "q": 9, "k": 0}
+
+FENS = [
+    chess.STARTING_FEN,
+    "r3k2r/pPpp1ppp/8/3Pp3/8/8/P1PPPPpP/R3K2R w KQkq e6 0 1",
+    "4k3/8/8/8/8/8/3q4/4K3 w - - 12 40",
+    "1n2k3/P6P/8/8/8/8/p6p/1N2K3 b - - 3 7",
+]
+
+
+def reference_features(board):
+    """Encode board square by square, the way the encoder's output is defined"""
+    features = np.zeros(FEATURE_SIZE, dtype=np.float32)
+    material = positional = white = black = pawns = 0.0
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece is None:
+            continue
+        symbol = piece.symbol()
+        features[PLANE_SYMBOLS.index(symbol) * 64 + square] = 1.0
+        value = VALUES[symbol.lower()]
+        # Tables are written with rank 8 in the first row
+        positional += TABLES[symbol][7 - chess.square_rank(square)][chess.square_file(square)] * 0.01
+        if piece.color == chess.WHITE:
+            material += value
+            white += value
+            pawns += symbol == "P"
+        else:
+            material -= value
+            black += value
+            pawns -= symbol == "p"
+
+    extras = features[EXTRAS_OFFSET:]
+    extras[EXTRA_TURN] = board.turn == chess.WHITE
+    extras[EXTRA_CASTLING:EXTRA_CASTLING + 4] = [
+        board.has_kingside_castling_rights(chess.WHITE), board.has_queenside_castling_rights(chess.WHITE),
+        board.has_kingside_castling_rights(chess.BLACK), board.has_queenside_castling_rights(chess.BLACK)]
+    extras[EXTRA_EN_PASSANT] = board.ep_square is not None
+    extras[EXTRA_IN_CHECK] = board.is_check()
+    extras[EXTRA_HALFMOVE_CLOCK] = board.halfmove_clock / 100
+    extras[EXTRA_FULLMOVE_NUMBER] = board.fullmove_number / 100
+    extras[EXTRA_MOBILITY] = len(list(board.legal_moves)) * (1 if board.turn == chess.WHITE else -1) / 100
+    extras[EXTRA_MATERIAL] = material
+    extras[EXTRA_POSITIONAL] = positional
+    extras[EXTRA_WHITE_MATERIAL] = white / 39
+    extras[EXTRA_BLACK_MATERIAL] = black / 39
+    extras[EXTRA_PAWN_BALANCE] = pawns / 8
+    extras[EXTRA_BIAS] = 1.0
+    return features
+
+
+def test_encoding_matches_per_square_reference():
+    encoder = BoardEncoder(TABLES)
+    expected = np.stack([reference_features(chess.Board(fen)) for fen in FENS])
+    assert np.allclose(encoder.encode_batch(FENS), expected, atol=1e-5)
+    assert np.allclose(encoder.encode(chess.Board(FENS[1])), expected[1], atol=1e-5)
+
+
+def test_pack_children_matches_encoding_each_child():
+    encoder = BoardEncoder(TABLES)
+    board = chess.Board(FENS[1])
+    moves = list(board.legal_moves)
+    masks, extras = encoder.pack_children(board, moves)
+    assert board.fen() == FENS[1]
+
+    expected = []
+    for move in moves:
+        board.push(move)
+        expected.append(reference_features(board))
+        board.pop()
+    assert np.allclose(encoder.unpack(masks, extras), np.stack(expected), atol=1e-5)
@@ -0,0 +1,71 @@
+import pytest
+from dqn_agent import DQNAgent
+from checkpoints import CheckpointStore, AgentRegistry
+
+
+def agent_with(total_games, value):
+    agent = DQNAgent()
+    agent.total_games = total_games
+    agent.board_values[1234] = value
+    return agent
+
+
+def test_checkpoint_versions_round_trip(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    assert store.save_version(agent_with(1, 0.5), label="first") == 1
+    assert store.save_version(agent_with(2, -0.5)) == 2
+    assert [summary["version"] for summary in store.versions()] == [2, 1]
+    assert store.versions()[1]["label"] == "first" and store.versions()[1]["total_games"] == 1
+    assert store.exists(2) and not store.exists(3)
+
+    assert store.active_version() is None
+    store.set_active(2)
+    assert store.active_version() == 2
+    store.set_active(None)
+    assert store.active_version() is None
+
+
+def test_registry_activates_and_rolls_back(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save_version(agent_with(1, 0.5))
+    store.save_version(agent_with(2, -0.5))
+    initial = DQNAgent()
+    registry = AgentRegistry(initial, DQNAgent, history=2)
+
+    first = registry.activate(store, 1)
+    assert registry.current is first and registry.version == 1
+    assert first.total_games == 1 and first.board_values[1234] == 0.5
+    second = registry.activate(store, 2)
+    assert registry.current.board_values[1234] == -0.5 and registry.previous_version == 1
+
+    assert registry.rollback() == 1
+    assert registry.current is first
+    assert registry.rollback() is None
+    assert registry.current is initial
+    with pytest.raises(LookupError):
+        registry.rollback()
+    with pytest.raises(KeyError):
+        registry.activate(store, 99)
+
+    # Swaps are refused while a training job holds the agent
+    with registry.pinned() as agent:
+        assert agent is initial
+        with pytest.raises(RuntimeError):
+            registry.activate(store, 2)
+    assert registry.activate(store, 2) is not second  # Every activation loads a fresh agent
+
+
+def test_registry_follows_the_active_pointer(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save_version(agent_with(1, 0.5))
+    registry = AgentRegistry(DQNAgent(), DQNAgent)
+
+    registry.sync(store)
+    assert registry.version is None
+    store.set_active(1)
+    registry.sync(store)
+    assert registry.version == 1 and registry.current.total_games == 1
+    # Pointing back at the agent served before the swap rolls back instead of reloading
+    store.set_active(None)
+    registry.sync(store)
+    assert registry.version is None
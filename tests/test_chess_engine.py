@@ -0,0 +1,15 @@
+import chess
+from chess_engine import ChessEngine
+
+
+def test_position_cache_is_a_bounded_lru():
+    engine = ChessEngine(position_cache_size=2)
+    after_e4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+    start = engine.get_position(chess.STARTING_FEN)
+    assert engine.get_position(chess.STARTING_FEN) is start  # Answered from the cache
+    engine.get_position(after_e4)
+    engine.get_position(chess.STARTING_FEN)
+    engine.get_position("4k3/8/8/8/8/8/8/4K2R w K - 0 1")  # Evicts after_e4, the least recently used
+    assert list(engine.position_cache) == [chess.STARTING_FEN, "4k3/8/8/8/8/8/8/4K2R w K - 0 1"]
+    assert engine.get_legal_moves(chess.STARTING_FEN, "g1") == ["g1h3", "g1f3"]
+    assert engine.check_game_state("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1")["state"] == "checkmate"
@@ -0,0 +1,47 @@
+import random
+import chess
+import chess.polyglot
+from dqn_agent import DQNAgent
+from evaluation import IncrementalEvaluator
+
+# The agent's encoder, with its piece-square tables
+ENCODER = DQNAgent().encoder
+
+
+def totals(evaluator):
+    return round(evaluator.material, 6), round(evaluator.positional, 6)
+
+
+def test_incremental_totals_match_a_fresh_evaluation():
+    """After every push and pop the totals and Zobrist key equal those computed from scratch"""
+    rng = random.Random(7)
+    for _ in range(20):
+        evaluator = IncrementalEvaluator(chess.Board(), ENCODER)
+        history = []
+        while not evaluator.board.is_game_over() and len(history) < 120:
+            move = rng.choice(list(evaluator.board.legal_moves))
+            evaluator.push(move)
+            history.append(totals(evaluator))
+            fresh = IncrementalEvaluator(evaluator.board.copy(), ENCODER)
+            assert totals(evaluator) == totals(fresh)
+            assert evaluator.zobrist_key == chess.polyglot.zobrist_hash(evaluator.board)
+
+        while history:
+            assert totals(evaluator) == history.pop()
+            evaluator.pop()
+        assert evaluator.board == chess.Board()
+        assert totals(evaluator) == totals(IncrementalEvaluator(chess.Board(), ENCODER))
+
+
+def test_special_moves():
+    """Castling, en passant and promotion update the totals like a rebuilt board"""
+    for fen, uci in [
+        ("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1", "e1g1"),
+        ("r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1", "e8c8"),
+        ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2", "e5d6"),
+        ("1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a7b8q"),
+    ]:
+        evaluator = IncrementalEvaluator(chess.Board(fen), ENCODER)
+        evaluator.push(chess.Move.from_uci(uci))
+        assert totals(evaluator) == totals(IncrementalEvaluator(evaluator.board.copy(), ENCODER))
+        assert evaluator.zobrist_key == chess.polyglot.zobrist_hash(evaluator.board)
@@ -0,0 +1,22 @@
+import time
+from game_sessions import GameSessionStore
+
+
+def test_store_drops_least_recently_used_sessions():
+    store = GameSessionStore(max_sessions=2)
+    first, second = store.create(), store.create()
+    assert store.get(first.session_id) is first  # first is now the most recently used
+    third = store.create()
+    assert store.get(second.session_id) is None
+    assert {store.get(first.session_id), store.get(third.session_id)} == {first, third}
+    assert len(store) == 2
+
+
+def test_store_expires_idle_sessions():
+    store = GameSessionStore(ttl_seconds=60)
+    idle, active = store.create(), store.create()
+    idle.last_access = time.monotonic() - 61
+    assert store.get(idle.session_id) is None
+    assert store.get(active.session_id) is active
+    assert store.delete(active.session_id) and not store.delete(active.session_id)
+    assert len(store) == 0
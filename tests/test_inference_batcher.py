@@ -0,0 +1,70 @@
+import threading
+import numpy as np
+import pytest
+from inference_batcher import InferenceBatcher
+
+
+def double(masks, extras):
+    return extras[:, 0] * 2
+
+
+def packed(values):
+    extras = np.zeros((len(values), 16), dtype=np.float32)
+    extras[:, 0] = values
+    return np.zeros((len(values), 12), dtype=np.uint64), extras
+
+
+def test_concurrent_callers_get_their_own_values():
+    batcher = InferenceBatcher(max_wait_ms=50)
+    results = {}
+    start = threading.Barrier(8)
+
+    def caller(index):
+        values = np.arange(index + 1, dtype=np.float32) + 10 * index
+        start.wait()
+        results[index] = batcher.evaluate(double, *packed(values)).tolist()
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for index in range(8):
+        assert results[index] == [2 * (10 * index + i) for i in range(index + 1)]
+    stats = batcher.stats()
+    assert stats["requests"] == 8 and stats["positions"] == sum(range(1, 9))
+    assert 1 <= stats["batches"] <= 8 and stats["fallbacks"] == 0
+
+
+def test_errors_reach_the_caller_and_the_dispatcher_survives():
+    batcher = InferenceBatcher(max_wait_ms=1)
+
+    def broken(masks, extras):
+        raise ValueError("bad batch")
+
+    with pytest.raises(ValueError, match="bad batch"):
+        batcher.evaluate(broken, *packed([1.0]))
+    assert batcher.evaluate(double, *packed([1.5])).tolist() == [3.0]
+
+
+def test_callers_score_directly_when_the_batch_times_out():
+    batcher = InferenceBatcher(max_wait_ms=1, timeout_ms=50)
+    dispatching = threading.Event()
+    release = threading.Event()
+
+    def stalled(masks, extras):
+        dispatching.set()
+        release.wait(5)
+        return double(masks, extras)
+
+    # Once the dispatcher is stuck in the first batch, every caller times out and scores by itself
+    first = threading.Thread(target=batcher.evaluate, args=(stalled, *packed([1.0])))
+    first.start()
+    try:
+        assert dispatching.wait(5)
+        assert batcher.evaluate(double, *packed([4.0])).tolist() == [8.0]
+    finally:
+        release.set()
+        first.join()
+    assert batcher.stats()["fallbacks"] == 2
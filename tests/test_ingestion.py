@@ -0,0 +1,52 @@
+import models
+from dqn_agent import DQNAgent
+
+GAMES = [
+    ["e2e4", "e7e5", "g1f3", "b8c6"],
+    ["d2d4", "d7d5", "c2c4"],
+    ["f2f3", "e7e5", "g2g4", "d8h4"],
+    ["c2c4", "g8f6", "b1c3", "e7e6", "d2d4"],
+    ["g1f3", "d7d5", "g2g3"],
+]
+
+
+def store(db, moves, name):
+    game = models.GameHistory(game_id=name, result="1/2-1/2")
+    game.set_moves_list(moves)
+    db.session.add(game)
+    db.session.commit()
+    return game
+
+
+def test_database_ingestion_is_incremental(app_db):
+    """Each stored game is learned from exactly once, however it reached the agent"""
+    agent = DQNAgent()
+    first = [store(app_db, moves, str(i)) for i, moves in enumerate(GAMES[:2])]
+    assert agent.load_games_from_database(aggressive_training=False)
+    assert agent.last_ingested_game_id == first[-1].id
+    # Every move but the last is replayed as one transition
+    assert len(agent.memory) == 3 + 2
+
+    # Nothing new: the stored games are not read again
+    assert not agent.load_games_from_database(aggressive_training=False)
+    assert len(agent.memory) == 5
+
+    # A saved game is learned from once, directly and not again through the database
+    saved = store(app_db, GAMES[2], "saved")
+    assert agent.ingest_game(saved, aggressive_training=False)
+    assert not agent.ingest_game(saved, aggressive_training=False)
+    assert not agent.ingest_game(first[0], aggressive_training=False)
+    assert len(agent.memory) == 5 + 3
+
+    # Self-play games the agent already learned from are skipped by the next load
+    self_play = store(app_db, GAMES[3], "self-play")
+    agent.mark_ingested([self_play.id, None])
+    newest = store(app_db, GAMES[4], "newest")
+    assert agent.load_games_from_database(aggressive_training=False)
+    assert len(agent.memory) == 5 + 3 + 2
+    assert agent.last_ingested_game_id == newest.id
+    assert agent.ingested_game_ids == set()
+
+    # A full rebuild forgets the mark and replays every stored game
+    assert agent.load_games_from_database(aggressive_training=False, full_rebuild=True)
+    assert len(agent.memory) == 3 + 2 + 3 + 4 + 2
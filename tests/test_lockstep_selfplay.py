@@ -0,0 +1,70 @@
+import random
+import chess
+import numpy as np
+import lockstep_selfplay
+from dqn_agent import DQNAgent
+from lockstep_selfplay import choose_moves, lockstep_self_play
+
+
+def count_network_calls(agent, monkeypatch):
+    """Record the number of positions in every network_values call of agent"""
+    calls = []
+    network_values = agent.network_values
+
+    def counting(masks, extras):
+        calls.append(len(masks))
+        return network_values(masks, extras)
+
+    monkeypatch.setattr(agent, "network_values", counting)
+    return calls
+
+
+def test_choose_moves_scores_all_unseen_children_in_one_call(monkeypatch):
+    agent = DQNAgent()
+    agent.epsilon = 0.0
+    calls = count_network_calls(agent, monkeypatch)
+    boards = [chess.Board(), chess.Board("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")]
+
+    moves = choose_moves(agent, boards)
+
+    assert calls == [20 + 20]
+    assert all(move in board.legal_moves for board, move in zip(boards, moves))
+
+    # Children already in the table are not sent to the network
+    board = chess.Board()
+    board.push(moves[0])
+    agent.board_values[agent.position_key(board)] = 0.0
+    choose_moves(agent, boards)
+    assert calls[1:] == [39]
+
+
+def test_lockstep_self_play_replaces_finished_games(monkeypatch):
+    random.seed(0)
+    agent = DQNAgent()
+    agent.epsilon = 0.5
+    agent.memory.rng = np.random.default_rng(0)
+    calls = count_network_calls(agent, monkeypatch)
+
+    plies = []  # The boards of every ply
+    choose = lockstep_selfplay.choose_moves
+
+    def recording(agent, boards):
+        plies.append(list(boards))
+        calls_before = len(calls)
+        choices = choose(agent, boards)
+        assert len(calls) - calls_before <= 1
+        return choices
+
+    monkeypatch.setattr(lockstep_selfplay, "choose_moves", recording)
+    results = lockstep_self_play(agent, num_games=3, parallel_games=2)
+
+    assert len(results) == 3 and agent.total_games == 3
+    assert max(len(boards) for boards in plies) == 2
+    games = []
+    for boards in plies:
+        games.extend(board for board in boards if not any(board is game for game in games))
+    assert len(games) == 3
+    # The third game started once the first one finished, while the other was still running
+    third = next(index for index, boards in enumerate(plies) if any(board is games[2] for board in boards))
+    assert len(plies[third]) == 2
+    assert calls
@@ -0,0 +1,95 @@
+import json
+import chess
+from chess_engine import encode_move, decode_move
+import migrations
+import models
+
+
+def test_move_codes_round_trip():
+    """Every legal move of a set of positions, promotions included, survives encode/decode"""
+    for fen in [chess.STARTING_FEN,
+                "r3k2r/pPpp1ppp/8/3Pp3/8/8/P1PPPPpP/R3K2R w KQkq e6 0 1",
+                "1n2k3/P6P/8/8/8/8/p6p/1N2K3 b - - 0 1"]:
+        for move in chess.Board(fen).legal_moves:
+            code = encode_move(move)
+            assert 0 <= code < 1 << 16
+            assert decode_move(code) == move
+            assert encode_move(move.uci()) == code
+
+
+def test_compact_moves_round_trip():
+    moves = ["e2e4", "e7e5", "g1f3", "b8c6", "a7a8q", "h2h1n"]
+    blob = models.GameHistory.encode_moves(moves)
+    assert len(blob) == 2 * len(moves)
+    assert [move.uci() for move in models.GameHistory.decode_moves(blob)] == moves
+
+
+def add_game(db, moves_json, game_id):
+    game = models.GameHistory(game_id=game_id, moves=moves_json, result="1-0",
+                              move_count=len(models.GameHistory.parse_moves(moves_json)))
+    db.session.add(game)
+    db.session.commit()
+    return game.id
+
+
+def test_compact_migration_preserves_moves(app_db):
+    games = [["e2e4", "e7e5", "g1f3"], [], ["d2d4", "d7d5", "c2c4", "d5c4", "e2e4"]]
+    ids = [add_game(app_db, json.dumps(moves), str(i)) for i, moves in enumerate(games)]
+    bad = {add_game(app_db, "not json", "bad-json"): "not json",
+           add_game(app_db, '["e2e4", "zz99"]', "bad-uci"): '["e2e4", "zz99"]'}
+
+    assert migrations.compact_stored_moves(app_db.engine, chunk_size=2) == len(games)
+
+    app_db.session.expire_all()
+    for game_id, moves in zip(ids, games):
+        game = app_db.session.get(models.GameHistory, game_id)
+        assert game.moves == "" and game.moves_blob is not None
+        assert game.get_moves_list() == moves
+    # Rows that can't be converted keep their JSON untouched
+    for game_id, moves_json in bad.items():
+        game = app_db.session.get(models.GameHistory, game_id)
+        assert game.moves == moves_json and game.moves_blob is None
+
+
+def test_iter_move_records_pages_by_id(app_db):
+    """Keyset pagination yields every game after after_id once, in id order, across chunks"""
+    games = [["e2e4"], ["d2d4", "d7d5"], [], ["c2c4", "e7e5", "b1c3"], ["g1f3"]]
+    ids = []
+    for i, moves in enumerate(games):
+        game = models.GameHistory(game_id=str(i), result="0-1")
+        game.set_moves_list(moves, compact=i % 2 == 0)  # Mix compact and JSON rows
+        app_db.session.add(game)
+        app_db.session.commit()
+        ids.append(game.id)
+
+    records = list(models.GameHistory.iter_move_records(chunk_size=2))
+    assert [game_id for game_id, _, _ in records] == ids
+    assert [[move if isinstance(move, str) else move.uci() for move in moves]
+            for _, moves, _ in records] == games
+    assert all(result == "0-1" for _, _, result in records)
+
+    assert [game_id for game_id, _, _ in models.GameHistory.iter_move_records(after_id=ids[2], chunk_size=2)] == ids[3:]
+    assert list(models.GameHistory.iter_move_records(after_id=ids[-1])) == []
+
+
+def test_upgrade_schema_tolerates_columns_added_by_another_worker(app_db, monkeypatch):
+    """A worker that saw the old schema must not crash when another worker already added the columns"""
+    real_inspect = migrations.inspect
+    calls = []
+
+    class StaleInspector:
+        def __init__(self, engine):
+            self.inspector = real_inspect(engine)
+
+        def get_columns(self, table_name):
+            columns = self.inspector.get_columns(table_name)
+            calls.append(table_name)
+            if len(calls) == 1:  # The first look predates the other worker's ALTER TABLE
+                columns = [column for column in columns if column["name"] not in ("move_count", "moves_blob")]
+            return columns
+
+    monkeypatch.setattr(migrations, "inspect", StaleInspector)
+    add_game(app_db, '["e2e4"]', "racing")
+    migrations.upgrade_schema(app_db.engine)
+    assert len(calls) == 3  # One initial look, then one re-check per duplicate column
+    assert app_db.session.get(models.GameCounters, models.GameCounters.ROW_ID).total_games == 1
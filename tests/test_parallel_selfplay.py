@@ -0,0 +1,79 @@
+import os
+import numpy as np
+import pytest
+from dqn_agent import DQNAgent
+from parallel_selfplay import BLAS_THREAD_VARIABLES, _worker_environment, merge_worker_result
+
+
+def worker_result():
+    """A worker result for one two-move game: 1 -> 2, then 2 -> 3 ending the game"""
+    return {
+        "games": [("1-0", ["e2e4", "e7e5"], 2, 1.0)],
+        "transitions": (
+            np.array([1, 2], dtype=np.uint64),
+            np.array([10, 20], dtype=np.uint16),
+            np.array([0.0, 2.0], dtype=np.float32),
+            np.array([2, 3], dtype=np.uint64),
+            np.array([False, True])
+        ),
+        "features": None,
+        "keys": np.array([1, 2, 3], dtype=np.uint64),
+        "values": np.array([0.5, 1.0, -1.0], dtype=np.float32)
+    }
+
+
+def main_agent():
+    agent = DQNAgent()
+    agent.board_values[1] = 0.1
+    return agent
+
+
+def assert_transitions_stored(agent, result):
+    assert len(agent.memory) == 2
+    for stored, expected in zip(agent.memory.transitions(), result["transitions"]):
+        assert stored.tolist() == expected.tolist()
+
+
+def assert_game_recorded(agent, training_data, epsilon):
+    assert [game["moves_list"] for game in training_data] == [["e2e4", "e7e5"]]
+    assert agent.total_games == 1 and agent.wins == 1
+    assert agent.epsilon == pytest.approx(epsilon * agent.epsilon_decay ** 2)
+
+
+def test_average_merge():
+    """Known positions take the mean of both values, new ones the worker's value"""
+    agent, result = main_agent(), worker_result()
+    epsilon = agent.epsilon
+    training_data = merge_worker_result(agent, result, "average")
+
+    assert agent.board_values.get(1) == pytest.approx(0.3)
+    assert agent.board_values.get(2) == 1.0
+    assert agent.board_values.get(3) == -1.0
+    assert_transitions_stored(agent, result)
+    assert_game_recorded(agent, training_data, epsilon)
+
+
+def test_replay_merge():
+    """New positions start from the worker's value, then the transitions are replayed as one TD step"""
+    agent, result = main_agent(), worker_result()
+    epsilon = agent.epsilon
+    training_data = merge_worker_result(agent, result, "replay")
+
+    step = agent.alpha * 0.5
+    assert agent.board_values.get(1) == pytest.approx(0.1 + step * (agent.gamma * 1.0 - 0.1))
+    assert agent.board_values.get(2) == pytest.approx(1.0 + step * (2.0 - 1.0))
+    assert agent.board_values.get(3) == -1.0
+    assert_transitions_stored(agent, result)
+    assert_game_recorded(agent, training_data, epsilon)
+
+
+def test_worker_environment_is_restored(monkeypatch):
+    """BLAS thread variables are only set while workers start, and values already set are kept"""
+    for variable in BLAS_THREAD_VARIABLES:
+        monkeypatch.delenv(variable, raising=False)
+    monkeypatch.setenv("OMP_NUM_THREADS", "4")
+
+    with _worker_environment():
+        assert [os.environ[variable] for variable in BLAS_THREAD_VARIABLES] == ["4", "1", "1"]
+    assert os.environ["OMP_NUM_THREADS"] == "4"
+    assert not any(variable in os.environ for variable in BLAS_THREAD_VARIABLES[1:])
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+import migrations
+import models
+from persistence import save_self_play_results
+
+
+def training_results():
+    return [
+        {"result": "1-0", "moves_list": ["e2e4", "e7e5", "d1h5"], "moves": 3, "reward": 10},
+        {"result": "1/2-1/2", "moves_list": ["d2d4"], "moves": 1, "reward": 0},
+        {"result": "0-1", "moves_list": ["f2f3", "e7e5", "g2g4", "d8h4"], "moves": 4, "reward": -100},
+    ]
+
+
+def agent(epsilon=0.1):
+    return SimpleNamespace(epsilon=epsilon, alpha=0.01, gamma=0.95, position_count=42)
+
+
+def row_count(db, model):
+    return db.session.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+def test_save_self_play_results_commits_once(app_db):
+    migrations.ensure_game_counters(app_db.engine)
+    commits = []
+
+    def count_commit(connection):
+        commits.append(connection)
+
+    event.listen(app_db.engine, "commit", count_commit)
+    try:
+        game_ids = save_self_play_results(app_db.engine, agent(), training_results(), session_id="session")
+    finally:
+        event.remove(app_db.engine, "commit", count_commit)
+    assert len(commits) == 1
+
+    # Ids come back in training_results order
+    games = [app_db.session.get(models.GameHistory, game_id) for game_id in game_ids]
+    assert [game.result for game in games] == ["1-0", "1/2-1/2", "0-1"]
+    assert [game.get_moves_list() for game in games] == [game["moves_list"] for game in training_results()]
+
+    stats = app_db.session.execute(select(models.TrainingStats)).scalar_one()
+    assert (stats.training_session, stats.total_games, stats.positions_evaluated) == ("session", 3, 42)
+    counters = models.GameCounters.current()
+    assert (counters.total_games, counters.white_wins, counters.black_wins, counters.draws,
+            counters.total_moves) == (3, 1, 1, 1, 8)
+
+
+def test_save_self_play_results_rolls_back_on_failure(app_db):
+    migrations.ensure_game_counters(app_db.engine)
+    # The games insert succeeds, then the summary row violates NOT NULL
+    with pytest.raises(IntegrityError):
+        save_self_play_results(app_db.engine, agent(epsilon=None), training_results())
+
+    assert row_count(app_db, models.GameHistory) == 0
+    assert row_count(app_db, models.TrainingStats) == 0
+    assert models.GameCounters.current().total_games == 0
@@ -0,0 +1,84 @@
+import numpy as np
+from replay_buffer import ReplayBuffer, SumTree, PrioritizedReplayBuffer
+
+
+def add(buffer, start, count):
+    """Append count transitions numbered from start (state key = number, next-state key = number + 1)"""
+    numbers = np.arange(start, start + count)
+    buffer.extend(numbers.astype(np.uint64), (numbers % 7).astype(np.uint16), numbers.astype(np.float32),
+                  (numbers + 1).astype(np.uint64), numbers % 2 == 0)
+
+
+def test_ring_buffer_wraps_around_keeping_the_newest():
+    buffer = ReplayBuffer(maxlen=4)
+    add(buffer, 0, 3)
+    assert len(buffer) == 3 and buffer.transitions()[0].tolist() == [0, 1, 2]
+
+    # Single appends and a batch both overwrite the oldest slots
+    buffer.append(3, 3, 3.0, 4, False)
+    buffer.append(4, 4, 4.0, 5, True)
+    add(buffer, 5, 2)
+    states, moves, rewards, next_states, dones = buffer.transitions()
+    assert len(buffer) == 4
+    assert states.tolist() == [3, 4, 5, 6]
+    assert rewards.tolist() == [3.0, 4.0, 5.0, 6.0]
+    assert next_states.tolist() == [4, 5, 6, 7]
+    assert dones.tolist() == [False, True, False, True]
+    assert buffer.states[buffer.recent_slots(2)].tolist() == [5, 6]
+    assert buffer.states[buffer.recent_slots(10)].tolist() == [3, 4, 5, 6]
+
+    # A batch longer than the buffer keeps only its newest transitions
+    add(buffer, 10, 9)
+    assert buffer.transitions()[0].tolist() == [15, 16, 17, 18]
+    assert set(buffer.states[buffer.sample_indices(64)].tolist()) <= {15, 16, 17, 18}
+
+
+def test_ring_buffer_keeps_features_with_their_transitions():
+    buffer = ReplayBuffer(maxlen=3, store_features=True)
+    for number in range(5):
+        masks = np.full(12, number, dtype=np.uint64)
+        extras = np.full(16, number, dtype=np.float32)
+        buffer.append(number, 0, 0.0, number + 1, False, (masks, extras))
+    masks, extras = buffer.transition_features()
+    assert masks[:, 0].tolist() == [2, 3, 4]
+    assert extras[:, 0].tolist() == [2.0, 3.0, 4.0]
+
+
+def test_sum_tree_finds_leaf_by_cumulative_priority():
+    tree = SumTree(4)
+    tree.update([0, 1, 2, 3], [1.0, 2.0, 3.0, 4.0])
+    assert tree.total == 10.0
+    # Leaf ranges: [0, 1), [1, 3), [3, 6), [6, 10)
+    assert tree.find([0.0, 0.99, 1.0, 2.99, 3.0, 6.0, 9.99]).tolist() == [0, 0, 1, 1, 2, 3, 3]
+
+    tree.update([3], [0.0])
+    assert tree.total == 6.0
+    assert tree.get([3]).tolist() == [0.0]
+
+
+def test_prioritized_sampling_is_proportional_to_priority():
+    """Transitions are drawn in proportion to (|TD error| + eps) ** alpha"""
+    buffer = PrioritizedReplayBuffer(maxlen=4, alpha=1.0, epsilon=0.0, seed=0)
+    buffer.extend(np.arange(4, dtype=np.uint64), np.zeros(4, dtype=np.uint16), np.zeros(4, dtype=np.float32),
+                  np.arange(1, 5, dtype=np.uint64), np.zeros(4, dtype=bool))
+    buffer.update_priorities(np.arange(4), [1.0, 2.0, 3.0, 4.0])
+
+    counts = np.zeros(4)
+    for _ in range(2000):
+        indices, _ = buffer.sample_with_weights(4)
+        np.add.at(counts, indices, 1)
+    frequencies = counts / counts.sum()
+    assert np.allclose(frequencies, [0.1, 0.2, 0.3, 0.4], atol=0.02)
+
+
+def test_importance_weights_favor_rarely_sampled_transitions():
+    buffer = PrioritizedReplayBuffer(maxlen=2, alpha=1.0, beta=1.0, beta_increment=0.0, epsilon=0.0, seed=0)
+    buffer.extend(np.arange(2, dtype=np.uint64), np.zeros(2, dtype=np.uint16), np.zeros(2, dtype=np.float32),
+                  np.arange(1, 3, dtype=np.uint64), np.zeros(2, dtype=bool))
+    buffer.update_priorities([0, 1], [1.0, 3.0])
+
+    # (N * P) ** -beta with P = [0.25, 0.75], normalized by the batch maximum
+    raw = np.array([1 / (2 * 0.25), 1 / (2 * 0.75)])
+    for _ in range(20):
+        indices, weights = buffer.sample_with_weights(2)
+        assert np.allclose(weights, raw[indices] / raw[indices].max())
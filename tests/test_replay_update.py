@@ -0,0 +1,56 @@
+import chess
+import numpy as np
+import pytest
+from dqn_agent import DQNAgent
+
+
+def test_replay_update_is_one_batched_td_step():
+    """TD errors use the values from before the batch; repeated states accumulate their updates"""
+    agent = DQNAgent()
+    agent.board_values.set_many([1, 2, 3, 6], [0.0, 1.0, -1.0, 0.5])
+    slots = [
+        agent.memory.append(1, 0, 1.0, 2, False),   # TD error 1 + 0.95 * 1 = 1.95
+        agent.memory.append(1, 0, 0.0, 3, False),   # TD error 0.95 * -1 = -0.95
+        agent.memory.append(1, 0, 1.0, 2, False),   # The same transition again
+        agent.memory.append(4, 0, 2.0, 5, True),    # Terminal: no bootstrap, state 4 inserted at 0
+        agent.memory.append(6, 0, 1.0, 7, False),   # Next state unknown: skipped
+    ]
+    agent.replay_update(np.array(slots), np.ones(len(slots), dtype=np.float32))
+
+    step = agent.alpha * 0.5
+    assert agent.board_values.get(1) == pytest.approx(step * (1.95 - 0.95 + 1.95))
+    assert agent.board_values.get(4) == pytest.approx(step * 2.0)
+    assert agent.board_values.get(6) == 0.5
+    assert agent.board_values.get(5) is None and agent.board_values.get(7) is None
+    # Next states are only read
+    assert agent.board_values.get(2) == 1.0 and agent.board_values.get(3) == -1.0
+
+
+def test_replay_update_applies_importance_weights():
+    agent = DQNAgent()
+    agent.board_values.set_many([1, 2], [0.0, 0.0])
+    slots = [agent.memory.append(1, 0, 1.0, 2, True), agent.memory.append(2, 0, -1.0, 1, True)]
+    agent.replay_update(np.array(slots), np.array([0.5, 2.0], dtype=np.float32))
+    assert agent.board_values.get(1) == pytest.approx(agent.alpha * 0.5 * 0.5)
+    assert agent.board_values.get(2) == pytest.approx(agent.alpha * 0.5 * -2.0)
+
+
+def test_network_snapshot_is_cached_per_model_version():
+    """Repeated snapshots come from the cache until a network training step bumps model_version"""
+    agent = DQNAgent()
+    snapshot = agent.network_snapshot(chess.STARTING_FEN)
+    assert agent.network_snapshot(chess.Board()) is snapshot
+    assert list(agent.network_state_cache) == [(0, agent.position_key(chess.STARTING_FEN))]
+
+    board = chess.Board()
+    state = agent.position_key(board)
+    board.push_uci("e2e4")
+    agent.board_values[agent.position_key(board)] = 1.0
+    slot = agent.memory.append(state, 0, 0.0, agent.position_key(board),
+                               features=agent.encoder.pack(chess.STARTING_FEN))
+    agent.replay_update(np.array([slot]), np.ones(1, dtype=np.float32), train_network=True)
+    assert agent.model_version == 1
+
+    refreshed = agent.network_snapshot(chess.STARTING_FEN)
+    assert refreshed is not snapshot
+    assert agent.network_snapshot(chess.STARTING_FEN) is refreshed
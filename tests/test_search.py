@@ -0,0 +1,59 @@
+import chess
+from board_encoder import BoardEncoder
+from dqn_agent import DQNAgent
+from evaluation import IncrementalEvaluator
+from search import AlphaBetaSearch, TranspositionTable, EXACT, LOWER_BOUND, MATE_THRESHOLD
+
+
+def material(evaluator):
+    return evaluator.score
+
+
+def search(fen, depth):
+    evaluator = IncrementalEvaluator(chess.Board(fen), BoardEncoder())
+    return AlphaBetaSearch(material, TranspositionTable(1 << 12)).search(evaluator, depth=depth), evaluator
+
+
+def test_finds_mate_in_one():
+    result, evaluator = search("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1", depth=3)
+    assert result["move"] == chess.Move.from_uci("a1a8")
+    assert result["score"] >= MATE_THRESHOLD
+    # The search leaves the board as it found it
+    assert evaluator.board.fen() == "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+
+
+def test_moves_attacked_queen_to_safety():
+    result, _ = search("4k3/8/8/3q4/8/8/3R4/4K3 b - - 0 1", depth=2)
+    # The rook attacks the queen; any move that leaves it safe is fine
+    board = chess.Board("4k3/8/8/3q4/8/8/3R4/4K3 b - - 0 1")
+    board.push(result["move"])
+    assert not any(board.is_capture(move) and board.piece_type_at(move.to_square) == chess.QUEEN
+                   for move in board.legal_moves)
+
+
+def test_transposition_table_keeps_deeper_entries():
+    table = TranspositionTable(16)
+    table.store(5, depth=3, score=1.5, flag=EXACT, move_code=42)
+    table.store(5, depth=1, score=-2.0, flag=LOWER_BOUND, move_code=7)
+    assert table.probe(5) == (3, 1.5, EXACT, 42)
+    # Another position in the same slot replaces the entry; the old key then misses
+    table.store(5 + 16, depth=0, score=0.0, flag=EXACT, move_code=1)
+    assert table.probe(5) is None
+    assert table.probe(5 + 16) == (0, 0.0, EXACT, 1)
+
+
+def test_search_move_sees_updated_values():
+    """A search after the value table changes must not reuse the previous search's scores"""
+    agent = DQNAgent()
+    board = chess.Board("4k3/8/8/8/8/8/3P4/4K3 w - - 0 1")
+    assert agent.search_move(board, depth=2)[0] == "d2d4"
+
+    # Make every 2-ply line starting with e1f1 winning for white and every other line losing
+    for move in list(board.legal_moves):
+        board.push(move)
+        for reply in list(board.legal_moves):
+            board.push(reply)
+            agent.board_values[agent.position_key(board)] = 50.0 if move.uci() == "e1f1" else -50.0
+            board.pop()
+        board.pop()
+    assert agent.search_move(board, depth=2)[0] == "e1f1"
@@ -0,0 +1,71 @@
+import json
+import random
+import chess
+import numpy as np
+from dqn_agent import DQNAgent
+from snapshots import SnapshotStore
+
+
+def trained_agent(seed=0):
+    """An agent with values, replay transitions, network steps and counters to snapshot"""
+    random.seed(seed)
+    agent = DQNAgent()
+    board = chess.Board()
+    for _ in range(30):
+        if board.is_game_over():
+            break
+        agent.apply_training_move(board, random.choice(list(board.legal_moves)))
+    masks, extras = agent.memory.transition_features()
+    agent.network.train_step(agent.encoder.unpack(masks, extras), np.ones(len(masks)))
+    agent.model_version = 3
+    agent.wins, agent.total_games = 2, 5
+    agent.last_ingested_game_id = 17
+    agent.ingested_game_ids = {19, 23}
+    return agent
+
+
+def assert_same_state(agent, restored):
+    keys, values = agent.board_values.items()
+    restored_keys, restored_values = restored.board_values.items()
+    assert dict(zip(keys.tolist(), values.tolist())) == dict(zip(restored_keys.tolist(), restored_values.tolist()))
+    for array, restored_array in zip(agent.memory.transitions(), restored.memory.transitions()):
+        assert np.array_equal(array, restored_array)
+    for array, restored_array in zip(agent.memory.transition_features(), restored.memory.transition_features()):
+        assert np.array_equal(array, restored_array)
+    for weight, restored_weight in zip(agent.network.weights + agent.network.biases,
+                                       restored.network.weights + restored.network.biases):
+        assert np.array_equal(weight, restored_weight)
+    for field in ("epsilon", "wins", "total_games", "model_version", "last_ingested_game_id", "position_count"):
+        assert getattr(restored, field) == getattr(agent, field)
+    assert restored.ingested_game_ids == agent.ingested_game_ids
+    assert restored.network.steps == agent.network.steps
+
+
+def test_snapshot_round_trip(tmp_path):
+    agent = trained_agent()
+    store = SnapshotStore(str(tmp_path))
+    name = store.save(agent, metadata={"reason": "test"})
+    assert store.latest() == name
+
+    restored = DQNAgent()
+    meta = store.load(restored)
+    assert meta["reason"] == "test" and meta["replay_size"] == len(agent.memory)
+    assert_same_state(agent, restored)
+    # The restored agent evaluates positions exactly like the original
+    assert np.allclose(restored.evaluate_batch([chess.STARTING_FEN, "4k3/8/8/8/8/8/3P4/4K3 w - - 0 1"]),
+                       agent.evaluate_batch([chess.STARTING_FEN, "4k3/8/8/8/8/8/3P4/4K3 w - - 0 1"]))
+
+
+def test_snapshots_are_pruned_and_foreign_formats_skipped(tmp_path):
+    store = SnapshotStore(str(tmp_path), keep=2)
+    agent = trained_agent()
+    names = [store.save(agent) for _ in range(3)]
+    assert store.list() == names[:0:-1]
+    assert not store.is_due()
+
+    # A snapshot from another format version is ignored rather than half-loaded
+    meta = store.read_meta(names[-1])
+    meta["format_version"] = 99
+    (tmp_path / names[-1] / "meta.json").write_text(json.dumps(meta))
+    assert store.load(DQNAgent(), names[-1]) is None
+    assert SnapshotStore(str(tmp_path / "empty")).load(DQNAgent()) is None
@@ -0,0 +1,79 @@
+import threading
+from flask import Flask
+from training_jobs import TrainingJob, TrainingJobManager
+
+
+def game(result="1-0"):
+    return {"result": result, "moves": 2, "reward": 1, "epsilon": 0.5, "moves_list": ["e2e4", "e7e5"]}
+
+
+def play_games(num_games, progress_callback, should_stop, **options):
+    """Stub train callable: one instant game per requested game"""
+    for i in range(num_games):
+        if should_stop():
+            break
+        progress_callback(game("1-0" if i % 2 == 0 else "1/2-1/2"))
+
+
+def test_jobs_run_in_order_and_report_progress():
+    manager = TrainingJobManager(Flask(__name__), play_games)
+    first = manager.submit(3, workers=2)
+    second = manager.submit(1)
+    manager.queue.join()
+
+    assert [job.job_id for job in manager.list()] == [first.job_id, second.job_id]
+    assert first.started_at <= second.started_at
+    report = manager.get(first.job_id).to_dict()
+    assert report["status"] == TrainingJob.COMPLETED
+    assert report["games_completed"] == 3 and report["num_games"] == 3
+    assert report["options"] == {"workers": 2} and report["epsilon"] == 0.5
+    assert report["summary"]["white_wins_percent"] == 2 / 3 * 100
+    assert report["summary"]["draws_percent"] == 1 / 3 * 100
+    assert all("moves_list" not in result for result in report["results"])
+    assert report["last_game"] == ["e2e4", "e7e5"]
+    assert second.status == TrainingJob.COMPLETED
+
+
+def test_cancel_stops_after_the_current_game():
+    playing, release = threading.Event(), threading.Event()
+
+    def slow_games(num_games, progress_callback, should_stop):
+        for _ in range(num_games):
+            if should_stop():
+                break
+            playing.set()
+            release.wait(5)
+            progress_callback(game())
+
+    manager = TrainingJobManager(Flask(__name__), slow_games)
+    running = manager.submit(5)
+    queued = manager.submit(5)
+    assert playing.wait(5)
+    assert running.status == TrainingJob.RUNNING and queued.status == TrainingJob.QUEUED
+    manager.cancel(running.job_id)
+    manager.cancel(queued.job_id)
+    release.set()
+    manager.queue.join()
+
+    # The game in progress finishes and is kept; the queued job never starts
+    assert running.status == TrainingJob.CANCELLED and len(running.results) == 1
+    assert queued.status == TrainingJob.CANCELLED and queued.started_at is None
+    assert manager.cancel("unknown") is None
+
+
+def test_failed_job_reports_its_error():
+    def broken(num_games, progress_callback, should_stop):
+        progress_callback(game())
+        raise RuntimeError("database unavailable")
+
+    manager = TrainingJobManager(Flask(__name__), broken)
+    job = manager.submit(4)
+    manager.queue.join()
+    report = job.to_dict()
+    assert report["status"] == TrainingJob.FAILED
+    assert report["error"] == "database unavailable" and report["games_completed"] == 1
+    # The worker survives the failure and runs the next job
+    manager.train = play_games
+    next_job = manager.submit(2)
+    manager.queue.join()
+    assert next_job.status == TrainingJob.COMPLETED
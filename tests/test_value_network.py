@@ -0,0 +1,42 @@
+import numpy as np
+from value_network import ValueNetwork
+
+
+def test_batched_predict_matches_row_by_row():
+    network = ValueNetwork([20, 16, 8, 1], seed=0)
+    features = np.random.default_rng(1).random((5, 20), dtype=np.float32)
+    batch = network.predict(features)
+    assert batch.shape == (5,) and batch.dtype == np.float32
+    assert np.allclose(batch, [network.predict(row)[0] for row in features], atol=1e-6)
+    assert network.predict(np.zeros((0, 20))).shape == (0,)
+
+
+def test_train_step_fits_targets():
+    network = ValueNetwork([20, 16, 8, 1], learning_rate=1e-2, seed=0)
+    rng = np.random.default_rng(2)
+    features = rng.random((32, 20), dtype=np.float32)
+    targets = features[:, :5].sum(axis=1) - 2.5
+
+    first = network.train_step(features, targets)
+    for _ in range(300):
+        loss = network.train_step(features, targets)
+    assert loss < first * 0.05
+    assert np.mean((network.predict(features) - targets) ** 2) < first * 0.05
+
+
+def test_train_step_ignores_zero_weighted_samples():
+    network = ValueNetwork([4, 8, 1], seed=0)
+    features = np.eye(4, dtype=np.float32)
+    # With zero weight on every sample the loss and the gradients are zero, so nothing moves
+    weights_before = [weight.copy() for weight in network.weights]
+    assert network.train_step(features, np.ones(4), sample_weights=np.zeros(4)) == 0.0
+    assert all(np.array_equal(before, after) for before, after in zip(weights_before, network.weights))
+
+
+def test_visualize_reports_last_forward_pass():
+    network = ValueNetwork([12, 6, 1], seed=0)
+    network.predict(np.ones((2, 12), dtype=np.float32))
+    layers = network.visualize(["input", "hidden", "output"], max_neurons=4)
+    assert [layer["layer"] for layer in layers] == ["input", "hidden", "output"]
+    assert [len(layer["neurons"]) for layer in layers] == [4, 4, 1]
+    assert all(0.0 <= neuron["activation"] <= 1.0 for layer in layers for neuron in layer["neurons"])
@@ -0,0 +1,99 @@
+import random
+import chess
+import numpy as np
+import pytest
+from dqn_agent import DQNAgent
+from value_table import ValueTable
+
+
+def test_lookup_slots_keeps_batch_keys_when_evicting():
+    """Making room for a batch's missing keys must not evict (and reset) its found keys"""
+    table = ValueTable(max_entries=100, eviction_policy="lfu")
+    keys = np.arange(1, 101, dtype=np.uint64)
+    table.set_many(keys, np.ones(100, dtype=np.float32))
+    for _ in range(5):
+        table.get_many(keys[10:])
+
+    slots = table.lookup_slots([1, 1000])
+
+    assert table.values[slots[0]] == 1.0
+    assert table.values[slots[1]] == 0.0
+    assert len(table) <= 100
+
+
+def test_batch_larger_than_cap_never_exceeds_it():
+    """A batch with more keys than the cap stores only what fits and reports the rest as -1"""
+    table = ValueTable(max_entries=10)
+    table.set_many(np.arange(1, 51, dtype=np.uint64), np.arange(1, 51, dtype=np.float32))
+    assert len(table) == 10
+    assert table.get_many(np.arange(1, 11, dtype=np.uint64)).tolist() == list(range(1, 11))
+
+    # Every old entry can be evicted for a new batch, but only the first 10 of 20 keys fit
+    slots = table.lookup_slots(np.arange(100, 120, dtype=np.uint64))
+    assert len(table) == 10
+    assert (slots[:10] >= 0).all() and (slots[10:] == -1).all()
+
+    table[1000] = 1.0
+    assert len(table) <= 10
+    assert table.get(1000) == 1.0
+
+
+def test_byte_cap_bounds_capacity():
+    """Growth stops at the capacity max_bytes allows"""
+    table = ValueTable(initial_capacity=16, max_bytes=64 * ValueTable.SLOT_BYTES)
+    for start in range(0, 1000, 100):
+        table.set_many(np.arange(start + 1, start + 101, dtype=np.uint64), np.ones(100, dtype=np.float32))
+        assert table.capacity <= table.max_capacity
+        assert len(table) <= table.entry_limit
+
+
+def full_agent_table(cap):
+    """An agent whose capped table is full of frequently visited positions, so new entries are evicted first"""
+    agent = DQNAgent(max_table_entries=cap, eviction_policy="lfu")
+    keys = np.arange(1, cap, dtype=np.uint64)
+    agent.board_values.set_many(keys, np.ones(len(keys), dtype=np.float32))
+    for _ in range(5):
+        agent.board_values.get_many(keys)
+    return agent
+
+
+def test_training_on_a_full_table_keeps_both_transition_keys():
+    """Inserting a transition's next state must not evict the state it was just inserted with"""
+    agent = full_agent_table(10)
+    board = chess.Board()
+    state = agent.position_key(board)
+    agent.apply_training_move(board, chess.Move.from_uci("e2e4"))
+    assert agent.board_values.get(state) is not None
+    assert agent.board_values.get(agent.position_key(board)) is not None
+
+    agent = full_agent_table(10)
+    agent.update_network(chess.STARTING_FEN, chess.Move.from_uci("e2e4"), 1.0,
+                         "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+    assert agent.board_values.get(agent.position_key(chess.STARTING_FEN)) == pytest.approx(agent.alpha * (
+        1.0 + agent.gamma * agent.board_values.get(agent.position_key(board))))
+
+    agent = full_agent_table(10)
+    assert agent._ingest_moves(["e2e4", "e7e5", "g1f3", "b8c6"], "1-0")
+
+
+def test_self_play_on_a_tiny_table():
+    random.seed(0)
+    agent = DQNAgent(max_table_entries=100, eviction_policy="lfu")
+    for _ in range(3):
+        agent.play_training_game()
+    assert len(agent.board_values) <= 100
+
+
+def test_lookup_slots_on_a_full_table_keeps_the_whole_batch():
+    """Every key of the batch survives, even when the only other entry is the most visited one"""
+    table = ValueTable(max_entries=8, eviction_policy="lfu")
+    table.set_many(np.arange(1, 9, dtype=np.uint64), np.arange(1, 9, dtype=np.float32))
+    for _ in range(10):
+        table.get_many([8])
+
+    batch = np.array([3, 1, 100, 7, 2, 3, 4, 5, 6], dtype=np.uint64)
+    slots = table.lookup_slots(batch, default=-1.0)
+    assert (slots >= 0).all() and len(table) == 8
+    assert table.values[slots].tolist() == [3, 1, -1, 7, 2, 3, 4, 5, 6]
+    assert slots[0] == slots[5]
+    assert table.get(8) is None
@@ -0,0 +1,165 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class TrainingJob:
+    """Progress and results of one background self-play training run"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+    FINISHED_STATES = (COMPLETED, CANCELLED, FAILED)
+
+    def __init__(self, num_games, options=None):
+        self.job_id = str(uuid.uuid4())
+        self.num_games = num_games
+        self.options = options or {}
+        self.status = self.QUEUED
+        self.results = []
+        self.epsilon = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED_STATES
+
+    def record_game(self, game_data):
+        """Progress callback: remember a finished game"""
+        self.results.append(game_data)
+        self.epsilon = game_data.get("epsilon")
+
+    def to_dict(self):
+        """JSON-serializable progress report"""
+        games_completed = len(self.results)
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        white_wins = sum(1 for game in self.results if game["result"] == "1-0")
+        black_wins = sum(1 for game in self.results if game["result"] == "0-1")
+        draws = sum(1 for game in self.results if game["result"] == "1/2-1/2")
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "num_games": self.num_games,
+            "options": self.options,
+            "games_completed": games_completed,
+            "games_per_second": games_completed / elapsed if elapsed > 0 else 0.0,
+            "elapsed_seconds": elapsed,
+            "epsilon": self.epsilon,
+            "error": self.error,
+            # Per-game results so far; move lists are left out to keep polling cheap
+            "results": [
+                {key: value for key, value in game.items() if key != "moves_list"}
+                for game in self.results
+            ],
+            "last_game": self.results[-1].get("moves_list", []) if self.results else [],
+            "summary": {
+                "white_wins_percent": (white_wins / games_completed) * 100 if games_completed else 0,
+                "black_wins_percent": (black_wins / games_completed) * 100 if games_completed else 0,
+                "draws_percent": (draws / games_completed) * 100 if games_completed else 0
+            }
+        }
+
+
+class TrainingJobManager:
+    """Runs training jobs one at a time on a background worker thread
+
+    Jobs are queued and executed in submission order so HTTP request threads
+    return immediately. The worker runs inside the Flask application context
+    so the training code can use the database session.
+
+    Jobs live in the memory of the process that submitted them. With several
+    server workers (e.g. gunicorn -w N), status and cancel requests must reach
+    that same worker, or they answer 404 for a job that is still running; run
+    the app with a single worker or route clients back to it.
+
+    Args:
+        app: Flask application whose context the jobs run in
+        train: Callable (num_games, progress_callback, should_stop, **options) -> list of game results
+        max_jobs: Number of jobs kept for status queries (oldest finished jobs are dropped)
+    """
+
+    def __init__(self, app, train, max_jobs=50):
+        self.logger = logging.getLogger(__name__)
+        self.app = app
+        self.train = train
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.worker = None
+
+    def submit(self, num_games, **options):
+        """Queue a training job and return it; options are passed through to the train callable"""
+        job = TrainingJob(num_games, options)
+        with self.lock:
+            self.jobs[job.job_id] = job
+            self._prune()
+            if self.worker is None or not self.worker.is_alive():
+                # Daemon thread so a running job never blocks interpreter shutdown
+                self.worker = threading.Thread(target=self._work, name="training-worker", daemon=True)
+                self.worker.start()
+        self.queue.put(job)
+        return job
+
+    def get(self, job_id):
+        """Return the job with job_id, or None"""
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        """Return every known job, oldest first"""
+        with self.lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id):
+        """Ask a job to stop after its current game; returns the job, or None if unknown"""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_event.set()
+        return job
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond max_jobs"""
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished]:
+            if len(self.jobs) <= self.max_jobs:
+                break
+            del self.jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            try:
+                self._run(job)
+            finally:
+                self.queue.task_done()
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            job.status = TrainingJob.CANCELLED
+            job.finished_at = time.time()
+            return
+
+        job.status = TrainingJob.RUNNING
+        job.started_at = time.time()
+        self.logger.info(f"Training job {job.job_id} started ({job.num_games} games)")
+        try:
+            with self.app.app_context():
+                self.train(job.num_games, job.record_game, job.cancel_event.is_set, **job.options)
+            stopped_early = job.cancel_event.is_set() and len(job.results) < job.num_games
+            job.status = TrainingJob.CANCELLED if stopped_early else TrainingJob.COMPLETED
+        except Exception as e:
+            self.logger.error(f"Training job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.status = TrainingJob.FAILED
+        finally:
+            job.finished_at = time.time()
+        self.logger.info(f"Training job {job.job_id} {job.status} after {len(job.results)} games")
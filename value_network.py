@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class ValueNetwork:
+    """Fully connected value network (ReLU hidden layers, linear output) in NumPy
+
+    All matmuls run in float32 on whole batches: predict() scores N feature rows
+    in one call and train_step() applies one Adam step to a weighted MSE loss.
+    The activations of the first row of the last forward pass are kept for
+    visualization.
+
+    Args:
+        layer_sizes: Neuron counts from input to output, e.g. [784, 512, 256, 128, 1]
+        learning_rate: Adam step size
+        seed: Seed for weight initialization
+    """
+
+    def __init__(self, layer_sizes, learning_rate=1e-3, seed=None):
+        self.layer_sizes = list(layer_sizes)
+        self.learning_rate = learning_rate
+        rng = np.random.default_rng(seed)
+
+        # He initialization for ReLU layers; a small output layer keeps initial predictions near zero
+        self.weights = []
+        self.biases = []
+        for i, (fan_in, fan_out) in enumerate(zip(self.layer_sizes[:-1], self.layer_sizes[1:])):
+            scale = np.sqrt(2.0 / fan_in) if i < len(self.layer_sizes) - 2 else 0.01
+            self.weights.append((rng.standard_normal((fan_in, fan_out)) * scale).astype(np.float32))
+            self.biases.append(np.zeros(fan_out, dtype=np.float32))
+
+        # Adam moment estimates
+        self._m = [np.zeros_like(p) for p in self.weights + self.biases]
+        self._v = [np.zeros_like(p) for p in self.weights + self.biases]
+        self.steps = 0
+        self.last_activations = None
+
+    def _forward(self, features):
+        """Return the activations of every layer, input first"""
+        activations = [np.asarray(features, dtype=np.float32)]
+        last = len(self.weights) - 1
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            z = activations[-1] @ weight + bias
+            activations.append(z if i == last else np.maximum(z, 0))
+        self.last_activations = [layer[0].copy() for layer in activations]
+        return activations
+
+    def predict(self, features):
+        """Score a (N, input) batch and return an (N,) float32 array"""
+        features = np.atleast_2d(features)
+        if features.shape[0] == 0:
+            return np.zeros(0, dtype=np.float32)
+        return self._forward(features)[-1][:, 0]
+
+    def train_step(self, features, targets, sample_weights=None):
+        """Take one Adam step on the (optionally weighted) mean squared error and return the loss"""
+        features = np.atleast_2d(features)
+        targets = np.asarray(targets, dtype=np.float32)
+        if sample_weights is None:
+            sample_weights = np.ones(len(targets), dtype=np.float32)
+        sample_weights = np.asarray(sample_weights, dtype=np.float32)
+
+        activations = self._forward(features)
+        error = activations[-1][:, 0] - targets
+        loss = float(np.mean(sample_weights * error ** 2))
+
+        # Backpropagate d(loss)/d(output) through the layers
+        grad = (2.0 / len(targets) * sample_weights * error)[:, None].astype(np.float32)
+        weight_grads = [None] * len(self.weights)
+        bias_grads = [None] * len(self.biases)
+        for i in range(len(self.weights) - 1, -1, -1):
+            weight_grads[i] = activations[i].T @ grad
+            bias_grads[i] = grad.sum(axis=0)
+            if i > 0:
+                grad = (grad @ self.weights[i].T) * (activations[i] > 0)
+
+        # Adam update
+        self.steps += 1
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        correction1 = 1 - beta1 ** self.steps
+        correction2 = 1 - beta2 ** self.steps
+        for param, grad_value, m, v in zip(self.weights + self.biases, weight_grads + bias_grads, self._m, self._v):
+            m *= beta1
+            m += (1 - beta1) * grad_value
+            v *= beta2
+            v += (1 - beta2) * grad_value ** 2
+            param -= (self.learning_rate * (m / correction1) / (np.sqrt(v / correction2) + eps)).astype(np.float32)
+        return loss
+
+    def visualize(self, layer_names, max_neurons=10):
+        """Describe the first max_neurons activations of each layer from the last forward pass
+
+        Activations are scaled into [0, 1] per layer; each neuron's weight is its
+        connection to the first neuron of the next layer.
+        """
+        visual_data = []
+        for index, name in enumerate(layer_names):
+            activations = self.last_activations[index][:max_neurons]
+            peak = float(np.max(np.abs(activations))) or 1.0
+            outgoing = self.weights[index][:max_neurons, 0] if index < len(self.weights) else np.zeros(len(activations))
+            visual_data.append({
+                "layer": name,
+                "neurons": [
+                    {"id": i, "activation": float(abs(value) / peak), "weight": float(np.clip(weight * 10, -1, 1))}
+                    for i, (value, weight) in enumerate(zip(activations.tolist(), outgoing.tolist()))
+                ]
+            })
+        return visual_data
@@ -0,0 +1,339 @@
+import numpy as np
+
+
+class ValueTable:
+    """Compact position-value store keyed by 64-bit Zobrist hashes
+
+    Keys and values live in preallocated NumPy arrays and collisions are resolved
+    with linear probing (open addressing). Supports the subset of the dict
+    interface the agent uses.
+
+    The table can be bounded by a number of entries and/or a number of bytes.
+    When the cap is reached, a fraction of the entries is evicted in one pass,
+    either least-recently-used ("lru") or least-visited ("lfu", ties broken by
+    recency). Every lookup that finds an entry bumps its visit count, so
+    frequently seen positions survive eviction.
+    """
+
+    MAX_LOAD_FACTOR = 0.7
+    EVICTION_POLICIES = ("lru", "lfu")
+
+    # Bytes per slot: key (8) + value (4) + occupied (1) + visits (4) + last access (8)
+    SLOT_BYTES = 25
+
+    def __init__(self, initial_capacity=1024, max_entries=None, max_bytes=None,
+                 eviction_policy="lfu", evict_fraction=0.1):
+        if eviction_policy not in self.EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction_policy}")
+        self.eviction_policy = eviction_policy
+        self.evict_fraction = evict_fraction
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # Largest capacity the byte cap allows (the table grows by doubling)
+        self.max_capacity = None
+        if max_bytes is not None:
+            self.max_capacity = 1
+            while self.max_capacity * 2 * self.SLOT_BYTES <= max_bytes:
+                self.max_capacity <<= 1
+
+        capacity = 1
+        while capacity < initial_capacity:
+            capacity <<= 1
+        if self.max_capacity is not None:
+            capacity = min(capacity, self.max_capacity)
+
+        # Counters reported through DQNAgent.get_training_stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clock = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """Allocate empty arrays for the given power-of-two capacity"""
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.keys = np.zeros(capacity, dtype=np.uint64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.occupied = np.zeros(capacity, dtype=bool)
+        self.visits = np.zeros(capacity, dtype=np.uint32)
+        self.last_access = np.zeros(capacity, dtype=np.uint64)
+        self.size = 0
+
+    @property
+    def entry_limit(self):
+        """Maximum number of entries allowed by the configured caps, or None if unbounded"""
+        limits = []
+        if self.max_entries is not None:
+            limits.append(self.max_entries)
+        if self.max_capacity is not None:
+            limits.append(int(self.max_capacity * self.MAX_LOAD_FACTOR))
+        return min(limits) if limits else None
+
+    def _find_slot(self, key):
+        """Return the slot holding key, or the empty slot where it would be inserted"""
+        keys, occupied, mask = self.keys, self.occupied, self.mask
+        key = np.uint64(key)
+        slot = int(key) & mask
+        while occupied[slot] and keys[slot] != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def _touch(self, slot):
+        """Record an access to slot for the LRU ordering"""
+        self.clock += 1
+        self.last_access[slot] = self.clock
+
+    def _rebuild(self, capacity, keep):
+        """Reallocate at capacity and reinsert the occupied slots selected by the keep mask"""
+        keys = self.keys[keep]
+        values = self.values[keep]
+        visits = self.visits[keep]
+        last_access = self.last_access[keep]
+        self._allocate(capacity)
+        self._insert_unique(keys, values, visits, last_access)
+
+    def _insert_unique(self, keys, values, visits, last_access):
+        """Insert distinct keys that are not in the table yet, probing all of them in parallel"""
+        pending = np.arange(len(keys))
+        slots = (keys & np.uint64(self.mask)).astype(np.int64)
+        while len(pending):
+            free = ~self.occupied[slots]
+            # Among keys probing the same free slot, the first one claims it
+            candidates = np.flatnonzero(free)
+            _, first = np.unique(slots[candidates], return_index=True)
+            placed = candidates[first]
+            target = slots[placed]
+            source = pending[placed]
+            self.keys[target] = keys[source]
+            self.values[target] = values[source]
+            self.visits[target] = visits[source]
+            self.last_access[target] = last_access[source]
+            self.occupied[target] = True
+
+            remaining = np.ones(len(pending), dtype=bool)
+            remaining[placed] = False
+            pending = pending[remaining]
+            slots = (slots[remaining] + 1) & self.mask
+        self.size += len(keys)
+
+    def _find_many(self, keys):
+        """Vectorized probe for distinct uint64 keys; returns their slots, or -1 where missing"""
+        slots = (keys & np.uint64(self.mask)).astype(np.int64)
+        result = np.full(len(keys), -1, dtype=np.int64)
+        pending = np.arange(len(keys))
+        while len(pending):
+            probe = slots[pending]
+            occupied = self.occupied[probe]
+            hit = occupied & (self.keys[probe] == keys[pending])
+            result[pending[hit]] = probe[hit]
+            # Keep probing keys that landed on a different occupied key
+            collided = occupied & ~hit
+            pending = pending[collided]
+            slots[pending] = (probe[collided] + 1) & self.mask
+        return result
+
+    def _evict(self, needed=1, protected=None):
+        """Drop the lowest-priority entries according to the eviction policy
+
+        Evicts evict_fraction of the table, or more if needed new entries would
+        still not fit under the cap. Slots in protected (the entries of the batch
+        being looked up) are never evicted; _make_room never asks for more room
+        than the other entries can free.
+        """
+        candidates = self.occupied.copy()
+        if protected is not None:
+            candidates[protected] = False
+        occupied_slots = np.flatnonzero(candidates)
+        limit = self.entry_limit
+        count = max(1, int(self.size * self.evict_fraction), self.size + needed - limit)
+        count = min(count, len(occupied_slots))
+        if count == 0:
+            return
+        if self.eviction_policy == "lru":
+            order = np.argpartition(self.last_access[occupied_slots], count - 1)[:count]
+        else:
+            order = np.lexsort((self.last_access[occupied_slots], self.visits[occupied_slots]))[:count]
+            # Age the visit counts so positions that were popular long ago can be evicted eventually
+            self.visits >>= 1
+        keep = self.occupied.copy()
+        keep[occupied_slots[order]] = False
+        self._rebuild(self.capacity, keep)
+        self.evictions += count
+
+    def _make_room(self, needed=1, protected=None):
+        """Make room for up to needed more entries, evicting (except protected slots) or growing
+
+        Returns how many of them fit under the cap: fewer than needed when the
+        protected entries plus needed would exceed entry_limit.
+        """
+        limit = self.entry_limit
+        if limit is not None:
+            protected_count = 0 if protected is None else len(protected)
+            needed = max(0, min(needed, limit - protected_count))
+            if self.size + needed > limit:
+                self._evict(needed, protected)
+        capacity = self.capacity
+        while self.size + needed > capacity * self.MAX_LOAD_FACTOR and (
+                self.max_capacity is None or capacity < self.max_capacity):
+            capacity *= 2
+        if capacity != self.capacity:
+            self._rebuild(capacity, self.occupied.copy())
+        return needed
+
+    def lookup_slots(self, keys, default=0.0):
+        """Return the slot of every key, inserting missing keys with the default value
+
+        default is a scalar or an array with one value per key (the first
+        occurrence's value is used for duplicates).
+
+        Works on a whole batch at once so callers can gather, compute and scatter
+        on self.values directly. Duplicate keys map to the same slot. The returned
+        slots stay valid until the next insertion.
+
+        Keys of the batch are never evicted to make room for its missing keys.
+        When the batch has more distinct keys than the entry cap allows, only the
+        missing keys that fit are inserted (in batch order) and the others get
+        slot -1, so the table never exceeds the cap; callers must skip those.
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        slots = self._find_many(unique_keys)
+        found = slots >= 0
+        self.hits += int(found.sum())
+        self.misses += int((~found).sum())
+
+        self.clock += 1
+        self.visits[slots[found]] += 1
+        self.last_access[slots[found]] = self.clock
+
+        missing = int((~found).sum())
+        if missing:
+            # The batch's own entries are excluded from eviction: evicting one
+            # would reinsert it below with the default value, losing what it learned
+            fits = self._make_room(missing, protected=slots[found])
+            slots = self._find_many(unique_keys)
+            new = np.flatnonzero(slots < 0)
+            if fits < len(new):
+                new = np.sort(new[np.argsort(first[new], kind="stable")[:fits]])
+            new_keys = unique_keys[new]
+            count = len(new_keys)
+            if np.ndim(default):
+                new_values = np.asarray(default, dtype=np.float32)[first[new]]
+            else:
+                new_values = np.full(count, default, dtype=np.float32)
+            self._insert_unique(
+                new_keys,
+                new_values,
+                np.ones(count, dtype=np.uint32),
+                np.full(count, self.clock, dtype=np.uint64)
+            )
+            slots = self._find_many(unique_keys)
+        return slots[inverse]
+
+    def get_many(self, keys, default=np.nan):
+        """Vectorized get: return a float32 array of values for keys, with default where missing"""
+        keys = np.asarray(keys, dtype=np.uint64)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        slots = self._find_many(unique_keys)
+        found = slots >= 0
+        self.hits += int(found.sum())
+        self.misses += int((~found).sum())
+
+        self.clock += 1
+        self.visits[slots[found]] += 1
+        self.last_access[slots[found]] = self.clock
+
+        values = np.full(len(unique_keys), default, dtype=np.float32)
+        values[found] = self.values[slots[found]]
+        return values[inverse]
+
+    def set_many(self, keys, values):
+        """Store values for a batch of keys, inserting missing ones (the last value wins for duplicates)"""
+        keys = np.asarray(keys, dtype=np.uint64)
+        if len(keys):
+            # Look up first: inserting can grow the table and replace self.values
+            slots = self.lookup_slots(keys)
+            stored = slots >= 0  # Keys beyond the entry cap are dropped
+            self.values[slots[stored]] = np.broadcast_to(values, slots.shape)[stored]
+
+    def items(self):
+        """Return (keys, values) arrays of every stored entry"""
+        return self.keys[self.occupied].copy(), self.values[self.occupied].copy()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        slot = self._find_slot(key)
+        if self.occupied[slot]:
+            self.hits += 1
+            self.visits[slot] += 1
+            self._touch(slot)
+            return True
+        self.misses += 1
+        return False
+
+    def __getitem__(self, key):
+        slot = self._find_slot(key)
+        if not self.occupied[slot]:
+            raise KeyError(key)
+        self._touch(slot)
+        return float(self.values[slot])
+
+    def __setitem__(self, key, value):
+        slot = self._find_slot(key)
+        if not self.occupied[slot]:
+            if not self._make_room():
+                return  # entry_limit is 0
+            slot = self._find_slot(key)
+            self.keys[slot] = key
+            self.occupied[slot] = True
+            self.visits[slot] = 1
+            self.size += 1
+        self.values[slot] = value
+        self._touch(slot)
+
+    def get(self, key, default=None):
+        """Return the value stored for key, or default if it is missing"""
+        slot = self._find_slot(key)
+        if not self.occupied[slot]:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.visits[slot] += 1
+        self._touch(slot)
+        return float(self.values[slot])
+
+    def peek(self, key, default=None):
+        """Like get, but leaves visit counts, recency and hit-rate counters untouched"""
+        slot = self._find_slot(key)
+        if not self.occupied[slot]:
+            return default
+        return float(self.values[slot])
+
+    def clear(self):
+        """Remove every entry while keeping the current capacity"""
+        self._allocate(self.capacity)
+
+    @property
+    def nbytes(self):
+        """Memory used by the backing arrays in bytes"""
+        return (self.keys.nbytes + self.values.nbytes + self.occupied.nbytes
+                + self.visits.nbytes + self.last_access.nbytes)
+
+    def stats(self):
+        """Return size, memory, eviction and hit-rate counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.size,
+            "capacity": self.capacity,
+            "bytes": self.nbytes,
+            "max_entries": self.entry_limit,
+            "eviction_policy": self.eviction_policy,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0
+        }